@@ -1,5 +1,5 @@
 # Load necessary libraries
-from flask import Flask, render_template, request, url_for, redirect, send_from_directory, jsonify
+from flask import Flask, render_template, request, url_for, redirect, send_from_directory, send_file, jsonify
 import os
 import threading
 import time
@@ -11,9 +11,12 @@ from werkzeug.utils import secure_filename
 import fitz # PyMuPDF
 import logging
 import zipfile
+import io
+from collections import OrderedDict
 from manage_pdfs.compress import compress_pdf
-from manage_pdfs.split import split_pdf_with_progress as split_func
+from manage_pdfs.split import split_pdf_with_progress as split_func, plan_split, validate_split_options
 from manage_pdfs.combine import combine_pdfs
+from manage_pdfs.images_to_pdf import IMAGE_EXTENSIONS
 from manage_pdfs.flatten import flatten_pdf
 from manage_pdfs.optimize import optimize_pdf
 from manage_pdfs.extract_pages import extract_pages
@@ -57,6 +60,18 @@ redaction_services = {}
 # Split progress tracking
 split_progress = {}
 
+# Split job parameters, kept so cancelled split jobs can be resumed
+split_jobs = {}
+
+# Held while a resume request claims a cancelled split job, so it is only restarted once
+split_resume_lock = threading.Lock()
+
+# Uploaded split inputs (keyed by upload ID), so planning and splitting only upload the file once.
+# Least recently used first; only the newest SPLIT_UPLOADS_MAX are kept
+split_uploads = OrderedDict()
+split_uploads_lock = threading.Lock()
+SPLIT_UPLOADS_MAX = 16
+
 # Flatten progress tracking
 flatten_progress = {}
 
@@ -181,6 +196,7 @@ def api_flatten_pdf():
         input_pdf = request.files.get('input_pdf')
         output_filename = request.form.get('output_filename')
         output_folder = request.form.get('output_folder', app.config['OUTPUT_FOLDER'])
+        remove_blank = request.form.get('remove_blank', 'false').lower() == 'true'
         
         if not input_pdf or not output_filename:
             return jsonify({'success': False, 'error': 'Missing required fields.'}), 400
@@ -203,7 +219,8 @@ def api_flatten_pdf():
         # Start flatten in background thread
         flatten_thread = threading.Thread(
             target=flatten_pdf_with_progress,
-            args=(job_id, input_path, output_path, flatten_progress)
+            args=(job_id, input_path, output_path, flatten_progress),
+            kwargs={'remove_blank': remove_blank}
         )
         flatten_thread.daemon = True
         flatten_thread.start()
@@ -215,6 +232,94 @@ def api_flatten_pdf():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+def save_split_upload(input_pdf):
+    """Save an uploaded PDF for splitting in its own folder and return (upload_id, input_path)"""
+    upload_id = str(uuid.uuid4())
+    upload_dir = os.path.join(app.config['UPLOAD_FOLDER'], upload_id)
+    os.makedirs(upload_dir, exist_ok=True)
+    # Keep the original (secured) file name - chunk names are based on it
+    input_path = os.path.join(upload_dir, secure_filename(input_pdf.filename))
+    input_pdf.save(input_path)
+    with split_uploads_lock:
+        split_uploads[upload_id] = input_path
+        while len(split_uploads) > SPLIT_UPLOADS_MAX:
+            _, old_path = split_uploads.popitem(last=False)
+            remove_split_input(old_path)
+    return upload_id, input_path
+
+def remove_split_input(input_path):
+    """Delete an uploaded split input's folder, unless a running or resumable split job still reads it"""
+    for job_id, job in split_jobs.items():
+        progress = split_progress.get(job_id, {})
+        if job['input_path'] == input_path and (progress.get('status') in ('starting', 'processing') or progress.get('resumable')):
+            return
+    shutil.rmtree(os.path.dirname(input_path), ignore_errors=True)
+
+def release_split_upload(upload_id):
+    """Forget an uploaded split input and delete its file"""
+    with split_uploads_lock:
+        input_path = split_uploads.pop(upload_id, None)
+        if input_path:
+            remove_split_input(input_path)
+
+def run_split_job(job_id, upload_id, *args, **kwargs):
+    """Run a split job, then release its upload once the job completed or failed (cancelled jobs keep it to resume)"""
+    split_pdf_with_progress(job_id, *args, **kwargs)
+    if split_progress.get(job_id, {}).get('status') in ('complete', 'error'):
+        release_split_upload(upload_id)
+
+def get_split_upload(upload_id):
+    """Path of a previously uploaded split input, or None if it is unknown or gone"""
+    if not upload_id:
+        return None
+    with split_uploads_lock:
+        input_path = split_uploads.get(upload_id)
+        if input_path is None:
+            return None
+        if not os.path.exists(input_path):
+            del split_uploads[upload_id]
+            return None
+        split_uploads.move_to_end(upload_id)
+        return input_path
+
+@app.route('/api/split_plan', methods=['POST'])
+def api_split_plan():
+    """Plan a split (chunk page ranges and estimated sizes) without writing any output"""
+    try:
+        upload_id = request.form.get('upload_id')
+        input_path = get_split_upload(upload_id)
+        if input_path is None:
+            input_pdf = request.files.get('input_pdf')
+            if not input_pdf:
+                return jsonify({'success': False, 'error': 'Missing required fields.'}), 400
+            upload_id, input_path = save_split_upload(input_pdf)
+        
+        max_pages = request.form.get('max_pages_per_chunk')
+        max_size_mb = request.form.get('max_size_mb')
+        outline_level = request.form.get('outline_level')
+        target_chunks = request.form.get('target_chunks')
+        split_options = {
+            'max_pages_per_chunk': int(max_pages) if max_pages else None,
+            'max_chunk_size_mb': float(max_size_mb) if max_size_mb else None,
+            'outline_level': int(outline_level) if outline_level else None,
+            'split_by_labels': request.form.get('split_by_labels', 'false').lower() == 'true',
+            'target_chunks': int(target_chunks) if target_chunks else None
+        }
+        
+        error = validate_split_options(**split_options)
+        if error:
+            return jsonify({'success': False, 'error': error, 'upload_id': upload_id}), 400
+        
+        plan = plan_split(input_path, **split_options)
+        if plan is None:
+            return jsonify({'success': False, 'error': 'Could not plan the split.', 'upload_id': upload_id}), 500
+        
+        return jsonify({'success': True, 'upload_id': upload_id, 'plan': plan})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid split settings: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/split_pdf', methods=['POST'])
 def api_split_pdf():
     try:
@@ -226,25 +331,34 @@ def api_split_pdf():
         logging.debug(f"Request form: {dict(request.form)}")
         
         input_pdf = request.files.get('input_pdf')
+        upload_id = request.form.get('upload_id')  # From a previous /api/split_plan call
         output_zip = request.form.get('output_zip')
         output_folder = request.form.get('output_folder', app.config['OUTPUT_FOLDER'])
         max_pages = request.form.get('max_pages_per_chunk')
         max_size_mb = request.form.get('max_size_mb')  # New parameter
+        outline_level = request.form.get('outline_level')
+        split_by_labels = request.form.get('split_by_labels', 'false').lower() == 'true'
+        target_chunks = request.form.get('target_chunks')
+        optimize_chunks = request.form.get('optimize_chunks', 'false').lower() == 'true'
+        remove_blank = request.form.get('remove_blank', 'false').lower() == 'true'
         
-        logging.debug(f"Parsed values: input_pdf={input_pdf}, output_zip={output_zip}, max_pages={max_pages}, max_size_mb={max_size_mb}")
+        logging.debug(f"Parsed values: input_pdf={input_pdf}, output_zip={output_zip}, max_pages={max_pages}, max_size_mb={max_size_mb}, outline_level={outline_level}, split_by_labels={split_by_labels}, target_chunks={target_chunks}")
         
-        if not input_pdf or not output_zip:
-            logging.error(f"Missing required fields: input_pdf={bool(input_pdf)}, output_zip={bool(output_zip)}")
+        input_path = get_split_upload(upload_id)
+        
+        if (not input_pdf and input_path is None) or not output_zip:
+            logging.error(f"Missing required fields: input_pdf={bool(input_pdf)}, upload_id={upload_id}, output_zip={bool(output_zip)}")
             return jsonify({'success': False, 'error': 'Missing required fields.'}), 400
             
-        # Must have either max_pages OR max_size_mb, but not both
-        if not max_pages and not max_size_mb:
-            return jsonify({'success': False, 'error': 'Either max pages or max size must be specified.'}), 400
-        if max_pages and max_size_mb:
-            return jsonify({'success': False, 'error': 'Cannot specify both max pages and max size.'}), 400
+        # Must have exactly one split method: max_pages, max_size_mb, outline_level, split_by_labels or target_chunks
+        methods_given = sum(bool(m) for m in (max_pages, max_size_mb, outline_level, split_by_labels, target_chunks))
+        if methods_given == 0:
+            return jsonify({'success': False, 'error': 'Either max pages, max size, bookmark level, page labels or number of parts must be specified.'}), 400
+        if methods_given > 1:
+            return jsonify({'success': False, 'error': 'Only one split method can be specified.'}), 400
             
-        input_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(input_pdf.filename))
-        input_pdf.save(input_path)
+        if input_path is None:
+            upload_id, input_path = save_split_upload(input_pdf)
         
         # Create a temp output dir for split files
         temp_dir = tempfile.mkdtemp(dir=app.config['UPLOAD_FOLDER'])
@@ -261,10 +375,28 @@ def api_split_pdf():
         # Generate job ID
         job_id = str(uuid.uuid4())
         
+        # Remember the job parameters so a cancelled split can be resumed
+        split_jobs[job_id] = {
+            'upload_id': upload_id,
+            'input_path': input_path,
+            'temp_dir': temp_dir,
+            'max_pages': max_pages,
+            'max_size_mb': max_size_mb,
+            'outline_level': outline_level,
+            'split_by_labels': split_by_labels,
+            'target_chunks': target_chunks,
+            'optimize_chunks': optimize_chunks,
+            'remove_blank': remove_blank,
+            'output_zip': output_zip,
+            'output_folder': output_folder
+        }
+        
         # Start split in background thread
         split_thread = threading.Thread(
-            target=split_pdf_with_progress,
-            args=(job_id, input_path, temp_dir, max_pages, max_size_mb, output_zip, output_folder, split_progress)
+            target=run_split_job,
+            args=(job_id, upload_id, input_path, temp_dir, max_pages, max_size_mb, output_zip, output_folder, split_progress),
+            kwargs={'outline_level': outline_level, 'split_by_labels': split_by_labels, 'target_chunks': target_chunks,
+                    'optimize_chunks': optimize_chunks, 'remove_blank': remove_blank}
         )
         split_thread.daemon = True
         split_thread.start()
@@ -288,6 +420,10 @@ def api_combine_pdfs():
         output_filename = request.form.get('output_filename')
         output_folder = request.form.get('output_folder', app.config['OUTPUT_FOLDER'])
         should_optimize = request.form.get('optimize', 'false').lower() == 'true'
+        remove_blank = request.form.get('remove_blank', 'false').lower() == 'true'
+        remove_duplicates = request.form.get('remove_duplicates', 'false').lower() == 'true'
+        duplicate_policy = 'last' if request.form.get('duplicate_policy') == 'last' else 'first'
+        zip_order = 'natural' if request.form.get('zip_order') == 'natural' else 'sorted'
         
         logging.debug(f"pdf_files count: {len(pdf_files) if pdf_files else 0}")
         logging.debug(f"output_filename: {output_filename}")
@@ -297,6 +433,11 @@ def api_combine_pdfs():
         if not pdf_files or not output_filename:
             logging.error(f"Missing required fields - pdf_files: {len(pdf_files) if pdf_files else 0}, output_filename: {output_filename}")
             return jsonify({'success': False, 'error': 'Missing required fields.'}), 400
+        if len(pdf_files) > 1 and any(f.filename.lower().endswith('.zip') for f in pdf_files):
+            return jsonify({'success': False, 'error': 'Upload either one zip archive or PDF files, not both.'}), 400
+        image_count = sum(f.filename.lower().endswith(IMAGE_EXTENSIONS) for f in pdf_files)
+        if 0 < image_count < len(pdf_files):
+            return jsonify({'success': False, 'error': 'Upload either scanned images or PDF files, not both.'}), 400
         
         # Ensure .pdf extension
         if not output_filename.lower().endswith('.pdf'):
@@ -305,7 +446,7 @@ def api_combine_pdfs():
         # Ensure output folder exists
         os.makedirs(output_folder, exist_ok=True)
         
-        # Save all input files to temporary locations
+        # Save all input files (a zip archive is saved as is - its PDFs are read straight from it) to temporary locations
         input_paths = []
         for i, f in enumerate(pdf_files):
             path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(f.filename))
@@ -329,7 +470,9 @@ def api_combine_pdfs():
         # Start combine in background thread
         combine_thread = threading.Thread(
             target=combine_pdf_with_progress,
-            args=(job_id, input_paths, output_path, should_optimize, combine_progress)
+            args=(job_id, input_paths, output_path, should_optimize, combine_progress),
+            kwargs={'remove_blank': remove_blank, 'remove_duplicates': remove_duplicates, 'duplicate_policy': duplicate_policy,
+                    'zip_order': zip_order}
         )
         combine_thread.daemon = True
         combine_thread.start()
@@ -346,9 +489,20 @@ def api_optimize_pdf():
         output_filename = request.form.get('output_filename')
         output_folder = request.form.get('output_folder', app.config['OUTPUT_FOLDER'])
         aggressive = True # request.form.get('aggressive') == 'true'
+        target_mb = request.form.get('target_mb', '').strip()
+        dedupe_images = request.form.get('dedupe_images', 'false').lower() == 'true'
+        subset_fonts = request.form.get('subset_fonts', 'false').lower() == 'true'
         
         if not input_pdf or not output_filename:
             return jsonify({'success': False, 'error': 'Missing required fields.'}), 400
+
+        # Optional target size - optimize just enough to get under it
+        try:
+            target_mb = float(target_mb) if target_mb else None
+        except ValueError:
+            target_mb = -1
+        if target_mb is not None and target_mb <= 0:
+            return jsonify({'success': False, 'error': 'Target size must be a positive number of MB.'}), 400
         
         # Ensure .pdf extension
         if not output_filename.lower().endswith('.pdf'):
@@ -376,7 +530,8 @@ def api_optimize_pdf():
         # Start optimize in background thread
         optimize_thread = threading.Thread(
             target=optimize_pdf_with_progress,
-            args=(job_id, input_path, output_path, aggressive, optimize_progress)
+            args=(job_id, input_path, output_path, optimize_progress, aggressive, target_mb),
+            kwargs={'dedupe_images': dedupe_images, 'subset_fonts': subset_fonts}
         )
         optimize_thread.daemon = True
         optimize_thread.start()
@@ -466,6 +621,67 @@ def cancel_split(job_id):
         logging.error(f"Error cancelling split job {job_id}: {str(e)}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/resume_split/<job_id>', methods=['POST'])
+def resume_split(job_id):
+    """Resume a cancelled split job, regenerating only chunks that are missing or invalid"""
+    try:
+        job = split_jobs.get(job_id)
+        if job is None or job_id not in split_progress:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+        with split_resume_lock:
+            if not split_progress[job_id].get('resumable', False):
+                return jsonify({'success': False, 'error': 'Job cannot be resumed'}), 409
+            if not os.path.exists(job['input_path']) or not os.path.isdir(job['temp_dir']):
+                return jsonify({'success': False, 'error': 'Job files are no longer available'}), 410
+            # Claim the job before the thread starts, so a second request can't resume it too
+            split_progress[job_id].update({'resumable': False, 'status': 'starting', 'message': 'Resuming...'})
+        
+        # Restart the split in background thread against the same temp directory
+        split_thread = threading.Thread(
+            target=run_split_job,
+            args=(job_id, job['upload_id'], job['input_path'], job['temp_dir'], job['max_pages'], job['max_size_mb'],
+                  job['output_zip'], job['output_folder'], split_progress),
+            kwargs={'resume': True, 'outline_level': job['outline_level'], 'split_by_labels': job['split_by_labels'],
+                    'target_chunks': job['target_chunks'], 'optimize_chunks': job['optimize_chunks'],
+                    'remove_blank': job['remove_blank']}
+        )
+        split_thread.daemon = True
+        split_thread.start()
+        
+        logging.info(f"Split job {job_id} resumed")
+        return jsonify({'success': True, 'job_id': job_id})
+    except Exception as e:
+        logging.error(f"Error resuming split job {job_id}: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/split_chunk/<job_id>/<int:index>')
+def download_split_chunk(job_id, index):
+    """Download one finished chunk of a split job, while the job is still running or after it completed"""
+    try:
+        job = split_jobs.get(job_id)
+        progress = split_progress.get(job_id)
+        if job is None or progress is None:
+            return "Job not found", 404
+        chunk = next((c for c in progress.get('ready_chunks', []) if c['index'] == index), None)
+        if chunk is None:
+            return "Chunk not ready", 404
+        
+        # While the job runs (or after a cancel) the chunk is still in the job's temp dir
+        if os.path.isfile(os.path.join(job['temp_dir'], chunk['file'])):
+            return send_from_directory(job['temp_dir'], chunk['file'], as_attachment=True)
+        
+        # Once the job is complete the temp dir is gone - serve the chunk from the zip
+        zip_path = progress.get('zipfile')
+        if zip_path and os.path.exists(zip_path):
+            with zipfile.ZipFile(zip_path, 'r') as zipf:
+                data = zipf.read(chunk['file'])
+            return send_file(io.BytesIO(data), mimetype='application/pdf', as_attachment=True, download_name=chunk['file'])
+        
+        return "File not found", 404
+    except Exception as e:
+        logging.error(f"Split chunk download error: {str(e)}")
+        return "Download failed", 500
+
 @app.route('/api/flatten_progress/<job_id>')
 def get_flatten_progress(job_id):
     """Get progress for a flatten job"""
@@ -4,6 +4,7 @@ import time
 import sys
 import os
 import socket
+import multiprocessing
 from contextlib import closing
 from app import app
 from utils.manage_output_dir import FolderSelector
@@ -67,4 +68,6 @@ def create_window():
     webview.start(debug=False)
 
 if __name__ == '__main__':
+    # Needed for the worker processes used by split/partition in frozen builds
+    multiprocessing.freeze_support()
     create_window()
\ No newline at end of file
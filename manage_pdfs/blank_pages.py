@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Blank page detection and removal
+Finds blank backs and separator sheets in scanned sets: pages with empty content
+streams are blank outright, the rest are rendered in gray at low resolution and
+counted as blank when almost no pixels are dark enough to be ink
+"""
+
+import fitz  # PyMuPDF
+import os
+import sys
+import logging
+import numpy as np
+from manage_pdfs.resource_graph import page_content, has_annotations
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.blank_pages input.pdf output.pdf [--report-only]
+
+# Render resolution for the ink check - low enough to be fast on large sheets,
+# and scanner speckle averages out at this size
+BLANK_DPI = 24
+
+# Gray level (0 = black, 255 = white) below which a pixel counts as ink
+INK_THRESHOLD = 200
+
+# A page is blank when at most this fraction of its pixels is ink - kept low so a
+# sheet with a single short line of text (e.g. a title) is never dropped
+MAX_INK_COVERAGE = 0.001
+
+# Border (fraction of each side) ignored by the ink check - scanner edge shadows and punch holes
+EDGE_MARGIN = 0.04
+
+# Pages whose decoded content streams are larger than this are drawings or text, not blank sheets
+MAX_BLANK_CONTENT_BYTES = 16 * 1024
+
+def ink_coverage(page, dpi=BLANK_DPI, ink_threshold=INK_THRESHOLD, margin=EDGE_MARGIN):
+    """
+    Fraction of a page's pixels that are ink, from a low resolution gray render
+
+    Returns:
+        float: Ink coverage between 0 and 1
+    """
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False, annots=True)
+    gray = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+    crop_y, crop_x = int(pixmap.height * margin), int(pixmap.width * margin)
+    if crop_y * 2 < pixmap.height and crop_x * 2 < pixmap.width:
+        gray = gray[crop_y:pixmap.height - crop_y, crop_x:pixmap.width - crop_x]
+    if gray.size == 0:
+        return 0.0
+    return float(np.count_nonzero(gray < ink_threshold)) / gray.size
+
+def check_page(doc, page_num, dpi=BLANK_DPI, ink_threshold=INK_THRESHOLD, max_coverage=MAX_INK_COVERAGE):
+    """
+    Decide whether one page is blank
+
+    Returns:
+        dict: {'page': 1-indexed page, 'blank': bool, 'reason': str, 'ink_coverage': float or None}
+    """
+    page_xref = doc.page_xref(page_num)
+
+    # Cheap checks first - most pages never need rendering
+    if has_annotations(doc, page_xref):
+        # Markups and comments are someone's work - never drop those pages
+        return {'page': page_num + 1, 'blank': False, 'reason': 'annotations', 'ink_coverage': None}
+    content = page_content(doc, page_xref)
+    if not content.strip():
+        return {'page': page_num + 1, 'blank': True, 'reason': 'empty content', 'ink_coverage': 0.0}
+    if len(content) > MAX_BLANK_CONTENT_BYTES:
+        return {'page': page_num + 1, 'blank': False, 'reason': 'content', 'ink_coverage': None}
+
+    coverage = ink_coverage(doc[page_num], dpi=dpi, ink_threshold=ink_threshold)
+    blank = coverage <= max_coverage
+    return {'page': page_num + 1, 'blank': blank, 'reason': 'no ink' if blank else 'ink', 'ink_coverage': coverage}
+
+def find_blank_pages(doc, dpi=BLANK_DPI, ink_threshold=INK_THRESHOLD, max_coverage=MAX_INK_COVERAGE, progress_callback=None, cancellation_checker=None):
+    """
+    Check every page of a document for blankness
+
+    Args:
+        doc: Open fitz document
+        dpi: Render resolution for the ink check
+        ink_threshold: Gray level below which a pixel counts as ink
+        max_coverage: Largest ink coverage (fraction of pixels) a blank page may have
+        progress_callback: Optional function(current_page, total_pages, percentage, message) returning False to cancel
+        cancellation_checker: Optional function returning True if the operation should be cancelled
+
+    Returns:
+        list: One check_page result per page, or None if cancelled
+    """
+    results = []
+    page_count = doc.page_count
+    for page_num in range(page_count):
+        if cancellation_checker and cancellation_checker():
+            logging.info(f"Blank page check cancelled at page {page_num + 1}")
+            return None
+        results.append(check_page(doc, page_num, dpi=dpi, ink_threshold=ink_threshold, max_coverage=max_coverage))
+        if progress_callback:
+            if not progress_callback(page_num + 1, page_count, int((page_num + 1) / page_count * 100), f"Checked page {page_num + 1} of {page_count} for blank pages"):
+                logging.info(f"Blank page check cancelled at page {page_num + 1}")
+                return None
+    blank_count = sum(result['blank'] for result in results)
+    logging.info(f"Found {blank_count} blank pages out of {page_count}")
+    return results
+
+def blank_page_entries(results, source=None):
+    """Report entries for the blank pages in find_blank_pages results (optionally tagged with the source file name)"""
+    entries = []
+    for result in results:
+        if result['blank']:
+            entry = {'page': result['page'], 'reason': result['reason'], 'ink_coverage': result['ink_coverage']}
+            if source is not None:
+                entry['file'] = source
+            entries.append(entry)
+    return entries
+
+def page_runs(page_numbers):
+    """Contiguous (first, last) runs of sorted page numbers, e.g. [0, 1, 2, 5] -> [(0, 2), (5, 5)]"""
+    runs = []
+    for page_num in page_numbers:
+        if runs and runs[-1][1] == page_num - 1:
+            runs[-1] = (runs[-1][0], page_num)
+        else:
+            runs.append((page_num, page_num))
+    return runs
+
+def remove_blank_pages(input_pdf, output_pdf, dpi=BLANK_DPI, ink_threshold=INK_THRESHOLD, max_coverage=MAX_INK_COVERAGE, progress_callback=None, cancellation_checker=None):
+    """
+    Write a copy of a PDF without its blank pages
+
+    Returns:
+        dict: {'pages': input page count, 'kept': pages written, 'removed': [report entries]},
+              or None on failure or cancellation
+    """
+    if not os.path.exists(input_pdf):
+        logging.error(f"Input file '{input_pdf}' does not exist.")
+        return None
+
+    try:
+        doc = fitz.open(input_pdf)
+        results = find_blank_pages(doc, dpi=dpi, ink_threshold=ink_threshold, max_coverage=max_coverage,
+                                   progress_callback=progress_callback, cancellation_checker=cancellation_checker)
+        if results is None:
+            doc.close()
+            return None
+
+        removed = blank_page_entries(results)
+        keep = [result['page'] - 1 for result in results if not result['blank']]
+        if not keep:
+            logging.error("Every page is blank - nothing to write.")
+            doc.close()
+            return None
+
+        if removed:
+            doc.select(keep)
+        doc.save(output_pdf, garbage=4, deflate=True, clean=True)
+        doc.close()
+
+        for entry in removed:
+            logging.info(f"Removed blank page {entry['page']} ({entry['reason']})")
+        logging.info(f"Saved '{output_pdf}' with {len(keep)} of {len(results)} pages")
+        return {'pages': len(results), 'kept': len(keep), 'removed': removed}
+    except Exception as e:
+        logging.error(f"Error removing blank pages: {e}")
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Find and remove blank pages')
+    parser.add_argument('input_pdf', help='Path to the input PDF file')
+    parser.add_argument('output_pdf', nargs='?', help='Path to save the PDF without blank pages')
+    parser.add_argument('--report-only', action='store_true', help='Only list the blank pages, don\'t write a PDF')
+    parser.add_argument('--dpi', type=int, default=BLANK_DPI, help=f'Render resolution for the ink check (default: {BLANK_DPI})')
+    parser.add_argument('--max-coverage', type=float, default=MAX_INK_COVERAGE,
+                        help=f'Largest fraction of ink pixels on a blank page (default: {MAX_INK_COVERAGE})')
+
+    args = parser.parse_args()
+
+    if args.report_only:
+        if not os.path.exists(args.input_pdf):
+            logging.error(f"Input file '{args.input_pdf}' does not exist")
+            sys.exit(1)
+        doc = fitz.open(args.input_pdf)
+        results = find_blank_pages(doc, dpi=args.dpi, max_coverage=args.max_coverage)
+        doc.close()
+        blank = blank_page_entries(results)
+        print(f"{len(blank)} blank pages out of {len(results)}:")
+        for entry in blank:
+            coverage = f", {entry['ink_coverage']:.4%} ink" if entry['ink_coverage'] else ''
+            print(f"  Page {entry['page']}: {entry['reason']}{coverage}")
+        sys.exit(0)
+
+    if not args.output_pdf:
+        parser.error('output_pdf is required unless --report-only is given')
+
+    report = remove_blank_pages(args.input_pdf, args.output_pdf, dpi=args.dpi, max_coverage=args.max_coverage)
+    if not report:
+        print("Blank page removal failed!")
+        sys.exit(1)
+    print(f"Removed {len(report['removed'])} blank pages, kept {report['kept']} of {report['pages']}")
+    for entry in report['removed']:
+        print(f"  Page {entry['page']}: {entry['reason']}")
@@ -6,44 +6,780 @@ Combine multiple PDF files into a single PDF
 import fitz
 import sys
 import os
+import queue
+import shutil
+import zipfile
 import logging
+import tempfile
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from manage_pdfs.blank_pages import find_blank_pages, blank_page_entries, page_runs
+from manage_pdfs.fonts import unify_embedded_fonts
+from manage_pdfs.images import dedupe_embedded_images
+from manage_pdfs.duplicate_pages import plan_duplicate_pages, POLICY_FIRST
 
 logging.basicConfig(level=logging.INFO)
 
-def combine_pdfs(pdf_list, output_path):
+# Tree merge: number of files merged into each intermediate file
+DEFAULT_FAN_IN = 16
+
+# Prefetch: how many inputs are read ahead of the merge, and the largest file
+# read into memory ahead of time (bigger files are opened from disk when their turn comes)
+PREFETCH_LOOKAHEAD = 4
+PREFETCH_MAX_BYTES = 256 * 1024 * 1024
+
+# Zip input: members combined in name order, or in the order they are stored in the archive
+ZIP_ORDER_SORTED = 'sorted'
+ZIP_ORDER_NATURAL = 'natural'
+
+# Set in tree merge worker processes - tells them to stop before their next file
+_cancel_event = None
+
+def _insert_pdf_file(combined, pdf, remove_blank=False, blank_report=None, cancellation_checker=None, skip_pages=None, data=None):
+    """
+    Append one input file to the combined document, optionally leaving out its
+    blank pages and the pages in skip_pages (0-indexed, e.g. duplicates)
+
+    data is the file's content if it was prefetched (see prefetch_files).
+
+    Returns:
+        bool: True, or False if the blank page check was cancelled
+    """
+    doc = fitz.open(stream=data, filetype='pdf') if data is not None else fitz.open(pdf)
+    try:
+        if remove_blank or skip_pages:
+            keep = [page_num for page_num in range(doc.page_count) if page_num not in (skip_pages or ())]
+            if remove_blank:
+                results = find_blank_pages(doc, cancellation_checker=cancellation_checker)
+                if results is None:
+                    return False
+                if blank_report is not None:
+                    blank_report.extend(blank_page_entries(results, source=os.path.basename(pdf)))
+                keep = [page_num for page_num in keep if not results[page_num]['blank']]
+            # Insert the runs of kept pages
+            for first, last in page_runs(keep):
+                combined.insert_pdf(doc, from_page=first, to_page=last, links=True, annots=True)
+        else:
+            combined.insert_pdf(doc, links=True, annots=True)
+    finally:
+        doc.close()
+    return True
+
+def _cancelled(progress_callback, cancellation_checker, current, total, percentage, message):
+    """Report progress and check for cancellation; True if the combine should stop"""
+    if cancellation_checker and cancellation_checker():
+        return True
+    return bool(progress_callback) and not progress_callback(current, total, percentage, message)
+
+def _share_resources(combined, unify_fonts=False, font_report=None, dedupe_images=False, image_report=None):
+    """Share the fonts and images that the inputs of a combined document each carry a copy of"""
+    if unify_fonts:
+        report = unify_embedded_fonts(combined)
+        if font_report is not None:
+            font_report.update(report)
+    if dedupe_images:
+        report = dedupe_embedded_images(combined)
+        if image_report is not None:
+            image_report.update(report)
+
+def _save_combined(combined, output_path, total_files, unify_fonts, font_report, dedupe_images, image_report, progress_callback, cancellation_checker):
+    """Share resources across inputs and save the combined document, reporting both phases; closes the document"""
+    try:
+        if unify_fonts or dedupe_images:
+            if _cancelled(progress_callback, cancellation_checker, total_files, total_files, 90, "Sharing fonts and images across files..."):
+                logging.info("Combine cancelled before sharing resources")
+                return False
+            _share_resources(combined, unify_fonts, font_report, dedupe_images, image_report)
+        if _cancelled(progress_callback, cancellation_checker, total_files, total_files, 95,
+                      f"Saving combined PDF ({combined.page_count} pages)..."):
+            logging.info("Combine cancelled before saving")
+            return False
+        # Save with garbage collection and object stream compression
+        logging.info(f"Saving combined PDF to '{output_path}' ({combined.page_count} pages)...")
+        combined.save(output_path, garbage=4, deflate=True, clean=True, use_objstms=1)
+        logging.info(f"Combined PDF saved successfully.")
+        if progress_callback:
+            progress_callback(total_files, total_files, 100, "Combine complete!")
+        return True
+    finally:
+        combined.close()
+
+def _plan_duplicates(pdf_list, duplicate_policy, duplicate_report, progress_callback, cancellation_checker):
+    """Fingerprint the (sorted) inputs and pick their duplicate pages; returns path -> pages to skip, or None if cancelled"""
+    if _cancelled(progress_callback, cancellation_checker, 0, len(pdf_list), 0, f"Looking for duplicate pages in {len(pdf_list)} files..."):
+        return None
+    planned = plan_duplicate_pages(pdf_list, duplicate_policy, cancellation_checker)
+    if planned is None:
+        return None
+    skip_pages, report = planned
+    if duplicate_report is not None:
+        duplicate_report.extend(report)
+    return skip_pages
+
+def check_input(pdf, data=None):
+    """
+    Check that a file can be combined - only the trailer and xref are read, not the pages
+
+    data is the file's content if it isn't read from the path (e.g. a zip member).
+
+    Returns:
+        str: Problem description, or None if the file is fine
+    """
+    if data is None and not os.path.exists(pdf):
+        return "does not exist"
+    try:
+        doc = fitz.open(stream=data, filetype='pdf') if data is not None else fitz.open(pdf)
+    except Exception as e:
+        return f"is corrupt or not a PDF ({e})"
+    try:
+        if doc.needs_pass:
+            return "is encrypted (password required)"
+        if not doc.is_pdf:
+            return "is not a PDF"
+        if doc.page_count == 0:
+            return "has no pages"
+        if doc.is_repaired:
+            logging.warning(f"Input file '{pdf}' is damaged - it was repaired when opened")
+        return None
+    finally:
+        doc.close()
+
+def _validate_inputs(pdf_list, input_errors=None):
+    """
+    Log and check the input list before any merging
+
+    Every file is checked (see check_input), so all corrupt or encrypted inputs
+    are reported at once. Problems ({'file', 'error'}) are appended to
+    input_errors if a list is given.
+
+    Returns:
+        bool: False if the list can't be combined
+    """
     if not isinstance(pdf_list, list) or len(pdf_list) == 0:
         logging.error("pdf_list must be a non-empty list of file paths.")
         return False
+    valid = True
     for i, pdf in enumerate(pdf_list):
-        if not os.path.exists(pdf):
-            logging.error(f"Input file '{pdf}' does not exist.")
-            return False
+        problem = check_input(pdf)
+        if problem:
+            logging.error(f"Input file '{pdf}' {problem}.")
+            if input_errors is not None:
+                input_errors.append({'file': os.path.basename(pdf), 'error': problem})
+            valid = False
         else:
             logging.info(f"PDF file {i+1}/{len(pdf_list)}: '{pdf}'")
+    return valid
+
+def prefetch_files(pdf_list, lookahead=PREFETCH_LOOKAHEAD):
+    """
+    Yield (path, file content) in order while a background thread reads the next files
+
+    Reading (slow on network shares) overlaps with merging. Only the reads run
+    on the thread - PyMuPDF isn't thread-safe, so parsing stays with the
+    caller. At most lookahead files are held in memory; files larger than
+    PREFETCH_MAX_BYTES are yielded with None content and opened from disk.
+    """
+    buffer = queue.Queue(maxsize=lookahead)
+    stop = threading.Event()
+
+    def read_ahead():
+        for pdf in pdf_list:
+            try:
+                if os.path.getsize(pdf) > PREFETCH_MAX_BYTES:
+                    data = None
+                else:
+                    with open(pdf, 'rb') as f:
+                        data = f.read()
+            except OSError as e:
+                data = e
+            while not stop.is_set():
+                try:
+                    buffer.put((pdf, data), timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            if stop.is_set():
+                return
+
+    reader = threading.Thread(target=read_ahead, daemon=True)
+    reader.start()
+    try:
+        for _ in pdf_list:
+            pdf, data = buffer.get()
+            if isinstance(data, Exception):
+                raise data
+            yield pdf, data
+    finally:
+        # The reader stops before its next file
+        stop.set()
+
+def combine_pdfs(pdf_list, output_path, remove_blank=False, blank_report=None, tree_merge=False, fan_in=DEFAULT_FAN_IN, max_memory_mb=None, unify_fonts=False, font_report=None, dedupe_images=False, image_report=None, progress_callback=None, cancellation_checker=None, dedupe_pages=False, duplicate_policy=POLICY_FIRST, duplicate_report=None, input_errors=None):
+    """
+    Combine PDFs (in sorted order) into one file
+
+    With remove_blank=True blank pages are left out (see blank_pages), and one
+    entry per dropped page ({'file', 'page', 'reason', 'ink_coverage'}) is
+    appended to blank_report if a list is given.
+
+    With unify_fonts=True the font subsets each input embeds are shared or
+    merged across inputs (see fonts.unify_embedded_fonts); its report goes into
+    font_report if a dict is given. With dedupe_images=True images with the
+    same decoded pixels are stored once (see images.dedupe_embedded_images),
+    reported into image_report.
+
+    With dedupe_pages=True pages that repeat across the inputs (same content,
+    resources, annotations and size - see duplicate_pages) are kept once: the
+    first occurrence, or the last with duplicate_policy='last' ("latest wins").
+    One entry per dropped page ({'file', 'page', 'kept_file', 'kept_page'}) is
+    appended to duplicate_report if a list is given.
+
+    With tree_merge=True the inputs are merged in batches first (see
+    tree_combine_pdfs), which keeps memory bounded for hundreds of inputs.
+
+    Every input is checked before merging starts (see check_input); corrupt,
+    encrypted or missing files fail the combine up front and are listed in
+    input_errors ({'file', 'error'}) if a list is given. While merging, the
+    next inputs are read ahead on a background thread (see prefetch_files).
+
+    progress_callback is an optional function(current_file, total_files, percentage, message)
+    returning False to cancel; it is called after every file (with the page
+    count so far in the message) and before saving. cancellation_checker is an
+    optional function returning True to cancel - it is checked before every
+    file (and during blank page checks), so a cancelled combine stops within
+    one file and writes nothing.
+
+    Returns:
+        bool: True if successful, False on failure or cancellation
+    """
+    if tree_merge:
+        return tree_combine_pdfs(pdf_list, output_path, fan_in=fan_in, max_memory_mb=max_memory_mb,
+                                 remove_blank=remove_blank, blank_report=blank_report,
+                                 unify_fonts=unify_fonts, font_report=font_report,
+                                 dedupe_images=dedupe_images, image_report=image_report,
+                                 progress_callback=progress_callback, cancellation_checker=cancellation_checker,
+                                 dedupe_pages=dedupe_pages, duplicate_policy=duplicate_policy, duplicate_report=duplicate_report,
+                                 input_errors=input_errors)
+    if _cancelled(progress_callback, cancellation_checker, 0, len(pdf_list or []), 0, "Checking input files..."):
+        return False
+    if not _validate_inputs(pdf_list, input_errors):
+        return False
     try:
-        combined = fitz.open()
         # Sort pdf list to maintain order
         pdf_list.sort()
-        logging.info(f"Combining {len(pdf_list)} PDFs...")
+        total_files = len(pdf_list)
+        skip_pages = {}
+        if dedupe_pages:
+            skip_pages = _plan_duplicates(pdf_list, duplicate_policy, duplicate_report, progress_callback, cancellation_checker)
+            if skip_pages is None:
+                logging.info("Combine cancelled while looking for duplicate pages")
+                return False
+        combined = fitz.open()
+        logging.info(f"Combining {total_files} PDFs...")
+        with contextlib.closing(prefetch_files(pdf_list)) as prefetched:
+            for i, (pdf, data) in enumerate(prefetched):
+                if ((cancellation_checker and cancellation_checker())
+                        or not _insert_pdf_file(combined, pdf, remove_blank, blank_report, cancellation_checker,
+                                                skip_pages.get(pdf), data)):
+                    logging.info(f"Combine cancelled at file {i + 1} of {total_files}")
+                    combined.close()
+                    return False
+                logging.info(f"Added '{pdf}' ({combined.page_count} total pages)")
+                if _cancelled(progress_callback, cancellation_checker, i + 1, total_files, int((i + 1) / total_files * 90),
+                              f"Added file {i + 1} of {total_files} ({combined.page_count} pages so far)"):
+                    logging.info(f"Combine cancelled after file {i + 1} of {total_files}")
+                    combined.close()
+                    return False
+        if combined.page_count == 0:
+            logging.error("Every page is blank - nothing to combine.")
+            combined.close()
+            return False
+        return _save_combined(combined, output_path, total_files, unify_fonts, font_report, dedupe_images, image_report,
+                              progress_callback, cancellation_checker)
+    except Exception as e:
+        logging.error(f"Error combining PDFs: {e}")
+        return False
+
+def plan_merge_batches(pdf_list, fan_in=DEFAULT_FAN_IN, max_batch_bytes=None):
+    """
+    Group consecutive inputs into merge batches
+
+    A batch holds at most fan_in files and, if max_batch_bytes is given, at
+    most that many bytes of input (a single larger file gets a batch of its own).
+
+    Returns:
+        list: Lists of input paths, in input order
+    """
+    batches, batch, batch_bytes = [], [], 0
+    for pdf in pdf_list:
+        size = os.path.getsize(pdf)
+        if batch and (len(batch) >= fan_in or (max_batch_bytes and batch_bytes + size > max_batch_bytes)):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(pdf)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _init_merge_worker(cancel_event):
+    """Worker process initializer - keep the shared cancel event"""
+    global _cancel_event
+    _cancel_event = cancel_event
+
+def _merge_batch(pdf_list, out_path, remove_blank=False, skip_pages=None):
+    """
+    Merge one batch of files into an intermediate file (runs in a worker process)
+
+    Returns:
+        tuple: (True if the file was written - False if every page was blank, None if
+                cancelled; blank page entries)
+    """
+    combined = fitz.open()
+    blank_report = []
+    cancellation_checker = _cancel_event.is_set if _cancel_event is not None else None
+    try:
         for pdf in pdf_list:
-            doc = fitz.open(pdf)
-            combined.insert_pdf(doc, links=True, annots=True)
-            doc.close()
-            logging.info(f"Added '{pdf}' ({combined.page_count} total pages)")
-        # Save with garbage collection and object stream compression
-        logging.info(f"Saving combined PDF to '{output_path}'...")
-        combined.save(output_path, garbage=4, deflate=True, clean=True)
+            if ((cancellation_checker and cancellation_checker())
+                    or not _insert_pdf_file(combined, pdf, remove_blank, blank_report, cancellation_checker,
+                                            (skip_pages or {}).get(pdf))):
+                return None, blank_report
+        if combined.page_count == 0:
+            return False, blank_report
+        # Clean and deduplicate within the batch now - the final merge only appends
+        combined.save(out_path, garbage=4, deflate=True, clean=True)
+    finally:
         combined.close()
-        logging.info(f"Combined PDF saved successfully.")
-        return True
+    return True, blank_report
+
+def tree_combine_pdfs(pdf_list, output_path, fan_in=DEFAULT_FAN_IN, max_memory_mb=None, max_workers=None, remove_blank=False, blank_report=None, unify_fonts=False, font_report=None, dedupe_images=False, image_report=None, progress_callback=None, cancellation_checker=None, dedupe_pages=False, duplicate_policy=POLICY_FIRST, duplicate_report=None, input_errors=None):
+    """
+    Combine PDFs (in sorted order) by merging them as a tree
+
+    Inputs are merged in batches of fan_in files into intermediate files by
+    parallel worker processes, then the intermediates are merged the same way
+    until at most fan_in files are left. Those are appended to a work file one
+    at a time, with an incremental save and a reopen after each, so only one
+    file's objects are held in memory while merging. The work file is then
+    saved in full with garbage collection, like a flat combine, so fonts and
+    images repeated across batches are stored once. The pages, links and
+    annotations of the result are the same as for a flat combine.
+
+    Args:
+        pdf_list: List of input PDF paths
+        output_path: Path to save the combined PDF
+        fan_in: Number of files merged into each intermediate file (at least 2)
+        max_memory_mb: Rough ceiling on the input held in memory by all workers
+                       together - batches are kept to max_memory_mb / workers of
+                       input. The final garbage-collecting save (and sharing fonts
+                       and images with unify_fonts, dedupe_images) works on the
+                       whole output.
+        max_workers: Number of worker processes (default: CPU count)
+        remove_blank, blank_report, unify_fonts, font_report, dedupe_images, image_report,
+        dedupe_pages, duplicate_policy, duplicate_report, input_errors,
+        progress_callback, cancellation_checker: See combine_pdfs - progress is
+                       reported per merged batch, and a cancel reaches the
+                       workers, which stop before their next file
+
+    Returns:
+        bool: True if successful, False on failure or cancellation
+    """
+    if _cancelled(progress_callback, cancellation_checker, 0, len(pdf_list or []), 0, "Checking input files..."):
+        return False
+    if not _validate_inputs(pdf_list, input_errors):
+        return False
+    if fan_in < 2:
+        logging.error("fan_in must be at least 2.")
+        return False
+
+    work_dir = None
+    try:
+        level_inputs = sorted(pdf_list)
+        workers = max_workers or os.cpu_count() or 1
+        max_batch_bytes = max_memory_mb * 1024 * 1024 / workers if max_memory_mb else None
+        work_dir = tempfile.mkdtemp(prefix='.combine_', dir=os.path.dirname(os.path.abspath(output_path)))
+        level = 0
+        logging.info(f"Tree-combining {len(level_inputs)} PDFs (fan-in {fan_in})...")
+        skip_pages = {}
+        if dedupe_pages:
+            skip_pages = _plan_duplicates(level_inputs, duplicate_policy, duplicate_report, progress_callback, cancellation_checker)
+            if skip_pages is None:
+                logging.info("Tree combine cancelled while looking for duplicate pages")
+                return False
+
+        while len(level_inputs) > fan_in:
+            level += 1
+            batches = plan_merge_batches(level_inputs, fan_in, max_batch_bytes)
+            if len(batches) == len(level_inputs):
+                # Every file is over the memory ceiling on its own - merge by count only
+                batches = plan_merge_batches(level_inputs, fan_in)
+            out_paths = [os.path.join(work_dir, f"level{level}_{i:05d}.pdf") for i in range(len(batches))]
+            logging.info(f"Merge level {level}: {len(level_inputs)} files -> {len(batches)} intermediate files")
+
+            # Blank and duplicate pages are only dropped from the original inputs, at the first level
+            cancel_event = multiprocessing.Event()
+            cancelled = False
+            with ProcessPoolExecutor(max_workers=min(workers, len(batches)), initializer=_init_merge_worker,
+                                     initargs=(cancel_event,)) as executor:
+                futures = [executor.submit(_merge_batch, batch, out_path, remove_blank and level == 1,
+                                           {pdf: skip_pages[pdf] for pdf in batch if pdf in skip_pages} if level == 1 else None)
+                           for batch, out_path in zip(batches, out_paths)]
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()  # Raise worker errors right away
+                    merged = len(futures) - len(pending)
+                    if ((cancellation_checker and cancellation_checker())
+                            or (done and _cancelled(progress_callback, None, merged, len(batches),
+                                                    int(merged / len(batches) * 80) if level == 1 else 80,
+                                                    f"Merged batch {merged} of {len(batches)} (level {level})"))):
+                        # Running workers stop before their next file
+                        cancel_event.set()
+                        for future in pending:
+                            future.cancel()
+                        cancelled = True
+                        break
+            if cancelled:
+                logging.info(f"Tree combine cancelled at merge level {level}")
+                return False
+            results = [future.result() for future in futures]
+
+            for written, batch_blank_report in results:
+                if blank_report is not None:
+                    blank_report.extend(batch_blank_report)
+            if level > 1:
+                # The previous level's intermediates are merged now
+                for path in level_inputs:
+                    os.unlink(path)
+            level_inputs = [out_path for out_path, (written, _) in zip(out_paths, results) if written]
+
+        # Final merge - append what is left one file at a time, writing each out incrementally
+        final_path = os.path.join(work_dir, 'final.pdf')
+        combined = fitz.open()
+        saved = False
+        base_percentage = 80 if level else 0
+        try:
+            with contextlib.closing(prefetch_files(level_inputs)) as prefetched:
+                for i, (pdf, data) in enumerate(prefetched):
+                    if ((cancellation_checker and cancellation_checker())
+                            or not _insert_pdf_file(combined, pdf, remove_blank and level == 0, blank_report, cancellation_checker,
+                                                    skip_pages.get(pdf) if level == 0 else None, data)):
+                        logging.info("Tree combine cancelled during the final merge")
+                        return False
+                    page_count = combined.page_count
+                    if page_count:
+                        # Write the file's objects out and reopen, so they leave memory
+                        if saved:
+                            combined.save(final_path, incremental=True, deflate=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+                        else:
+                            combined.save(final_path, deflate=True)
+                            saved = True
+                        combined.close()
+                        combined = fitz.open(final_path)
+                    if _cancelled(progress_callback, cancellation_checker, i + 1, len(level_inputs),
+                                  base_percentage + int((i + 1) / len(level_inputs) * (90 - base_percentage)),
+                                  f"Added file {i + 1} of {len(level_inputs)} to the final merge ({page_count} pages so far)"):
+                        logging.info("Tree combine cancelled during the final merge")
+                        return False
+        finally:
+            combined.close()
+        if not saved:
+            logging.error("Every page is blank - nothing to combine.")
+            return False
+
+        # Fonts and images from every input meet in the final save, which drops the copies
+        # repeated across batches and the objects the incremental saves left behind
+        return _save_combined(fitz.open(final_path), output_path, len(pdf_list), unify_fonts, font_report,
+                              dedupe_images, image_report, progress_callback, cancellation_checker)
+    except Exception as e:
+        logging.error(f"Error combining PDFs: {e}")
+        return False
+    finally:
+        if work_dir and os.path.exists(work_dir):
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def zip_members(archive, order=ZIP_ORDER_SORTED):
+    """
+    Names of the PDF members of an open zip archive
+
+    Folders, non-PDF files and macOS resource forks (__MACOSX/) are skipped.
+    order is ZIP_ORDER_SORTED (by member name, like combine_pdfs sorts paths)
+    or ZIP_ORDER_NATURAL (the order they are stored in the archive).
+    """
+    if order not in (ZIP_ORDER_SORTED, ZIP_ORDER_NATURAL):
+        raise ValueError(f"Unknown zip order '{order}'")
+    members = [info.filename for info in archive.infolist()
+               if not info.is_dir() and info.filename.lower().endswith('.pdf')
+               and not info.filename.startswith('__MACOSX/')]
+    return sorted(members) if order == ZIP_ORDER_SORTED else members
+
+def _read_zip_member(archive, member, input_errors=None):
+    """
+    Decompress one PDF member of a zip archive and check it (see check_input)
+
+    Problems are logged and appended to input_errors like _validate_inputs does.
+
+    Returns:
+        bytes: The member's content, or None if it can't be combined
+    """
+    try:
+        data = archive.read(member)
+        problem = check_input(member, data)
+    except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+        # Bad CRC, password-protected member or unsupported compression
+        data, problem = None, f"can't be read from the zip archive ({e})"
+    if problem:
+        logging.error(f"Zip member '{member}' {problem}.")
+        if input_errors is not None:
+            input_errors.append({'file': member, 'error': problem})
+        return None
+    return data
+
+def combine_zip(zip_path, output_path, order=ZIP_ORDER_SORTED, remove_blank=False, blank_report=None, unify_fonts=False, font_report=None, dedupe_images=False, image_report=None, progress_callback=None, cancellation_checker=None, dedupe_pages=False, duplicate_policy=POLICY_FIRST, duplicate_report=None, input_errors=None):
+    """
+    Combine the PDFs in a zip archive into one file, without extracting them to disk
+
+    Members are decompressed, checked and added one at a time, so only one
+    member's bytes are held at once, and each is read once (twice with
+    dedupe_pages, which fingerprints every member before merging). Once a
+    member fails its check nothing more is added, but the remaining members
+    are still checked so every problem is reported at once. Members are
+    combined by name (ZIP_ORDER_SORTED) or in archive order
+    (ZIP_ORDER_NATURAL); report entries name the member.
+
+    The other options are the same as combine_pdfs. Tree merging isn't
+    available - the inputs never exist as files for the workers to open.
+
+    Returns:
+        bool: True if successful, False on failure or cancellation
+    """
+    if not os.path.exists(zip_path):
+        logging.error(f"Input file '{zip_path}' does not exist.")
+        return False
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            members = zip_members(archive, order)
+            if not members:
+                logging.error("The zip archive contains no PDF files.")
+                return False
+            if _cancelled(progress_callback, cancellation_checker, 0, len(members), 0, "Checking input files..."):
+                return False
+            total_files = len(members)
+            valid = True
+
+            skip_pages = {}
+            if dedupe_pages:
+                if _cancelled(progress_callback, cancellation_checker, 0, total_files, 0,
+                              f"Looking for duplicate pages in {total_files} files..."):
+                    return False
+
+                def open_member(member):
+                    # Fingerprinting reads every member anyway - check them on the way
+                    nonlocal valid
+                    data = _read_zip_member(archive, member, input_errors)
+                    valid = valid and data is not None
+                    return fitz.open(stream=data, filetype='pdf') if data is not None else fitz.open()
+
+                planned = plan_duplicate_pages(members, duplicate_policy, cancellation_checker, open_member)
+                if planned is None:
+                    logging.info("Combine cancelled while looking for duplicate pages")
+                    return False
+                if not valid:
+                    return False
+                skip_pages, report = planned
+                if duplicate_report is not None:
+                    duplicate_report.extend(report)
+
+            combined = fitz.open()
+            logging.info(f"Combining {total_files} PDFs from '{zip_path}'...")
+            for i, member in enumerate(members):
+                if cancellation_checker and cancellation_checker():
+                    logging.info(f"Combine cancelled at file {i + 1} of {total_files}")
+                    combined.close()
+                    return False
+                data = _read_zip_member(archive, member, input_errors)
+                valid = valid and data is not None
+                if not valid:
+                    continue  # Only check the rest
+                logging.info(f"PDF file {i+1}/{total_files}: '{member}'")
+                if not _insert_pdf_file(combined, member, remove_blank, blank_report, cancellation_checker,
+                                        skip_pages.get(member), data):
+                    logging.info(f"Combine cancelled at file {i + 1} of {total_files}")
+                    combined.close()
+                    return False
+                logging.info(f"Added '{member}' ({combined.page_count} total pages)")
+                if _cancelled(progress_callback, cancellation_checker, i + 1, total_files, int((i + 1) / total_files * 90),
+                              f"Added file {i + 1} of {total_files} ({combined.page_count} pages so far)"):
+                    logging.info(f"Combine cancelled after file {i + 1} of {total_files}")
+                    combined.close()
+                    return False
+        if not valid:
+            combined.close()
+            return False
+        if combined.page_count == 0:
+            logging.error("Every page is blank - nothing to combine.")
+            combined.close()
+            return False
+        return _save_combined(combined, output_path, total_files, unify_fonts, font_report, dedupe_images, image_report,
+                              progress_callback, cancellation_checker)
+    except zipfile.BadZipFile as e:
+        logging.error(f"'{zip_path}' is not a valid zip archive: {e}")
+        if input_errors is not None:
+            input_errors.append({'file': os.path.basename(zip_path), 'error': f"is not a valid zip archive ({e})"})
+        return False
     except Exception as e:
         logging.error(f"Error combining PDFs: {e}")
         return False
 
+def compact_pdf(pdf_path):
+    """
+    Rewrite a PDF in full with garbage collection, replacing it atomically
+
+    Drops the superseded objects that incremental appends leave behind.
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    tmp_path = pdf_path + '.tmp'
+    try:
+        doc = fitz.open(pdf_path)
+        doc.save(tmp_path, garbage=4, deflate=True, clean=True)
+        doc.close()
+        os.replace(tmp_path, pdf_path)
+        logging.info(f"Compacted '{pdf_path}' ({os.path.getsize(pdf_path)/1024/1024:.2f} MB)")
+        return True
+    except Exception as e:
+        logging.error(f"Error compacting PDF: {e}")
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        return False
+
+def append_pdfs(combined_path, pdf_list, remove_blank=False, blank_report=None, compact=False, input_errors=None):
+    """
+    Append PDFs (in sorted order) to the end of an existing combined PDF
+
+    The new pages are written with an incremental save, which adds only the new
+    and changed objects to the end of the file - the cost depends on the size
+    of the new pages, not of the existing file. Files PyMuPDF can't update
+    incrementally (e.g. ones it had to repair) are rewritten in full instead.
+
+    Args:
+        combined_path: Existing combined PDF, updated in place
+        pdf_list: List of PDF paths to append
+        remove_blank, blank_report, input_errors: See combine_pdfs
+        compact: If True, rewrite the whole file with garbage collection
+                 afterwards (see compact_pdf) - slow for large files
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    if not os.path.exists(combined_path):
+        logging.error(f"Combined file '{combined_path}' does not exist.")
+        return False
+    if not _validate_inputs(pdf_list, input_errors):
+        return False
+    try:
+        original_size = os.path.getsize(combined_path)
+        combined = fitz.open(combined_path)
+        page_count = combined.page_count
+        for pdf in sorted(pdf_list):
+            try:
+                problem = None if _insert_pdf_file(combined, pdf, remove_blank, blank_report) else "can't be appended"
+            except Exception as e:
+                problem = f"can't be appended ({e})"
+            if problem:
+                # Nothing is saved, so the combined file is left as it was
+                logging.error(f"Input file '{pdf}' {problem}.")
+                if input_errors is not None:
+                    input_errors.append({'file': os.path.basename(pdf), 'error': problem})
+                combined.close()
+                return False
+            logging.info(f"Appended '{pdf}' ({combined.page_count} total pages)")
+        if combined.page_count == page_count:
+            logging.info("No pages to append.")
+            combined.close()
+            return True
+
+        if combined.can_save_incrementally():
+            new_pages = combined.page_count - page_count
+            combined.save(combined_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+            combined.close()
+            logging.info(f"Appended {new_pages} pages to '{combined_path}' "
+                         f"({(os.path.getsize(combined_path) - original_size)/1024:,.0f} KB written incrementally)")
+        else:
+            logging.warning(f"'{combined_path}' can't be updated incrementally - rewriting it in full")
+            tmp_path = combined_path + '.tmp'
+            combined.save(tmp_path, garbage=4, deflate=True, clean=True)
+            combined.close()
+            os.replace(tmp_path, combined_path)
+            return True
+
+        if compact:
+            return compact_pdf(combined_path)
+        return True
+    except Exception as e:
+        logging.error(f"Error appending PDFs: {e}")
+        return False
+
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        logging.error("Usage: python combine.py file1.pdf file2.pdf ... output.pdf")
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Combine PDF files (in sorted order) into one PDF')
+    parser.add_argument('files', nargs='+', help='Input PDF files followed by the output PDF path '
+                                                 '(with --append: the existing combined PDF to append to)')
+    parser.add_argument('--append', action='store_true', help='Append to the existing output PDF with an incremental save')
+    parser.add_argument('--compact', action='store_true', help='With --append: rewrite the whole file with garbage collection afterwards')
+    parser.add_argument('--remove-blank', action='store_true', help='Leave out blank pages')
+    parser.add_argument('--unify-fonts', action='store_true', help='Share or merge the font subsets embedded by each input')
+    parser.add_argument('--dedupe-images', action='store_true', help='Store images with the same pixels only once')
+    parser.add_argument('--dedupe-pages', action='store_true', help='Keep pages that repeat across the inputs only once')
+    parser.add_argument('--latest-wins', action='store_true', help='With --dedupe-pages: keep the last copy of a page instead of the first')
+    parser.add_argument('--zip', action='store_true', help='The input is one zip archive of PDFs (read without extracting)')
+    parser.add_argument('--zip-order', choices=[ZIP_ORDER_SORTED, ZIP_ORDER_NATURAL], default=ZIP_ORDER_SORTED,
+                        help='With --zip: combine members by name (sorted) or in archive order (natural)')
+    parser.add_argument('--tree', action='store_true', help='Merge in parallel batches first (for hundreds of inputs)')
+    parser.add_argument('--fan-in', type=int, default=DEFAULT_FAN_IN, help=f'Files per batch in tree mode (default: {DEFAULT_FAN_IN})')
+    parser.add_argument('--max-memory', type=float, help='Rough memory ceiling in MB for the batch workers in tree mode')
+
+    args = parser.parse_args()
+    if len(args.files) < 2:
+        logging.error("Usage: python combine.py [options] file1.pdf file2.pdf ... output.pdf")
         sys.exit(1)
-    pdf_files = sys.argv[1:-1]
-    output_pdf = sys.argv[-1]
-    combine_pdfs(pdf_files, output_pdf)
+    pdf_files = args.files[:-1]
+    output_pdf = args.files[-1]
+    input_errors = []
+    if args.zip and (args.append or len(pdf_files) != 1):
+        parser.error('--zip takes exactly one zip archive followed by the output PDF path')
+    if args.append:
+        success = append_pdfs(output_pdf, pdf_files, remove_blank=args.remove_blank, compact=args.compact,
+                              input_errors=input_errors)
+    else:
+        font_report, image_report, duplicate_report = {}, {}, []
+        if args.zip:
+            success = combine_zip(pdf_files[0], output_pdf, order=args.zip_order, remove_blank=args.remove_blank,
+                                  unify_fonts=args.unify_fonts, font_report=font_report,
+                                  dedupe_images=args.dedupe_images, image_report=image_report,
+                                  dedupe_pages=args.dedupe_pages, duplicate_policy='last' if args.latest_wins else 'first',
+                                  duplicate_report=duplicate_report, input_errors=input_errors)
+        else:
+            success = combine_pdfs(pdf_files, output_pdf, remove_blank=args.remove_blank, tree_merge=args.tree,
+                                   fan_in=args.fan_in, max_memory_mb=args.max_memory,
+                                   unify_fonts=args.unify_fonts, font_report=font_report,
+                                   dedupe_images=args.dedupe_images, image_report=image_report,
+                                   dedupe_pages=args.dedupe_pages, duplicate_policy='last' if args.latest_wins else 'first',
+                                   duplicate_report=duplicate_report, input_errors=input_errors)
+        if success and font_report:
+            print(f"Font unification saved {font_report['bytes_saved']/1024:,.0f} KB")
+        if success and image_report:
+            print(f"Removed {image_report['duplicates']} duplicate images, saved {image_report['bytes_saved']/1024:,.0f} KB")
+        if success and duplicate_report:
+            print(f"Removed {len(duplicate_report)} duplicate pages:")
+            for entry in duplicate_report:
+                print(f"  {entry['file']} p.{entry['page']} (same as {entry['kept_file']} p.{entry['kept_page']})")
+    if input_errors:
+        print(f"{len(input_errors)} files can't be combined:")
+        for entry in input_errors:
+            print(f"  {entry['file']} {entry['error']}")
+    sys.exit(0 if success else 1)
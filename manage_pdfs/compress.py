@@ -7,20 +7,31 @@ import fitz # PyMuPDF
 import sys
 import os
 import logging
+from manage_pdfs.optimize import optimize_document
 
 logging.basicConfig(level=logging.INFO)
 
-# Usage: python compress.py input.pdf output.pdf
+# Usage: python compress.py input.pdf output.pdf [--optimize]
 
-def compress_pdf(input_path, output_path):
+def compress_pdf(input_path, output_path, optimize=False):
+    """
+    Compress a PDF, optionally optimizing it first (aggressive, see optimize.optimize_document)
+
+    Both steps work on the same open document and the result is saved once,
+    so the file is parsed only once.
+    """
     if not os.path.exists(input_path):
         logging.error(f"Error: Input file '{input_path}' does not exist.")
         return False
     try:
         logging.info(f"Compressing '{input_path}'...")
         doc = fitz.open(input_path)
+        save_options = {}
+        if optimize:
+            _, save_options = optimize_document(doc, aggressive=True, size_bytes=os.path.getsize(input_path))
         # Save with garbage collection and object stream compression
-        doc.save(output_path, garbage=4, deflate=True, clean=True)
+        save_options.update(garbage=4, deflate=True, clean=True)
+        doc.save(output_path, **save_options)
         doc.close()
         logging.info(f"Compressed PDF saved to '{output_path}'")
         return True
@@ -30,9 +41,10 @@ def compress_pdf(input_path, output_path):
 
 # Main entry point for command line usage
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        logging.error("Usage: python compress.py input.pdf output.pdf")
+    args = [arg for arg in sys.argv[1:] if arg != '--optimize']
+    if len(args) != 2:
+        logging.error("Usage: python compress.py input.pdf output.pdf [--optimize]")
         sys.exit(1)
-    input_pdf = sys.argv[1]
-    output_pdf = sys.argv[2]
-    compress_pdf(input_pdf, output_pdf)
+    input_pdf = args[0]
+    output_pdf = args[1]
+    compress_pdf(input_pdf, output_pdf, optimize='--optimize' in sys.argv[1:])
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Lossy image downsampling
+Scans and site photos are often embedded at several hundred DPI and then shown
+a few inches wide. Each image's effective DPI is found from where it is placed
+on the pages; images above a target DPI are resampled, and images are
+re-encoded as JPEG at a chosen quality. A stream is only replaced when the
+new encoding is smaller
+"""
+
+import fitz  # PyMuPDF
+import os
+import re
+import sys
+import math
+import logging
+from manage_pdfs.images import image_xrefs
+from manage_pdfs.resource_graph import get_resource_graph, stream_length, page_xrefs, KIND_IMAGE
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.downsample input.pdf output.pdf [--dpi 150] [--quality 75]
+
+DEFAULT_TARGET_DPI = 150
+DEFAULT_JPEG_QUALITY = 75
+
+# Color spaces whose pixels are stored as they decode - the JPEG keeps the original /ColorSpace
+_KEEP_COLORSPACES = {'/DeviceGray', '/DeviceRGB', '/CalGray', '/CalRGB', '/ICCBased'}
+
+# Color spaces that are converted to DeviceGray or DeviceRGB on re-encoding (base colors of an
+# indexed image, CMYK - JPEG viewers disagree on how CMYK JPEGs are stored)
+_CONVERT_COLORSPACES = {'/Indexed', '/DeviceCMYK'}
+
+_NAME_PATTERN = re.compile(r'/[A-Za-z]+')
+
+def _colorspace_family(doc, xref):
+    """First name of an image's /ColorSpace entry (e.g. '/ICCBased'), None if it has none"""
+    kind, value = doc.xref_get_key(xref, 'ColorSpace')
+    if kind == 'xref':
+        value = doc.xref_object(int(value.split()[0]), compressed=True)
+    elif kind not in ('name', 'array'):
+        return None
+    match = _NAME_PATTERN.search(value)
+    return match.group(0) if match else None
+
+def effective_dpi(doc, graph=None):
+    """
+    Effective DPI of every image placed on a page
+
+    An image's DPI along each side is its pixel count divided by the length (in
+    inches) of that side on the page; the smaller of the two is its DPI for that
+    placement. An image placed several times gets the DPI of its largest
+    placement (the lowest DPI), so resampling to the target never drops any
+    placement below it. Only pages that use an image (see resource_graph) are
+    interpreted.
+
+    Returns:
+        dict: xref -> effective DPI (float)
+    """
+    graph = graph or get_resource_graph(doc)
+    dpi = {}
+    for page_num in range(doc.page_count):
+        if not len(page_xrefs(graph, page_num, KIND_IMAGE)):
+            continue
+        for info in doc[page_num].get_image_info(xrefs=True):
+            xref = info.get('xref', 0)
+            if not xref:
+                continue  # Inline image - part of the content stream
+            a, b, c, d = info['transform'][:4]
+            width_in, height_in = math.hypot(a, b) / 72, math.hypot(c, d) / 72
+            if width_in <= 0 or height_in <= 0:
+                continue
+            placement = min(info['width'] / width_in, info['height'] / height_in)
+            dpi[xref] = min(dpi.get(xref, float('inf')), placement)
+    return dpi
+
+def _skip_reason(doc, xref, masks):
+    """Why an image can't be re-encoded as JPEG, None if it can"""
+    if xref in masks:
+        return 'soft mask'
+    if doc.xref_get_key(xref, 'ImageMask')[1] == 'true':
+        return 'image mask'
+    if doc.xref_get_key(xref, 'BitsPerComponent')[1] == '1':
+        return 'bilevel'
+    if doc.xref_get_key(xref, 'Mask')[0] == 'array':
+        return 'color key mask'  # Exact color matches don't survive JPEG
+    if doc.xref_get_key(xref, 'Decode')[0] != 'null':
+        return 'decode array'
+    if _colorspace_family(doc, xref) not in _KEEP_COLORSPACES | _CONVERT_COLORSPACES:
+        return 'colorspace'
+    return None
+
+def _encode(doc, xref, width, height, quality):
+    """
+    Decode an image, resample it to width x height and encode it as JPEG
+
+    Returns:
+        tuple: (JPEG bytes, new /ColorSpace value or None to keep the original)
+    """
+    pixmap = fitz.Pixmap(doc, xref)
+    if pixmap.alpha:
+        pixmap = fitz.Pixmap(pixmap, 0)
+    colorspace = None
+    if _colorspace_family(doc, xref) in _CONVERT_COLORSPACES or pixmap.colorspace.n not in (1, 3):
+        if pixmap.colorspace.n != 1:
+            pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+        colorspace = '/DeviceGray' if pixmap.colorspace.n == 1 else '/DeviceRGB'
+    if (width, height) != (pixmap.width, pixmap.height):
+        pixmap = fitz.Pixmap(pixmap, width, height, None)
+    return pixmap.tobytes('jpeg', jpg_quality=quality), colorspace
+
+def _replace_stream(doc, xref, data, width, height, colorspace):
+    """Store a JPEG as an image's stream (in place - every reference keeps pointing at it)"""
+    # update_stream drops /Filter and /DecodeParms when it doesn't compress
+    doc.update_stream(xref, data, compress=False)
+    doc.xref_set_key(xref, 'Filter', '/DCTDecode')
+    doc.xref_set_key(xref, 'DecodeParms', 'null')
+    doc.xref_set_key(xref, 'Width', str(width))
+    doc.xref_set_key(xref, 'Height', str(height))
+    doc.xref_set_key(xref, 'BitsPerComponent', '8')
+    if colorspace:
+        doc.xref_set_key(xref, 'ColorSpace', colorspace)
+
+def downsample_images(doc, target_dpi=DEFAULT_TARGET_DPI, quality=DEFAULT_JPEG_QUALITY):
+    """
+    Resample images above target_dpi and re-encode them as JPEG, in place
+
+    Images above the target DPI are resampled to it; JPEG images at or below it
+    are only re-encoded at the given quality. Other images at or below the target
+    (line art, screenshots) are left alone. Bilevel images, masks and images JPEG
+    can't represent faithfully are skipped. A stream is replaced only when the
+    new encoding is smaller.
+
+    Args:
+        doc: Open fitz document (changed in place)
+        target_dpi: DPI to resample to
+        quality: JPEG quality (1-100)
+
+    Returns:
+        dict: {'images': int, 'replaced': int, 'bytes_before': int, 'bytes_after': int, 'bytes_saved': int,
+               'target_dpi', 'quality',
+               'details': [{'xref', 'width', 'height', 'dpi', 'new_width', 'new_height',
+                            'bytes_before', 'bytes_after', 'replaced', 'reason' (why it wasn't replaced)}]}
+    """
+    graph = get_resource_graph(doc)
+    masks = set(graph['masks'].tolist())
+    dpi = effective_dpi(doc, graph)
+    xrefs = image_xrefs(doc)
+
+    report = {'images': len(xrefs), 'replaced': 0, 'bytes_before': 0, 'bytes_after': 0, 'bytes_saved': 0,
+              'target_dpi': target_dpi, 'quality': quality, 'details': []}
+    for xref in xrefs:
+        if xref not in dpi:
+            continue  # Not placed on any page (e.g. an unused or soft mask image)
+        width = int(doc.xref_get_key(xref, 'Width')[1])
+        height = int(doc.xref_get_key(xref, 'Height')[1])
+        size = stream_length(doc, xref)
+        entry = {'xref': xref, 'width': width, 'height': height, 'dpi': round(dpi[xref], 1),
+                 'new_width': width, 'new_height': height,
+                 'bytes_before': size, 'bytes_after': size, 'replaced': False, 'reason': None}
+        report['details'].append(entry)
+
+        is_jpeg = 'DCTDecode' in doc.xref_get_key(xref, 'Filter')[1]
+        entry['reason'] = _skip_reason(doc, xref, masks)
+        if entry['reason'] is None and dpi[xref] <= target_dpi and not is_jpeg:
+            entry['reason'] = 'below target dpi'
+        if entry['reason']:
+            continue
+
+        scale = min(1.0, target_dpi / dpi[xref])
+        new_width, new_height = max(1, round(width * scale)), max(1, round(height * scale))
+        try:
+            data, colorspace = _encode(doc, xref, new_width, new_height, quality)
+        except Exception as e:
+            logging.debug(f"Can't re-encode image xref {xref}: {e}")
+            entry['reason'] = 'decode failed'
+            continue
+        if len(data) >= size:
+            entry['reason'] = 'not smaller'
+            continue
+
+        _replace_stream(doc, xref, data, new_width, new_height, colorspace)
+        entry.update(new_width=new_width, new_height=new_height, bytes_after=len(data), replaced=True)
+        report['replaced'] += 1
+
+    report['bytes_before'] = sum(entry['bytes_before'] for entry in report['details'])
+    report['bytes_after'] = sum(entry['bytes_after'] for entry in report['details'])
+    report['bytes_saved'] = report['bytes_before'] - report['bytes_after']
+    logging.info(f"Image downsampling ({target_dpi} DPI, quality {quality}): {report['replaced']} of "
+                 f"{report['images']} images re-encoded, {report['bytes_saved']/1024:,.0f} KB saved")
+    return report
+
+def downsample_pdf_images(input_pdf, output_pdf, target_dpi=DEFAULT_TARGET_DPI, quality=DEFAULT_JPEG_QUALITY):
+    """
+    Write a copy of a PDF with its images downsampled
+
+    Returns:
+        dict: downsample_images report, or None on failure
+    """
+    if not os.path.exists(input_pdf):
+        logging.error(f"Input file '{input_pdf}' does not exist.")
+        return None
+    try:
+        doc = fitz.open(input_pdf)
+        report = downsample_images(doc, target_dpi, quality)
+        doc.save(output_pdf, garbage=4, deflate=True, clean=True)
+        doc.close()
+        return report
+    except Exception as e:
+        logging.error(f"Error downsampling images: {e}")
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Downsample and re-encode images above a target DPI (lossy)')
+    parser.add_argument('input_pdf', help='Path to the input PDF file')
+    parser.add_argument('output_pdf', help='Path to save the PDF with downsampled images')
+    parser.add_argument('--dpi', type=int, default=DEFAULT_TARGET_DPI, help=f'Target DPI (default: {DEFAULT_TARGET_DPI})')
+    parser.add_argument('--quality', type=int, default=DEFAULT_JPEG_QUALITY,
+                        help=f'JPEG quality 1-100 (default: {DEFAULT_JPEG_QUALITY})')
+
+    args = parser.parse_args()
+    if not 1 <= args.quality <= 100:
+        parser.error('--quality must be between 1 and 100')
+
+    report = downsample_pdf_images(args.input_pdf, args.output_pdf, args.dpi, args.quality)
+    if report is None:
+        print("Image downsampling failed!")
+        sys.exit(1)
+
+    for entry in report['details']:
+        if entry['replaced']:
+            print(f"  xref {entry['xref']} ({entry['width']}x{entry['height']} at {entry['dpi']:.0f} DPI -> "
+                  f"{entry['new_width']}x{entry['new_height']}): {entry['bytes_before']/1024:,.0f} KB -> "
+                  f"{entry['bytes_after']/1024:,.0f} KB")
+        else:
+            print(f"  xref {entry['xref']} ({entry['width']}x{entry['height']} at {entry['dpi']:.0f} DPI): "
+                  f"kept ({entry['reason']})")
+    print(f"{report['replaced']} of {report['images']} images re-encoded, "
+          f"{report['bytes_before']/1024:,.0f} KB -> {report['bytes_after']/1024:,.0f} KB")
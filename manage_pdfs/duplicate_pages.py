@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Duplicate page detection across files
+Resubmittals repeat unchanged sheets that are already in other files of a set.
+Each page gets a fingerprint of its normalized content streams, its resources
+(hashed by content, so the same font or image embedded by another file matches),
+its annotations and its geometry; pages with equal fingerprints are duplicates
+"""
+
+import fitz  # PyMuPDF
+import os
+import re
+import sys
+import hashlib
+import logging
+from manage_pdfs.resource_graph import page_resources_source, page_content
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.duplicate_pages file1.pdf file2.pdf ... [--latest-wins]
+
+# Keep the first occurrence of a duplicated page, or the last ("latest wins")
+POLICY_FIRST = 'first'
+POLICY_LAST = 'last'
+
+# Keys that don't change what an object draws: stream encoding, and links back up to pages
+_SKIP_KEYS = {'Length', 'Filter', 'DecodeParms', 'Parent', 'P'}
+
+# Objects never hashed into a fingerprint (e.g. link destinations point at pages)
+_STOP_TYPES = {'/Page', '/Pages', '/Catalog'}
+
+_REF_PATTERN = re.compile(r'\b(\d+) 0 R\b')
+
+def _hash_refs(doc, source, memo, active):
+    """Object source with every indirect reference replaced by the referenced object's content hash"""
+    return _REF_PATTERN.sub(lambda m: f"<{_object_hash(doc, int(m.group(1)), memo, active)}>", source)
+
+def _object_hash(doc, xref, memo, active=frozenset()):
+    """
+    Content hash of an object and everything it references (memoized per document)
+
+    Stream objects are hashed by their decoded data, so the same font or image
+    compressed differently hashes the same.
+    """
+    if xref in memo:
+        return memo[xref]
+    if xref in active or not 0 < xref < doc.xref_length():
+        return 'ref'
+    try:
+        if doc.xref_get_key(xref, 'Type')[1] in _STOP_TYPES:
+            return 'page'
+        sha = hashlib.sha256()
+        active = active | {xref}
+        keys = doc.xref_get_keys(xref)
+        if keys:
+            for key in sorted(keys):
+                if key not in _SKIP_KEYS:
+                    value = doc.xref_get_key(xref, key)[1]
+                    sha.update(f"/{key} {_hash_refs(doc, value, memo, active)}".encode('latin-1', 'replace'))
+        else:
+            sha.update(_hash_refs(doc, doc.xref_object(xref, compressed=True), memo, active).encode('latin-1', 'replace'))
+        if doc.xref_is_stream(xref):
+            sha.update(doc.xref_stream(xref) or b'')
+        digest = sha.hexdigest()[:32]
+    except Exception:
+        digest = f"broken-{xref}"  # Never equal to anything in another file
+    memo[xref] = digest
+    return digest
+
+def page_fingerprint(doc, page_num, memo):
+    """
+    Fingerprint one page
+
+    Args:
+        doc: Open fitz document
+        page_num: 0-indexed page
+        memo: Dict of object hashes, shared by all pages of the same document
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    page_xref = doc.page_xref(page_num)
+    page = doc.load_page(page_num)
+    sha = hashlib.sha256()
+    sha.update(repr((tuple(page.mediabox), tuple(page.cropbox), page.rotation)).encode())
+    # Content with whitespace runs collapsed, so reformatted streams still match
+    sha.update(b' '.join(page_content(doc, page_xref).split()))
+    sha.update(_hash_refs(doc, page_resources_source(doc, page_xref), memo, frozenset()).encode('latin-1', 'replace'))
+    kind, value = doc.xref_get_key(page_xref, 'Annots')
+    if kind in ('xref', 'array'):
+        sha.update(_hash_refs(doc, value, memo, frozenset()).encode('latin-1', 'replace'))
+    return sha.hexdigest()
+
+def fingerprint_pages(doc):
+    """Fingerprints of every page of a document, in page order"""
+    memo = {}
+    return [page_fingerprint(doc, page_num, memo) for page_num in range(doc.page_count)]
+
+def find_duplicate_pages(fingerprints, policy=POLICY_FIRST, within_files=False):
+    """
+    Pick which pages to drop from a set of files
+
+    Only copies in other files than the kept page are dropped - a page that
+    repeats inside one file (e.g. a standard detail sheet) is left alone
+    unless within_files is set.
+
+    Args:
+        fingerprints: List of (file name, [page fingerprints]) in combine order
+        policy: POLICY_FIRST keeps the first occurrence of each page,
+                POLICY_LAST keeps the last one ("latest wins")
+        within_files: Also drop repeats of the kept page inside its own file
+
+    Returns:
+        tuple: (dict file index -> set of 0-indexed pages to drop,
+                list of report entries {'file', 'page', 'kept_file', 'kept_page'} with 1-indexed pages)
+    """
+    if policy not in (POLICY_FIRST, POLICY_LAST):
+        raise ValueError(f"Unknown duplicate page policy '{policy}'")
+    occurrences = {}
+    for file_index, (_, pages) in enumerate(fingerprints):
+        for page_num, fingerprint in enumerate(pages):
+            occurrences.setdefault(fingerprint, []).append((file_index, page_num))
+
+    drop, report = {}, []
+    for places in occurrences.values():
+        if len(places) < 2:
+            continue
+        kept = places[0] if policy == POLICY_FIRST else places[-1]
+        for file_index, page_num in places:
+            if (file_index, page_num) == kept or (file_index == kept[0] and not within_files):
+                continue
+            drop.setdefault(file_index, set()).add(page_num)
+            report.append({
+                'file': fingerprints[file_index][0],
+                'page': page_num + 1,
+                'kept_file': fingerprints[kept[0]][0],
+                'kept_page': kept[1] + 1,
+            })
+    report.sort(key=lambda entry: (entry['file'], entry['page']))
+    return drop, report
+
+def plan_duplicate_pages(pdf_list, policy=POLICY_FIRST, cancellation_checker=None, open_document=fitz.open, within_files=False):
+    """
+    Fingerprint a list of files (in the given order) and pick the duplicate pages to drop
+
+    open_document opens one entry of pdf_list (e.g. a zip member) - fitz.open by default.
+    within_files is passed on to find_duplicate_pages.
+
+    Returns:
+        tuple: find_duplicate_pages result with the drop sets keyed by path instead
+               of index, or None if cancelled
+    """
+    fingerprints = []
+    for pdf in pdf_list:
+        if cancellation_checker and cancellation_checker():
+            return None
+        doc = open_document(pdf)
+        try:
+            fingerprints.append((os.path.basename(pdf), fingerprint_pages(doc)))
+        finally:
+            doc.close()
+    drop, report = find_duplicate_pages(fingerprints, policy, within_files)
+    logging.info(f"Found {len(report)} duplicate pages in {len(pdf_list)} files")
+    return {pdf_list[file_index]: pages for file_index, pages in drop.items()}, report
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='List pages that repeat across a set of PDF files')
+    parser.add_argument('files', nargs='+', help='PDF files, in combine order')
+    parser.add_argument('--latest-wins', action='store_true', help='Keep the last occurrence of each page instead of the first')
+    parser.add_argument('--within-files', action='store_true', help='Also list pages that repeat inside the same file')
+
+    args = parser.parse_args()
+    for pdf in args.files:
+        if not os.path.exists(pdf):
+            logging.error(f"Input file '{pdf}' does not exist")
+            sys.exit(1)
+
+    _, report = plan_duplicate_pages(args.files, POLICY_LAST if args.latest_wins else POLICY_FIRST,
+                                     within_files=args.within_files)
+    print(f"{len(report)} duplicate pages:")
+    for entry in report:
+        print(f"  {entry['file']} p.{entry['page']} (same as {entry['kept_file']} p.{entry['kept_page']})")
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+File fingerprint helpers
+Used to tell whether an input PDF is the same file a manifest or cache was built from
+"""
+
+import os
+import hashlib
+
+# Read files in 1MB blocks so hashing large plan sets doesn't load them into memory
+HASH_BLOCK_SIZE = 1024 * 1024
+
+def file_sha256(path):
+    """
+    Hash the full contents of a file
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: SHA-256 hex digest of the file contents
+    """
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def file_fingerprint(path):
+    """
+    Quick fingerprint of a file, for use as a cache key
+
+    Hashes the first and last blocks of the file and adds its size and
+    modification time, so it costs two reads however large the file is. A file
+    rewritten in place gets a new modification time and so a new fingerprint.
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        str: Fingerprint string ("<size>-<mtime ns>-<sha256 of the first and last blocks>")
+    """
+    stat = os.stat(path)
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        sha.update(f.read(HASH_BLOCK_SIZE))
+        if stat.st_size > HASH_BLOCK_SIZE:
+            f.seek(max(HASH_BLOCK_SIZE, stat.st_size - HASH_BLOCK_SIZE))
+            sha.update(f.read(HASH_BLOCK_SIZE))
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{sha.hexdigest()}"
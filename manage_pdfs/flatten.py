@@ -10,12 +10,13 @@ import os
 import logging
 import io
 from PIL import Image
+from manage_pdfs.blank_pages import check_page
 
 logging.basicConfig(level=logging.INFO)
 
 # Usage: python flatten.py input.pdf output.pdf [--dpi 300] [--quality high]
 
-def flatten_pdf(input_path, output_path, dpi=300, quality='high', jpeg_quality=95, progress_callback=None, cancellation_checker=None):
+def flatten_pdf(input_path, output_path, dpi=300, quality='high', jpeg_quality=95, progress_callback=None, cancellation_checker=None, remove_blank=False, blank_report=None):
     """
     True PDF flattening by converting each page to a high-resolution pixelized image.
     
@@ -34,6 +35,8 @@ def flatten_pdf(input_path, output_path, dpi=300, quality='high', jpeg_quality=9
         dpi: Resolution for rasterization (default: 300 DPI for high quality)
         quality: Quality preset - 'low' (150 DPI), 'medium' (200 DPI), 'high' (300 DPI), 'ultra' (600 DPI)
         jpeg_quality: JPEG compression quality 1-100 (default: 95 for minimal quality loss)
+        remove_blank: Leave out blank pages (see blank_pages) instead of rasterizing them
+        blank_report: Optional list that receives one entry per dropped blank page
         
     Returns:
         bool: True if successful, False otherwise
@@ -102,6 +105,16 @@ def flatten_pdf(input_path, output_path, dpi=300, quality='high', jpeg_quality=9
                         pass  # Ignore errors during cancellation cleanup
                     return False
             
+            # Skip blank pages before paying for the high resolution render
+            if remove_blank:
+                blank_check = check_page(source_doc, page_num)
+                if blank_check['blank']:
+                    logging.info(f"Skipping blank page {page_num + 1} ({blank_check['reason']})")
+                    if blank_report is not None:
+                        blank_report.append({'page': blank_check['page'], 'reason': blank_check['reason'],
+                                             'ink_coverage': blank_check['ink_coverage']})
+                    continue
+            
             # Get the page
             page = source_doc[page_num]
             
@@ -169,6 +182,11 @@ def flatten_pdf(input_path, output_path, dpi=300, quality='high', jpeg_quality=9
         # Close source document
         source_doc.close()
         
+        if flattened_doc.page_count == 0:
+            logging.error("Every page is blank - nothing to flatten.")
+            flattened_doc.close()
+            return False
+        
         # Final progress callback before saving
         if progress_callback:
             if not progress_callback(page_count, page_count, 95, "Saving flattened PDF..."):
@@ -180,7 +198,7 @@ def flatten_pdf(input_path, output_path, dpi=300, quality='high', jpeg_quality=9
                 return False
         
         # Save the completely pixelized PDF
-        logging.info(f"Saving pixelized PDF with {page_count} rasterized pages...")
+        logging.info(f"Saving pixelized PDF with {flattened_doc.page_count} rasterized pages...")
         flattened_doc.save(output_path, garbage=4, deflate=True, clean=True)
         flattened_doc.close()
         
@@ -213,6 +231,7 @@ if __name__ == "__main__":
         logging.error("  --dpi <number>: Resolution for pixelization (default: 300)")
         logging.error("  --quality <preset>: Quality preset - low/medium/high/ultra (overrides --dpi)")
         logging.error("  --jpeg-quality <1-100>: JPEG compression quality (default: 95)")
+        logging.error("  --remove-blank: Leave out blank pages")
         logging.error("  --help: Show this help message")
         logging.error("")
         logging.error("Quality presets:")
@@ -281,7 +300,9 @@ if __name__ == "__main__":
                 sys.exit(1)
     
     # Run the pixelized flattening
-    success = flatten_pdf(input_pdf, output_pdf, dpi=dpi, quality=quality, jpeg_quality=jpeg_quality)
+    remove_blank = "--remove-blank" in sys.argv
+    
+    success = flatten_pdf(input_pdf, output_pdf, dpi=dpi, quality=quality, jpeg_quality=jpeg_quality, remove_blank=remove_blank)
     
     if not success:
         sys.exit(1)
\ No newline at end of file
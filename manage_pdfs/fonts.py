@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Embedded font unification
+Combined submittal sets carry one subset of the same font per input file. Font
+programs are grouped by base font name; programs with the same decoded bytes are
+shared, and TrueType subsets whose glyphs agree are merged into one program (or
+replaced by a fuller one already in the file) that every font then points at.
+Fully embedded fonts can also be cut down to the glyphs the pages use (subsetting),
+and embedded copies of the standard 14 fonts dropped in favour of the viewer's own
+"""
+
+import fitz  # PyMuPDF
+import io
+import os
+import re
+import sys
+import zlib
+import hashlib
+import logging
+from fontTools.agl import toUnicode
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._g_l_y_f import Glyph
+from manage_pdfs.resource_graph import stream_length, get_resource_graph, build_resource_graph, KIND_FONT_FILE
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.fonts input.pdf output.pdf [--report-only] [--subset] [--unembed-standard]
+
+# Font descriptor keys holding the embedded program (Type 1, TrueType, CFF/OpenType)
+FONT_FILE_KEYS = ('FontFile', 'FontFile2', 'FontFile3')
+
+# Hinting tables glyph instructions depend on - merged programs must share them
+HINTING_TABLES = ('fpgm', 'prep', 'cvt ')
+
+# Fonts every viewer has built in - embedding them is optional
+STANDARD_14 = {'Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Helvetica-BoldOblique',
+               'Times-Roman', 'Times-Bold', 'Times-Italic', 'Times-BoldItalic',
+               'Courier', 'Courier-Bold', 'Courier-Oblique', 'Courier-BoldOblique',
+               'Symbol', 'ZapfDingbats'}
+
+# Standard fonts that only work with their own built-in encoding
+SYMBOLIC_STANDARD_14 = {'Symbol', 'ZapfDingbats'}
+
+# Encodings a viewer can apply to its own copy of a standard font
+STANDARD_ENCODINGS = ('/WinAnsiEncoding', '/MacRomanEncoding', '/StandardEncoding')
+
+# Font descriptor flag of symbolic fonts (their glyphs aren't looked up by standard names)
+SYMBOLIC_FLAG = 4
+
+_SUBSET_PREFIX = re.compile(r'^[A-Z]{6}\+')
+
+_DIFFERENCES_NAME = re.compile(r'/([^\s/\[\]]+)')
+
+def base_font_name(font_name):
+    """Font name without the subset tag and PDF name escapes, e.g. '/GPSGNG+Lato#20Regular' -> 'Lato Regular'"""
+    name = re.sub(r'#([0-9A-Fa-f]{2})', lambda m: chr(int(m.group(1), 16)), font_name.lstrip('/'))
+    return _SUBSET_PREFIX.sub('', name)
+
+def embedded_fonts(doc):
+    """
+    Find every font descriptor with an embedded font program
+
+    Returns:
+        list: Dicts with 'descriptor' (xref), 'name' (base font name), 'subset' (bool),
+              'key' (FontFile key) and 'program' (xref of the font program stream)
+    """
+    fonts = []
+    for xref in range(1, doc.xref_length()):
+        try:
+            if doc.xref_get_key(xref, 'Type')[1] != '/FontDescriptor':
+                continue
+        except Exception:
+            continue  # Free or broken entry
+        font_name = doc.xref_get_key(xref, 'FontName')[1]
+        for key in FONT_FILE_KEYS:
+            kind, value = doc.xref_get_key(xref, key)
+            if kind == 'xref':
+                fonts.append({
+                    'descriptor': xref,
+                    'name': base_font_name(font_name),
+                    'subset': bool(_SUBSET_PREFIX.match(font_name.lstrip('/'))),
+                    'key': key,
+                    'program': int(value.split()[0]),
+                })
+                break
+    return fonts
+
+def _load_truetype(data):
+    """
+    Read what merging needs from a TrueType program: raw glyph data and metrics
+    by glyph id, cmap entries and hinting tables. None if the program can't be parsed.
+    """
+    try:
+        font = TTFont(io.BytesIO(data))
+        raw_glyf = font.reader['glyf']
+        loca = font['loca']
+        order = font.getGlyphOrder()
+        glyphs = {}
+        for gid in range(len(order)):
+            start, end = loca[gid], loca[gid + 1]
+            if end > start:
+                glyphs[gid] = raw_glyf[start:end]
+        hmtx = font['hmtx']
+        cmap = {}
+        if 'cmap' in font:
+            for table in font['cmap'].tables:
+                cmap[(table.platformID, table.platEncID)] = {code: font.getGlyphID(name) for code, name in table.cmap.items()}
+        return {
+            'font': font,
+            'glyphs': glyphs,
+            'metrics': {gid: hmtx[order[gid]] for gid in glyphs},
+            'cmap': cmap,
+            'hinting': {tag: font.reader[tag] if tag in font.reader else None for tag in HINTING_TABLES},
+            'units': font['head'].unitsPerEm,
+            'num_glyphs': len(order),
+        }
+    except Exception as e:
+        logging.debug(f"Can't read TrueType program: {e}")
+        return None
+
+def _compatible(cluster, member):
+    """True if a TrueType program can be served by a cluster's merged program (no glyph, metric or cmap conflicts)"""
+    if member['units'] != cluster['units'] or member['hinting'] != cluster['hinting']:
+        return False
+    for gid, data in member['glyphs'].items():
+        if gid >= cluster['num_glyphs']:
+            return False
+        if gid in cluster['glyphs'] and (cluster['glyphs'][gid] != data or cluster['metrics'][gid] != member['metrics'][gid]):
+            return False
+    for table_id, mapping in member['cmap'].items():
+        if mapping and table_id not in cluster['cmap']:
+            return False
+        cluster_mapping = cluster['cmap'].get(table_id, {})
+        if any(code in cluster_mapping and cluster_mapping[code] != gid for code, gid in mapping.items()):
+            return False
+    return True
+
+def _merged_program(cluster):
+    """Build the merged TrueType program of a cluster (the base program plus the glyphs it lacks)"""
+    font = cluster['base']['font']
+    order = font.getGlyphOrder()
+    glyf, hmtx = font['glyf'], font['hmtx']
+    for gid in cluster['added']:
+        name = order[gid]
+        glyf[name] = Glyph(cluster['glyphs'][gid])
+        hmtx[name] = cluster['metrics'][gid]
+    cmap_tables = {(table.platformID, table.platEncID): table for table in font['cmap'].tables} if 'cmap' in font else {}
+    for table_id, mapping in cluster['cmap'].items():
+        for code, gid in mapping.items():
+            cmap_tables[table_id].cmap.setdefault(code, order[gid])
+    out = io.BytesIO()
+    font.save(out)
+    return out.getvalue()
+
+def _cluster_truetype(programs):
+    """
+    Greedily group TrueType programs that can share one merged program, fullest first
+
+    Args:
+        programs: List of (program xref, decoded data)
+
+    Returns:
+        list: Clusters - dicts with 'xrefs', 'base' (parsed base program), the merged
+              'glyphs'/'metrics'/'cmap', and 'added' (glyph ids not in the base)
+    """
+    parsed = [(xref, _load_truetype(data)) for xref, data in programs]
+    clusters = [{'xrefs': [xref]} for xref, info in parsed if info is None]
+    parsed = sorted(((xref, info) for xref, info in parsed if info is not None), key=lambda item: -len(item[1]['glyphs']))
+    for xref, info in parsed:
+        for cluster in clusters:
+            if 'base' in cluster and _compatible(cluster, info):
+                for gid, data in info['glyphs'].items():
+                    if gid not in cluster['glyphs']:
+                        cluster['glyphs'][gid] = data
+                        cluster['metrics'][gid] = info['metrics'][gid]
+                        cluster['added'].add(gid)
+                for table_id, mapping in info['cmap'].items():
+                    for code, gid in mapping.items():
+                        cluster['cmap'][table_id].setdefault(code, gid)
+                cluster['xrefs'].append(xref)
+                break
+        else:
+            clusters.append({
+                'xrefs': [xref],
+                'base': info,
+                'units': info['units'],
+                'hinting': info['hinting'],
+                'num_glyphs': info['num_glyphs'],
+                'glyphs': dict(info['glyphs']),
+                'metrics': dict(info['metrics']),
+                'cmap': {table_id: dict(mapping) for table_id, mapping in info['cmap'].items()},
+                'added': set(),
+            })
+    return clusters
+
+def _point_fonts_at(doc, fonts, program_xrefs, canonical):
+    """Make every descriptor using one of program_xrefs use the canonical program instead"""
+    for font in fonts:
+        if font['program'] in program_xrefs and font['program'] != canonical:
+            doc.xref_set_key(font['descriptor'], font['key'], f"{canonical} 0 R")
+            font['program'] = canonical
+
+def unify_embedded_fonts(doc):
+    """
+    Share or merge the embedded programs of fonts with the same base name
+
+    Programs whose decoded bytes are identical (garbage collection only catches
+    byte-identical streams, so differently compressed copies survive it) are
+    shared outright. TrueType programs are then clustered: a subset joins a
+    cluster when every glyph it has is identical at the same glyph id (and its
+    metrics and cmap agree), so one program can serve all of them. A cluster's
+    fullest program gets the missing glyphs added and replaces the others, but
+    only if it is smaller than the programs it replaces.
+
+    The replaced programs are left unreferenced - save with garbage collection
+    to drop them.
+
+    Args:
+        doc: Open fitz document (changed in place)
+
+    Returns:
+        dict: {'fonts': [{'font', 'programs_before', 'programs_after', 'bytes_before', 'bytes_after'}],
+               'bytes_before': int, 'bytes_after': int, 'bytes_saved': int}
+              with stored (compressed) font program bytes
+    """
+    fonts = embedded_fonts(doc)
+    groups = {}
+    for font in fonts:
+        groups.setdefault((font['name'], font['key']), set()).add(font['program'])
+
+    report = {'fonts': [], 'bytes_before': 0, 'bytes_after': 0, 'bytes_saved': 0}
+    for (name, key), program_xrefs in sorted(groups.items()):
+        program_xrefs = sorted(program_xrefs)
+        bytes_before = sum(stream_length(doc, xref) for xref in program_xrefs)
+
+        # Share programs with identical decoded bytes
+        distinct = {}
+        for xref in program_xrefs:
+            data = doc.xref_stream(xref)
+            if data is None:
+                continue
+            digest = hashlib.sha256(data).digest()
+            if digest in distinct:
+                _point_fonts_at(doc, fonts, {xref}, distinct[digest][0])
+            else:
+                distinct[digest] = (xref, data)
+
+        # Merge TrueType subsets that agree glyph for glyph
+        if key == 'FontFile2' and len(distinct) > 1:
+            for cluster in _cluster_truetype(list(distinct.values())):
+                if len(cluster['xrefs']) < 2:
+                    continue
+                canonical = cluster['xrefs'][0]
+                replaced_bytes = sum(stream_length(doc, xref) for xref in cluster['xrefs'])
+                if cluster['added']:
+                    data = _merged_program(cluster)
+                    if len(zlib.compress(data)) >= replaced_bytes:
+                        continue
+                    doc.update_stream(canonical, data)
+                    doc.xref_set_key(canonical, 'Length1', str(len(data)))
+                _point_fonts_at(doc, fonts, set(cluster['xrefs']), canonical)
+
+        remaining = sorted(set(font['program'] for font in fonts if font['name'] == name and font['key'] == key))
+        bytes_after = sum(stream_length(doc, xref) for xref in remaining)
+        report['bytes_before'] += bytes_before
+        report['bytes_after'] += bytes_after
+        if len(remaining) < len(program_xrefs):
+            report['fonts'].append({
+                'font': name,
+                'programs_before': len(program_xrefs),
+                'programs_after': len(remaining),
+                'bytes_before': bytes_before,
+                'bytes_after': bytes_after,
+            })
+            logging.info(f"Font '{name}': {len(program_xrefs)} programs -> {len(remaining)} "
+                         f"({bytes_before/1024:,.0f} KB -> {bytes_after/1024:,.0f} KB)")
+
+    report['bytes_saved'] = report['bytes_before'] - report['bytes_after']
+    logging.info(f"Font unification saved {report['bytes_saved']/1024:,.0f} KB of font programs")
+    return report
+
+def _program_bytes(doc, xref):
+    """Bytes a font program takes once saved - programs left unfiltered (e.g. by subsetting) are counted deflated"""
+    if doc.xref_get_key(xref, 'Filter')[0] == 'null':
+        return len(zlib.compress(doc.xref_stream_raw(xref) or b''))
+    return stream_length(doc, xref)
+
+def _used_programs(doc, graph):
+    """Embedded font programs used by pages, as {program xref: font dict from embedded_fonts}"""
+    used = set(graph['indices'][graph['kinds'][graph['indices']] == KIND_FONT_FILE].tolist())
+    return {font['program']: font for font in embedded_fonts(doc) if font['program'] in used}
+
+def _bytes_by_font(doc, programs):
+    """Base font name -> bytes of its programs"""
+    usage = {}
+    for xref, font in programs.items():
+        usage[font['name']] = usage.get(font['name'], 0) + _program_bytes(doc, xref)
+    return usage
+
+def subset_embedded_fonts(doc):
+    """
+    Cut fully embedded fonts down to the glyphs the pages use
+
+    Uses MuPDF's subsetter (doc.subset_fonts). TrueType and OpenType fonts it
+    fails on or leaves whole are then handed to the fontTools subsetter
+    (doc.subset_fonts(fallback=True)), which only touches fonts that aren't
+    subsets yet. Fonts neither can subset are left as they are. Replaced
+    programs are left unreferenced - save with garbage collection to drop them.
+
+    Args:
+        doc: Open fitz document (changed in place)
+
+    Returns:
+        dict: {'method': 'mupdf', 'fonttools', 'mupdf+fonttools' or None (nothing subset),
+               'fonts': [{'font', 'bytes_before', 'bytes_after'}] (fonts that got smaller),
+               'bytes_before': int, 'bytes_after': int, 'bytes_saved': int}
+              with the bytes of the font programs used by pages
+    """
+    before = _bytes_by_font(doc, _used_programs(doc, get_resource_graph(doc)))
+    methods = []
+    try:
+        doc.subset_fonts()
+        methods.append('mupdf')
+    except Exception as e:
+        logging.warning(f"MuPDF font subsetting failed, trying fontTools: {e}")
+
+    programs = _used_programs(doc, build_resource_graph(doc))
+    whole = [font['name'] for font in programs.values() if not font['subset'] and font['key'] in ('FontFile2', 'FontFile3')]
+    if whole:
+        logging.info(f"Subsetting {len(whole)} remaining fonts with fontTools: {', '.join(sorted(set(whole)))}")
+        try:
+            if doc.subset_fonts(fallback=True):
+                methods.append('fonttools')
+                programs = _used_programs(doc, build_resource_graph(doc))
+        except Exception as e:
+            logging.warning(f"fontTools font subsetting failed, leaving the fonts whole: {e}")
+    after = _bytes_by_font(doc, programs)
+
+    report = {'method': '+'.join(methods) or None, 'fonts': [],
+              'bytes_before': sum(before.values()), 'bytes_after': sum(after.values())}
+    for name in sorted(before):
+        if after.get(name, 0) < before[name]:
+            report['fonts'].append({'font': name, 'bytes_before': before[name], 'bytes_after': after.get(name, 0)})
+    report['bytes_saved'] = report['bytes_before'] - report['bytes_after']
+    logging.info(f"Font subsetting: {report['bytes_before']/1024:,.0f} KB -> {report['bytes_after']/1024:,.0f} KB "
+                 f"of font programs ({len(report['fonts'])} fonts subset)")
+    return report
+
+def _encoding_blocker(doc, font_xref, name, standard_font):
+    """Why a simple font's encoding can't be applied to the viewer's copy of a standard font, None if it can"""
+    kind, value = doc.xref_get_key(font_xref, 'Encoding')
+    if name in SYMBOLIC_STANDARD_14:
+        return None if kind == 'null' else 'encoding'
+    if kind == 'name':
+        return None if value in STANDARD_ENCODINGS else 'encoding'
+    if kind == 'xref':
+        encoding_xref = int(value.split()[0])
+        base, differences = (doc.xref_get_key(encoding_xref, key) for key in ('BaseEncoding', 'Differences'))
+    elif kind == 'dict':
+        base, differences = (doc.xref_get_key(font_xref, f'Encoding/{key}') for key in ('BaseEncoding', 'Differences'))
+    else:
+        return 'built-in encoding'  # The embedded program's own encoding - unknown to the viewer's copy
+    if base[1] not in STANDARD_ENCODINGS:
+        return 'encoding'
+    for glyph_name in _DIFFERENCES_NAME.findall(differences[1] if differences[0] == 'array' else ''):
+        text = toUnicode(glyph_name)
+        if len(text) != 1 or not standard_font.has_glyph(ord(text)):
+            return f"glyph '{glyph_name}'"
+    return None
+
+def _unembed_blocker(doc, font_xref, name, standard_font):
+    """Why a font named like a standard font can't use the viewer's copy instead of its embedded one, None if it can"""
+    subtype = doc.xref_get_key(font_xref, 'Subtype')[1]
+    if subtype not in ('/Type1', '/MMType1', '/TrueType'):
+        return 'not a simple font'
+    if subtype == '/TrueType':
+        flags = doc.xref_get_key(font_xref, 'FontDescriptor/Flags')[1]
+        if not flags.isdigit() or int(flags) & SYMBOLIC_FLAG:
+            return 'symbolic TrueType'
+    return _encoding_blocker(doc, font_xref, name, standard_font)
+
+def unembed_standard_fonts(doc):
+    """
+    Drop embedded copies of the standard 14 fonts (Helvetica, Times, Courier, Symbol, ZapfDingbats)
+
+    A font qualifies when it is a simple font (Type 1 or non-symbolic TrueType)
+    whose encoding the viewer can apply to its own copy: a standard base
+    encoding with differences naming only glyphs the standard font has (or no
+    encoding at all for Symbol and ZapfDingbats). A font descriptor is only
+    changed if every font using it qualifies. The /Widths stay, so text keeps its
+    spacing. Fonts are matched by exact standard name - look-alikes such as Arial
+    are left alone. The dropped programs are left unreferenced - save with
+    garbage collection to drop them.
+
+    Args:
+        doc: Open fitz document (changed in place)
+
+    Returns:
+        dict: {'fonts': [{'font', 'descriptor', 'bytes'}] (unembedded), 'skipped': [{'font', 'descriptor', 'reason'}],
+               'bytes_saved': int}
+    """
+    users = {}  # font descriptor xref -> font dict xrefs
+    for xref in range(1, doc.xref_length()):
+        try:
+            if doc.xref_get_key(xref, 'Type')[1] != '/Font':
+                continue
+        except Exception:
+            continue  # Free or broken entry
+        kind, value = doc.xref_get_key(xref, 'FontDescriptor')
+        if kind == 'xref':
+            users.setdefault(int(value.split()[0]), []).append(xref)
+
+    report = {'fonts': [], 'skipped': [], 'bytes_saved': 0}
+    standard_fonts = {}
+    for font in embedded_fonts(doc):
+        name = font['name']
+        if name not in STANDARD_14 or not users.get(font['descriptor']):
+            continue
+        if name not in standard_fonts:
+            standard_fonts[name] = fitz.Font(name)
+        reasons = [reason for reason in (_unembed_blocker(doc, xref, name, standard_fonts[name])
+                                         for xref in users[font['descriptor']]) if reason]
+        if reasons:
+            report['skipped'].append({'font': name, 'descriptor': font['descriptor'], 'reason': reasons[0]})
+            continue
+
+        size = _program_bytes(doc, font['program'])
+        doc.xref_set_key(font['descriptor'], font['key'], 'null')
+        doc.xref_set_key(font['descriptor'], 'FontName', f"/{name}")  # No subset tag on a font that isn't embedded
+        for xref in users[font['descriptor']]:
+            doc.xref_set_key(xref, 'BaseFont', f"/{name}")
+            if doc.xref_get_key(xref, 'Subtype')[1] == '/TrueType':
+                doc.xref_set_key(xref, 'Subtype', '/Type1')
+        report['fonts'].append({'font': name, 'descriptor': font['descriptor'], 'bytes': size})
+        report['bytes_saved'] += size
+
+    for entry in report['skipped']:
+        logging.info(f"Keeping embedded '{entry['font']}' (descriptor xref {entry['descriptor']}): {entry['reason']}")
+    logging.info(f"Unembedded {len(report['fonts'])} standard fonts, {report['bytes_saved']/1024:,.0f} KB saved")
+    return report
+
+def unify_pdf_fonts(input_pdf, output_pdf, subset=False, unembed_standard=False):
+    """
+    Write a copy of a PDF with its embedded fonts unified (and subset, and standard
+    fonts unembedded, if asked for)
+
+    Returns:
+        dict: unify_embedded_fonts report, or None on failure
+    """
+    if not os.path.exists(input_pdf):
+        logging.error(f"Input file '{input_pdf}' does not exist.")
+        return None
+    try:
+        doc = fitz.open(input_pdf)
+        report = unify_embedded_fonts(doc)
+        if subset:
+            report['subset'] = subset_embedded_fonts(doc)
+        if unembed_standard:
+            report['unembedded'] = unembed_standard_fonts(doc)
+        doc.save(output_pdf, garbage=4, deflate=True, clean=True)
+        doc.close()
+        return report
+    except Exception as e:
+        logging.error(f"Error unifying fonts: {e}")
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Share and merge duplicate embedded font programs')
+    parser.add_argument('input_pdf', help='Path to the input PDF file')
+    parser.add_argument('output_pdf', nargs='?', help='Path to save the PDF with unified fonts')
+    parser.add_argument('--report-only', action='store_true', help='Only report what unification would save')
+    parser.add_argument('--subset', action='store_true', help='Also cut fully embedded fonts down to the glyphs used')
+    parser.add_argument('--unembed-standard', action='store_true',
+                        help='Also drop embedded copies of the standard 14 fonts where the encoding allows')
+
+    args = parser.parse_args()
+
+    if args.report_only:
+        if not os.path.exists(args.input_pdf):
+            logging.error(f"Input file '{args.input_pdf}' does not exist")
+            sys.exit(1)
+        doc = fitz.open(args.input_pdf)
+        report = unify_embedded_fonts(doc)
+        if args.subset:
+            report['subset'] = subset_embedded_fonts(doc)
+        if args.unembed_standard:
+            report['unembedded'] = unembed_standard_fonts(doc)
+        doc.close()
+    else:
+        if not args.output_pdf:
+            parser.error('output_pdf is required unless --report-only is given')
+        report = unify_pdf_fonts(args.input_pdf, args.output_pdf, args.subset, args.unembed_standard)
+        if report is None:
+            print("Font unification failed!")
+            sys.exit(1)
+
+    for entry in report['fonts']:
+        print(f"  {entry['font']}: {entry['programs_before']} -> {entry['programs_after']} programs, "
+              f"{entry['bytes_before']/1024:,.0f} KB -> {entry['bytes_after']/1024:,.0f} KB")
+    print(f"Font programs: {report['bytes_before']/1024:,.0f} KB -> {report['bytes_after']/1024:,.0f} KB "
+          f"(saved {report['bytes_saved']/1024:,.0f} KB)")
+    if 'subset' in report:
+        for entry in report['subset']['fonts']:
+            print(f"  {entry['font']}: subset {entry['bytes_before']/1024:,.0f} KB -> {entry['bytes_after']/1024:,.0f} KB")
+        print(f"Font subsetting: {report['subset']['bytes_before']/1024:,.0f} KB -> "
+              f"{report['subset']['bytes_after']/1024:,.0f} KB")
+    if 'unembedded' in report:
+        for entry in report['unembedded']['fonts']:
+            print(f"  {entry['font']}: unembedded, {entry['bytes']/1024:,.0f} KB")
+        for entry in report['unembedded']['skipped']:
+            print(f"  {entry['font']}: kept embedded ({entry['reason']})")
+        print(f"Standard fonts unembedded: {len(report['unembedded']['fonts'])}, "
+              f"saved {report['unembedded']['bytes_saved']/1024:,.0f} KB")
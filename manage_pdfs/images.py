@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Image deduplication by decoded pixels
+The same stamp, logo or site photo is often embedded many times with different
+compression or metadata, so garbage collection sees different objects. Images
+are grouped by their dictionary (size, bits per component, color space) first;
+only images that share one with another image are decoded and compared by a
+hash of their pixels, and every reference is pointed at one canonical image
+"""
+
+import fitz  # PyMuPDF
+import os
+import re
+import sys
+import hashlib
+import logging
+import numpy as np
+from manage_pdfs.resource_graph import stream_length
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.images input.pdf output.pdf [--report-only]
+
+# Image dictionary entries that must match before two images are decoded and compared
+HEADER_KEYS = ('Width', 'Height', 'BitsPerComponent', 'ColorSpace')
+
+# Image dictionary entries that change how the same pixels render - duplicates must agree on them
+RENDER_KEYS = ('ImageMask', 'Decode', 'Mask', 'Intent', 'Interpolate')
+
+_REF_PATTERN = re.compile(r'\b(\d+) 0 R\b')
+
+def image_xrefs(doc):
+    """Xrefs of all image XObjects in a document"""
+    xrefs = []
+    for xref in range(1, doc.xref_length()):
+        try:
+            if doc.xref_get_key(xref, 'Subtype')[1] == '/Image':
+                xrefs.append(xref)
+        except Exception:
+            continue  # Free or broken entry
+    return xrefs
+
+def _decode(doc, xref):
+    """Decoded pixels of an image as a (height, width, components) uint8 array, None if it can't be decoded"""
+    try:
+        pixmap = fitz.Pixmap(doc, xref)
+    except Exception as e:
+        logging.debug(f"Can't decode image xref {xref}: {e}")
+        return None, None
+    pixels = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)
+    pixels = pixels[:, :pixmap.width * pixmap.n].reshape(pixmap.height, pixmap.width, pixmap.n)
+    colorspace = pixmap.colorspace.name if pixmap.colorspace else None
+    return pixels, colorspace
+
+def _render_attributes(doc, xref, canonical):
+    """Image dictionary entries that affect rendering, with the soft mask resolved to its canonical image"""
+    attributes = tuple(doc.xref_get_key(xref, key) for key in RENDER_KEYS)
+    kind, value = doc.xref_get_key(xref, 'SMask')
+    smask = canonical.get(int(value.split()[0]), int(value.split()[0])) if kind == 'xref' else None
+    return attributes + (smask,)
+
+def _object_digest(doc, xref, memo, active=frozenset()):
+    """
+    Content hash of an object and the objects it references (memoized), e.g. an ICC
+    color space and its profile stream. Streams are hashed decoded, so the same
+    profile compressed differently hashes the same.
+    """
+    if xref in memo:
+        return memo[xref]
+    if xref in active:
+        return 'ref'
+    try:
+        sha = hashlib.sha1()
+        for key in doc.xref_get_keys(xref):
+            if key not in ('Length', 'Filter', 'DecodeParms'):
+                value = _resolve_refs(doc, doc.xref_get_key(xref, key)[1], memo, active | {xref})
+                sha.update(f"/{key} {value}".encode('latin-1', 'replace'))
+        if not doc.xref_get_keys(xref):
+            source = _resolve_refs(doc, doc.xref_object(xref, compressed=True), memo, active | {xref})
+            sha.update(source.encode('latin-1', 'replace'))
+        if doc.xref_is_stream(xref):
+            sha.update(doc.xref_stream(xref) or b'')
+        memo[xref] = sha.hexdigest()
+    except Exception:
+        memo[xref] = f"broken-{xref}"
+    return memo[xref]
+
+def _resolve_refs(doc, value, memo, active=frozenset()):
+    """Object source with every indirect reference replaced by the referenced object's content hash"""
+    return _REF_PATTERN.sub(lambda m: _object_digest(doc, int(m.group(1)), memo, active), value)
+
+def _header_key(doc, xref, memo):
+    """
+    The HEADER_KEYS entries of an image, which duplicates must share
+
+    Objects referenced by the color space are compared by content, so the same
+    ICC profile embedded by two files doesn't keep their images apart.
+    """
+    key = []
+    for name in HEADER_KEYS:
+        kind, value = doc.xref_get_key(xref, name)
+        if kind in ('xref', 'array'):
+            value = _resolve_refs(doc, value, memo)
+        key.append((kind, value))
+    return tuple(key)
+
+def _find_duplicates(doc, xrefs, canonical):
+    """
+    Group images with identical pixels and rendering attributes
+
+    Images are grouped by their dictionary first (see _header_key), which costs
+    no decoding. Only images in a group of two or more are decoded, once each,
+    and their pixels are hashed in full.
+
+    Returns:
+        list: Groups of duplicate xrefs (each with at least two images)
+    """
+    memo = {}
+    headers = {}
+    for xref in xrefs:
+        try:
+            headers.setdefault(_header_key(doc, xref, memo), []).append(xref)
+        except Exception as e:
+            logging.debug(f"Can't read image xref {xref}: {e}")
+
+    candidates = {}
+    for xref in (xref for group in headers.values() if len(group) > 1 for xref in group):
+        pixels, colorspace = _decode(doc, xref)
+        if pixels is None:
+            continue
+        key = (pixels.shape, colorspace, _render_attributes(doc, xref, canonical),
+               hashlib.sha256(pixels.tobytes()).digest())
+        candidates.setdefault(key, []).append(xref)
+    return [group for group in candidates.values() if len(group) > 1]
+
+def _stored_digest(doc, xref, memo):
+    """Hash of how an image is stored (encoded stream and dictionary) - equal for byte-identical copies"""
+    sha = hashlib.sha1(doc.xref_stream_raw(xref) or b'')
+    sha.update(repr((doc.xref_get_key(xref, 'Filter'), doc.xref_get_key(xref, 'DecodeParms'),
+                     _header_key(doc, xref, memo))).encode())
+    return sha.hexdigest()
+
+def _rewrite_references(doc, mapping):
+    """Point every reference to a duplicate image (page and form resources, soft masks) at its canonical image"""
+    for xref in range(1, doc.xref_length()):
+        if xref in mapping:
+            continue  # Duplicates are dropped by garbage collection
+        try:
+            source = doc.xref_object(xref, compressed=True)
+        except Exception:
+            continue
+        if not any(int(ref) in mapping for ref in _REF_PATTERN.findall(source)):
+            continue
+        for key in doc.xref_get_keys(xref):
+            kind, value = doc.xref_get_key(xref, key)
+            if kind not in ('xref', 'dict', 'array'):
+                continue
+            new_value = _REF_PATTERN.sub(lambda m: f"{mapping.get(int(m.group(1)), int(m.group(1)))} 0 R", value)
+            if new_value != value:
+                doc.xref_set_key(xref, key, new_value)
+
+def dedupe_embedded_images(doc):
+    """
+    Point duplicate images (same decoded pixels, different encoding) at one canonical image
+
+    Soft masks are deduplicated first, so images that differ only in which copy
+    of the same mask they use are found too. The smallest stored copy of each
+    group is kept. The duplicates are left unreferenced - save with garbage
+    collection to drop them.
+
+    bytes_saved only counts copies stored differently from the kept one (and
+    each differently stored copy once): byte-identical copies are merged by
+    garbage collection anyway, so removing them here saves nothing extra.
+
+    Args:
+        doc: Open fitz document (changed in place)
+
+    Returns:
+        dict: {'images': int, 'duplicates': int, 'bytes_saved': int (see above),
+               'groups': [{'xref': canonical xref, 'duplicates': [xrefs], 'width', 'height', 'bytes_saved'}]}
+    """
+    xrefs = image_xrefs(doc)
+    masks = set()
+    for xref in xrefs:
+        kind, value = doc.xref_get_key(xref, 'SMask')
+        if kind == 'xref':
+            masks.add(int(value.split()[0]))
+
+    canonical = {}
+    memo = {}
+    report = {'images': len(xrefs), 'duplicates': 0, 'bytes_saved': 0, 'groups': []}
+    for pass_xrefs in ([x for x in xrefs if x in masks], [x for x in xrefs if x not in masks]):
+        for group in _find_duplicates(doc, pass_xrefs, canonical):
+            sizes = {xref: stream_length(doc, xref) for xref in group}
+            keep = min(group, key=lambda xref: (sizes[xref], xref))
+            duplicates = [xref for xref in group if xref != keep]
+            for xref in duplicates:
+                canonical[xref] = keep
+            # Count each stored form once, and not the kept one's
+            stored = {_stored_digest(doc, keep, memo): 0}
+            for xref in duplicates:
+                stored.setdefault(_stored_digest(doc, xref, memo), sizes[xref])
+            saved = sum(stored.values())
+            report['groups'].append({
+                'xref': keep,
+                'duplicates': duplicates,
+                'width': int(doc.xref_get_key(keep, 'Width')[1]),
+                'height': int(doc.xref_get_key(keep, 'Height')[1]),
+                'bytes_saved': saved,
+            })
+            report['duplicates'] += len(duplicates)
+            report['bytes_saved'] += saved
+
+    if canonical:
+        _rewrite_references(doc, canonical)
+    logging.info(f"Image dedupe: {report['duplicates']} duplicates of {report['images']} images, "
+                 f"{report['bytes_saved']/1024:,.0f} KB saved")
+    return report
+
+def dedupe_pdf_images(input_pdf, output_pdf):
+    """
+    Write a copy of a PDF with duplicate images removed
+
+    Returns:
+        dict: dedupe_embedded_images report, or None on failure
+    """
+    if not os.path.exists(input_pdf):
+        logging.error(f"Input file '{input_pdf}' does not exist.")
+        return None
+    try:
+        doc = fitz.open(input_pdf)
+        report = dedupe_embedded_images(doc)
+        doc.save(output_pdf, garbage=4, deflate=True, clean=True)
+        doc.close()
+        return report
+    except Exception as e:
+        logging.error(f"Error removing duplicate images: {e}")
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Remove duplicate images (same pixels, different encoding)')
+    parser.add_argument('input_pdf', help='Path to the input PDF file')
+    parser.add_argument('output_pdf', nargs='?', help='Path to save the PDF without duplicate images')
+    parser.add_argument('--report-only', action='store_true', help='Only list the duplicates, don\'t write a PDF')
+
+    args = parser.parse_args()
+
+    if args.report_only:
+        if not os.path.exists(args.input_pdf):
+            logging.error(f"Input file '{args.input_pdf}' does not exist")
+            sys.exit(1)
+        doc = fitz.open(args.input_pdf)
+        report = dedupe_embedded_images(doc)
+        doc.close()
+    else:
+        if not args.output_pdf:
+            parser.error('output_pdf is required unless --report-only is given')
+        report = dedupe_pdf_images(args.input_pdf, args.output_pdf)
+        if report is None:
+            print("Image dedupe failed!")
+            sys.exit(1)
+
+    for group in report['groups']:
+        print(f"  xref {group['xref']} ({group['width']}x{group['height']}): {len(group['duplicates'])} duplicates, "
+              f"{group['bytes_saved']/1024:,.0f} KB")
+    print(f"{report['duplicates']} duplicate images of {report['images']}, saved {report['bytes_saved']/1024:,.0f} KB")
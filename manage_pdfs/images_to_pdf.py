@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Build a PDF from scanned images
+Multi-page TIFFs and folders of JPEGs become one page per image (or TIFF frame).
+JPEG and CCITT G4 data is copied into the PDF as is - no decoding or re-encoding;
+other images are converted in worker processes. Pages are appended in batches
+with an incremental save after each, so memory stays flat however many scans
+there are
+"""
+
+import fitz  # PyMuPDF
+import io
+import os
+import sys
+import logging
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from PIL import Image
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.images_to_pdf image1.tif image2.jpg ... output.pdf [--dpi 200]
+
+IMAGE_EXTENSIONS = ('.tif', '.tiff', '.jpg', '.jpeg', '.png', '.bmp', '.gif')
+
+# Resolution assumed for images that don't record a usable one (cameras often write 72)
+DEFAULT_DPI = 200
+MIN_RECORDED_DPI = 100
+
+# Pages appended between incremental saves
+PAGE_BATCH = 32
+
+# TIFF tags
+TIFF_COMPRESSION = 259
+TIFF_PHOTOMETRIC = 262
+TIFF_FILL_ORDER = 266
+TIFF_STRIP_OFFSETS = 273
+TIFF_SAMPLES_PER_PIXEL = 277
+TIFF_ROWS_PER_STRIP = 278
+TIFF_STRIP_BYTE_COUNTS = 279
+TIFF_TILE_WIDTH = 322
+COMPRESSION_G4 = 4
+PHOTOMETRIC_BLACK_IS_ZERO = 1
+
+# EXIF orientation -> counter-clockwise rotation that makes a JPEG upright
+EXIF_ORIENTATION = 0x0112
+_ORIENTATION_ROTATION = {3: 180, 6: 270, 8: 90}
+
+def _page_dpi(image, dpi=None):
+    """Resolution (x, y) a page is laid out at - dpi if given, else the image's own if usable"""
+    if dpi:
+        return dpi, dpi
+    recorded = image.info.get('dpi')
+    if recorded and min(recorded) >= MIN_RECORDED_DPI:
+        return float(recorded[0]), float(recorded[1])
+    return DEFAULT_DPI, DEFAULT_DPI
+
+def _g4_strips(image):
+    """
+    Strip layout of the current TIFF frame if its data can be copied as is, else None
+
+    Returns:
+        dict: {'strips': [(offset, byte count, rows)], 'black_is_zero': bool}
+    """
+    tags = image.tag_v2
+    if (tags.get(TIFF_COMPRESSION) != COMPRESSION_G4 or tags.get(TIFF_SAMPLES_PER_PIXEL, 1) != 1
+            or tags.get(TIFF_FILL_ORDER, 1) != 1 or TIFF_TILE_WIDTH in tags):
+        return None
+    offsets, counts = tags.get(TIFF_STRIP_OFFSETS), tags.get(TIFF_STRIP_BYTE_COUNTS)
+    if not offsets or not counts or len(offsets) != len(counts):
+        return None
+    height = image.size[1]
+    rows_per_strip = min(tags.get(TIFF_ROWS_PER_STRIP, height), height)
+    strips = []
+    for i, (offset, count) in enumerate(zip(offsets, counts)):
+        strips.append((offset, count, min(rows_per_strip, height - i * rows_per_strip)))
+    if sum(rows for _, _, rows in strips) != height:
+        return None
+    return {'strips': strips, 'black_is_zero': tags.get(TIFF_PHOTOMETRIC) == PHOTOMETRIC_BLACK_IS_ZERO}
+
+def plan_pages(image_list, dpi=None, input_errors=None):
+    """
+    Read the headers of the input images and decide how each page is built
+
+    Only headers and TIFF directories are read, not pixel data.
+
+    Returns:
+        list: One dict per page in input order - {'file', 'frame', 'kind' ('jpeg', 'g4'
+              or 'convert'), 'pixels' (width, height), 'width', 'height' (points), 'rotate',
+              and for G4 'strips', 'black_is_zero'},
+              or None if an image can't be read (listed in input_errors if a list is given)
+    """
+    pages, valid = [], True
+    for path in image_list:
+        try:
+            with Image.open(path) as image:
+                for frame in range(getattr(image, 'n_frames', 1)):
+                    image.seek(frame)
+                    x_dpi, y_dpi = _page_dpi(image, dpi)
+                    page = {'file': path, 'frame': frame, 'kind': 'convert', 'rotate': 0, 'pixels': image.size,
+                            'width': image.size[0] / x_dpi * 72, 'height': image.size[1] / y_dpi * 72}
+                    if image.format == 'JPEG' and image.mode in ('L', 'RGB', 'CMYK'):
+                        page['kind'] = 'jpeg'
+                        page['rotate'] = _ORIENTATION_ROTATION.get(image.getexif().get(EXIF_ORIENTATION), 0)
+                        if page['rotate'] in (90, 270):
+                            page['width'], page['height'] = page['height'], page['width']
+                    elif image.format == 'TIFF':
+                        strips = _g4_strips(image)
+                        if strips:
+                            page.update(kind='g4', **strips)
+                    pages.append(page)
+        except Exception as e:
+            logging.error(f"Input file '{path}' can't be read as an image: {e}")
+            if input_errors is not None:
+                input_errors.append({'file': os.path.basename(path), 'error': f"can't be read as an image ({e})"})
+            valid = False
+    return pages if valid else None
+
+def _add_jpeg_page(doc, page_info, data):
+    """Add a page showing JPEG data, embedded as is (DCTDecode)"""
+    page = doc.new_page(width=page_info['width'], height=page_info['height'])
+    page.insert_image(page.rect, stream=data, rotate=page_info['rotate'])
+
+def _add_g4_page(doc, page_info, source):
+    """
+    Add a page showing a CCITT G4 TIFF frame, copying its compressed strips as is
+
+    Each strip is coded on its own, so every strip becomes its own image,
+    stacked top to bottom. source is the open TIFF file.
+    """
+    page = doc.new_page(width=page_info['width'], height=page_info['height'])
+    width_px, height_px = page_info['pixels']
+    top = 0
+    for offset, count, rows in page_info['strips']:
+        source.seek(offset)
+        data = source.read(count)
+        xref = doc.get_new_xref()
+        doc.update_object(xref, f"<< /Type /XObject /Subtype /Image /Width {width_px} /Height {rows} "
+                                f"/BitsPerComponent 1 /ColorSpace /DeviceGray >>")
+        doc.update_stream(xref, data, compress=False)
+        # update_stream leaves the data's own encoding undeclared
+        doc.xref_set_key(xref, 'Filter', '/CCITTFaxDecode')
+        doc.xref_set_key(xref, 'DecodeParms', f"<< /K -1 /Columns {width_px} /Rows {rows} >>")
+        if page_info['black_is_zero']:
+            doc.xref_set_key(xref, 'Decode', '[1 0]')
+        band = fitz.Rect(0, top / height_px * page.rect.height, page.rect.width, (top + rows) / height_px * page.rect.height)
+        page.insert_image(band, xref=xref)
+        top += rows
+
+def _convert_page(page_info):
+    """
+    Build a one-page PDF for an image that can't be embedded as is (runs in a worker process)
+
+    Bilevel images are re-encoded as G4, everything else is stored losslessly (Flate).
+
+    Returns:
+        bytes: The one-page PDF
+    """
+    doc = fitz.open()
+    with Image.open(page_info['file']) as image:
+        image.seek(page_info['frame'])
+        if image.mode == '1':
+            g4 = io.BytesIO()
+            image.save(g4, format='TIFF', compression='group4')
+            g4.seek(0)
+            with Image.open(g4) as encoded:
+                info = dict(page_info, **_g4_strips(encoded))
+            _add_g4_page(doc, info, g4)
+        else:
+            image = image.convert('L' if image.mode in ('L', 'I;16', 'I', 'F', 'LA') else 'RGB')
+            colorspace = fitz.csGRAY if image.mode == 'L' else fitz.csRGB
+            pixmap = fitz.Pixmap(colorspace, image.size[0], image.size[1], image.tobytes(), False)
+            page = doc.new_page(width=page_info['width'], height=page_info['height'])
+            page.insert_image(page.rect, pixmap=pixmap)
+    data = doc.tobytes(deflate=True)
+    doc.close()
+    return data
+
+def _cancelled(progress_callback, cancellation_checker, current, total, percentage, message):
+    """Report progress and check for cancellation; True if the build should stop"""
+    if cancellation_checker and cancellation_checker():
+        return True
+    return bool(progress_callback) and not progress_callback(current, total, percentage, message)
+
+def images_to_pdf(image_list, output_path, dpi=None, max_workers=None, progress_callback=None, cancellation_checker=None, input_errors=None):
+    """
+    Build one PDF from raster images, one page per image or TIFF frame, in sorted file order
+
+    JPEGs and G4 TIFF frames are embedded without re-encoding; other images
+    are converted by a pool of worker processes, a few pages ahead of the
+    writer. Every PAGE_BATCH pages the PDF is saved incrementally and reopened,
+    so the pages written so far are no longer held in memory.
+
+    Args:
+        image_list: Paths of the image files
+        output_path: Path of the PDF to write
+        dpi: Resolution to lay the pages out at (default: each image's own, or DEFAULT_DPI)
+        max_workers: Conversion worker processes (default: CPU count)
+        progress_callback: Optional function(current_page, total_pages, percentage, message) returning False to cancel
+        cancellation_checker: Optional function returning True to cancel
+        input_errors: Optional list that unreadable images are appended to ({'file', 'error'})
+
+    Returns:
+        bool: True if successful, False on failure or cancellation
+    """
+    if not isinstance(image_list, list) or len(image_list) == 0:
+        logging.error("image_list must be a non-empty list of file paths.")
+        return False
+    missing = [path for path in image_list if not os.path.exists(path)]
+    for path in missing:
+        logging.error(f"Input file '{path}' does not exist.")
+        if input_errors is not None:
+            input_errors.append({'file': os.path.basename(path), 'error': 'does not exist'})
+    if missing:
+        return False
+
+    tmp_path = output_path + '.tmp'
+    executor = None
+    doc = None
+    try:
+        if _cancelled(progress_callback, cancellation_checker, 0, len(image_list), 0, "Reading image headers..."):
+            return False
+        pages = plan_pages(sorted(image_list), dpi, input_errors)
+        if pages is None:
+            return False
+        total_pages = len(pages)
+        copied = sum(page['kind'] != 'convert' for page in pages)
+        logging.info(f"Building a {total_pages} page PDF from {len(image_list)} images "
+                     f"({copied} pages copied as is, {total_pages - copied} converted)...")
+
+        to_convert = [i for i, page in enumerate(pages) if page['kind'] == 'convert']
+        queued = iter(to_convert)
+        futures = {}
+        lookahead = 0
+        if to_convert:
+            workers = min(max_workers or os.cpu_count() or 1, len(to_convert))
+            executor = ProcessPoolExecutor(max_workers=workers)
+            # Converted pages wait in memory until their turn - keep only a few ahead of the writer
+            lookahead = workers * 2
+
+        def top_up():
+            while len(futures) < lookahead:
+                i = next(queued, None)
+                if i is None:
+                    return
+                futures[i] = executor.submit(_convert_page, pages[i])
+
+        doc = fitz.open()
+        saved = False
+        for i, page_info in enumerate(pages):
+            if cancellation_checker and cancellation_checker():
+                logging.info(f"Image to PDF cancelled at page {i + 1} of {total_pages}")
+                return False
+            if page_info['kind'] == 'convert':
+                top_up()
+                future = futures[i]
+                while not future.done():
+                    wait([future], timeout=0.1, return_when=FIRST_COMPLETED)
+                    if cancellation_checker and cancellation_checker():
+                        logging.info(f"Image to PDF cancelled at page {i + 1} of {total_pages}")
+                        return False
+                converted = fitz.open(stream=futures.pop(i).result(), filetype='pdf')
+                doc.insert_pdf(converted)
+                converted.close()
+                top_up()
+            elif page_info['kind'] == 'jpeg':
+                with open(page_info['file'], 'rb') as f:
+                    _add_jpeg_page(doc, page_info, f.read())
+            else:
+                with open(page_info['file'], 'rb') as f:
+                    _add_g4_page(doc, page_info, f)
+
+            if (i + 1) % PAGE_BATCH == 0 or i + 1 == total_pages:
+                # Write the batch out and reopen, so its image data leaves memory
+                if saved:
+                    doc.save(tmp_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+                else:
+                    doc.save(tmp_path, deflate=True)
+                    saved = True
+                doc.close()
+                doc = fitz.open(tmp_path) if i + 1 < total_pages else None
+            if _cancelled(progress_callback, cancellation_checker, i + 1, total_pages, int((i + 1) / total_pages * 100),
+                          f"Added page {i + 1} of {total_pages}"):
+                logging.info(f"Image to PDF cancelled after page {i + 1} of {total_pages}")
+                return False
+
+        os.replace(tmp_path, output_path)
+        logging.info(f"Saved '{output_path}' ({total_pages} pages)")
+        return True
+    except Exception as e:
+        logging.error(f"Error building PDF from images: {e}")
+        return False
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if doc is not None:
+            doc.close()
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+def image_files(folder):
+    """Image files directly in a folder (see IMAGE_EXTENSIONS)"""
+    return [os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(os.path.join(folder, name))]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build a PDF from scanned images (TIFF, JPEG, ...) in sorted order')
+    parser.add_argument('inputs', nargs='+', help='Image files or folders of images, followed by the output PDF path')
+    parser.add_argument('--dpi', type=float, help=f'Page resolution (default: from each image, else {DEFAULT_DPI})')
+    parser.add_argument('--workers', type=int, help='Conversion worker processes (default: CPU count)')
+
+    args = parser.parse_args()
+    if len(args.inputs) < 2:
+        parser.error('give at least one image or folder and the output PDF path')
+    images = []
+    for path in args.inputs[:-1]:
+        images.extend(image_files(path) if os.path.isdir(path) else [path])
+    success = images_to_pdf(images, args.inputs[-1], dpi=args.dpi, max_workers=args.workers)
+    if not success:
+        print("Image to PDF failed!")
+    sys.exit(0 if success else 1)
@@ -2,100 +2,281 @@
 """
 Smart PDF optimization - reduce file size while preserving all visual content
 Focuses on font deduplication, object cleanup, and compression without losing content
+(lossy image downsampling is an optional extra step, see downsample)
 """
 
 import fitz  # PyMuPDF
 import sys
 import os
 import logging
+import numpy as np
 from collections import defaultdict
+from manage_pdfs.images import dedupe_embedded_images
+from manage_pdfs.downsample import downsample_images, DEFAULT_JPEG_QUALITY
+from manage_pdfs.fonts import subset_embedded_fonts, unembed_standard_fonts
+from manage_pdfs.resource_graph import get_resource_graph, KIND_FONT, KIND_IMAGE, KIND_ANNOT, KIND_WIDGET, KIND_NAMES
 
 logging.basicConfig(level=logging.INFO)
 
+def _name(value):
+    """A PDF name value without its slash, e.g. '/Type1' -> 'Type1'"""
+    return value[1:] if value.startswith('/') else value
+
+def _font_key(doc, xref):
+    """Font key used in the analysis - base font, font type and encoding, like page.get_fonts reports them"""
+    basefont = _name(doc.xref_get_key(xref, 'BaseFont')[1])
+    font_type = _name(doc.xref_get_key(xref, 'Subtype')[1])
+    kind, encoding = doc.xref_get_key(xref, 'Encoding')
+    if kind == 'name':
+        encoding = _name(encoding)
+    elif kind == 'xref':
+        encoding = _name(doc.xref_get_key(int(encoding.split()[0]), 'BaseEncoding')[1])
+    elif kind == 'dict':
+        encoding = _name(doc.xref_get_key(xref, 'Encoding/BaseEncoding')[1])
+    else:
+        encoding = ''
+    if encoding == 'null':
+        encoding = ''
+    return f"{basefont}_{font_type}_{encoding}"
+
+def analyze_document(doc, size_bytes=None):
+    """
+    Analyze what's taking up space in an open document
+
+    Built on the page -> resource graph (see resource_graph), which comes from
+    one pass over the xref table - no page is loaded. Only the font objects
+    used by pages are looked at again, for their names.
+
+    Args:
+        doc: Open fitz document
+        size_bytes: Size of the file on disk (defaults to the size of doc.name)
+
+    Returns:
+        dict: {'original_size_mb', 'pages', 'objects', 'images' (image uses summed over pages),
+               'annotations', 'widgets', 'fonts': {'unique_fonts', 'font_usage', 'duplicated_fonts'},
+               'object_bytes' (xref -> stored bytes), 'bytes_by_kind' (resource kind -> bytes)}
+    """
+    if size_bytes is None:
+        size_bytes = os.path.getsize(doc.name)
+    graph = get_resource_graph(doc)
+    kinds, indices = graph['kinds'], graph['indices']
+    page_of_link = np.repeat(np.arange(graph['page_count']), np.diff(graph['indptr']))
+
+    # Descendant fonts of Type0 fonts and image masks are reached from the page, but aren't listed on it
+    hidden = np.zeros(graph['xref_count'], dtype=bool)
+    hidden[graph['masks']] = True
+    hidden[graph['descendant_fonts']] = True
+    listed = ~hidden[indices]
+
+    font_usage = defaultdict(list)  # font key -> [page numbers]
+    font_keys = {}
+    is_font = listed & (kinds[indices] == KIND_FONT)
+    for page_num, xref in zip(page_of_link[is_font].tolist(), indices[is_font].tolist()):
+        if xref not in font_keys:
+            font_keys[xref] = _font_key(doc, xref)
+        font_usage[font_keys[xref]].append(page_num + 1)
+
+    lengths = graph['lengths']
+    stored = np.nonzero(lengths)[0]
+    return {
+        'original_size_mb': size_bytes / (1024 * 1024),
+        'pages': graph['page_count'],
+        'fonts': {
+            'unique_fonts': len(font_usage),
+            'font_usage': dict(font_usage),
+            'duplicated_fonts': {k: v for k, v in font_usage.items() if len(v) > 1}
+        },
+        'images': int(np.count_nonzero(listed & (kinds[indices] == KIND_IMAGE))),
+        'annotations': int(np.count_nonzero(kinds[graph['annot_indices']] == KIND_ANNOT)),
+        'widgets': int(np.count_nonzero(kinds[graph['annot_indices']] == KIND_WIDGET)),
+        'objects': graph['xref_count'],
+        'object_bytes': dict(zip(stored.tolist(), lengths[stored].tolist())),
+        'bytes_by_kind': {name: int(lengths[kinds == kind].sum()) for kind, name in enumerate(KIND_NAMES)},
+    }
+
 def analyze_pdf_bloat(input_pdf):
-    """Analyze what's taking up space in a PDF"""
+    """Analyze what's taking up space in a PDF (see analyze_document)"""
     
     if not os.path.exists(input_pdf):
         logging.error(f"Input file '{input_pdf}' does not exist.")
         return None
     
     doc = fitz.open(input_pdf)
-    original_size = os.path.getsize(input_pdf) / (1024 * 1024)  # MB
+    try:
+        return analyze_document(doc, os.path.getsize(input_pdf))
+    finally:
+        doc.close()
+
+def optimize_document(doc, aggressive=False, dedupe_images=False, image_report=None, size_bytes=None,
+                      downsample_dpi=None, jpeg_quality=DEFAULT_JPEG_QUALITY, downsample_report=None,
+                      subset_fonts=False, font_report=None, unembed_fonts=False, unembed_report=None):
+    """
+    Analyze and optimize an open document in place, without saving it
+
+    The caller saves once, with the returned options (or stronger ones), so a
+    pipeline such as optimize + compress parses the file only once.
+
+    Args:
+        doc: Open fitz document (changed in place)
+        aggressive: If True, use more aggressive optimization
+        dedupe_images: If True, store images with the same decoded pixels only once
+        image_report: Optional dict that receives the image dedupe report
+        size_bytes: Size of the file on disk (defaults to the size of doc.name)
+        downsample_dpi: If set, resample images above this DPI and re-encode them as JPEG (lossy)
+        jpeg_quality: JPEG quality for downsampled images
+        downsample_report: Optional dict that receives the downsampling report (see downsample_images)
+        subset_fonts: If True, cut fully embedded fonts down to the glyphs used (see subset_embedded_fonts)
+        font_report: Optional dict that receives the font subsetting report
+        unembed_fonts: If True, drop embedded copies of the standard 14 fonts where the encoding allows
+                       (see unembed_standard_fonts)
+        unembed_report: Optional dict that receives the unembedding report
+
+    Returns:
+        tuple: (analysis dict - see analyze_document, plus 'font_bytes_before'/'font_bytes_after'
+                when fonts are subset or unembedded, save options dict for doc.save)
+    """
+    logging.info(f"Analyzing PDF for optimization: '{doc.name}'...")
     
-    analysis = {
-        'original_size_mb': original_size,
-        'pages': doc.page_count,
-        'fonts': {},
-        'images': 0,
-        'annotations': 0,
-        'widgets': 0,
-        'objects': doc.xref_length(),
-    }
+    # First, analyze the PDF to understand what's taking up space
+    analysis = analyze_document(doc, size_bytes)
     
-    # Analyze fonts across all pages
-    font_usage = defaultdict(list)  # font_name -> [page_numbers]
-    unique_fonts = set()
+    logging.info(f"PDF Analysis:")
+    logging.info(f"  Original size: {analysis['original_size_mb']:.2f} MB")
+    logging.info(f"  Pages: {analysis['pages']}")
+    logging.info(f"  Objects: {analysis['objects']}")
+    logging.info(f"  Unique fonts: {analysis['fonts']['unique_fonts']}")
+    logging.info(f"  Images: {analysis['images']}")
+    logging.info(f"  Annotations: {analysis['annotations']}")
+    logging.info(f"  Widgets: {analysis['widgets']}")
     
-    for page_num in range(doc.page_count):
-        page = doc[page_num]
-        
-        # Count annotations and widgets
-        analysis['annotations'] += len(list(page.annots()))
-        analysis['widgets'] += len(list(page.widgets()))
-        
-        # Count images
-        analysis['images'] += len(page.get_images())
-        
-        # Analyze fonts on this page
-        page_fonts = page.get_fonts()
-        for font_info in page_fonts:
-            # Handle different font info tuple lengths
-            try:
-                if len(font_info) >= 6:
-                    # Standard format: (xref, ext, type, basefont, name, encoding, ...)
-                    font_xref, ext, font_type, basefont, font_name, encoding = font_info[:6]
-                elif len(font_info) >= 4:
-                    # Minimal format: (xref, ext, type, basefont, ...)
-                    font_xref, ext, font_type, basefont = font_info[:4]
-                    font_name = basefont
-                    encoding = "unknown"
-                else:
-                    # Fallback
-                    font_xref = font_info[0] if len(font_info) > 0 else 0
-                    basefont = str(font_info) if font_info else "unknown"
-                    font_name = basefont
-                    font_type = "unknown"
-                    encoding = "unknown"
-                
-                font_key = f"{basefont}_{font_type}_{encoding}"
-                font_usage[font_key].append(page_num + 1)
-                unique_fonts.add(font_key)
-                
-            except Exception as e:
-                logging.debug(f"Could not parse font info {font_info}: {e}")
-                # Fallback - still count it as a font
-                font_key = f"unknown_font_{len(unique_fonts)}"
-                font_usage[font_key].append(page_num + 1)
-                unique_fonts.add(font_key)
+    # Report on font duplication
+    duplicated_fonts = analysis['fonts']['duplicated_fonts']
+    if duplicated_fonts:
+        logging.info(f"  Duplicated fonts: {len(duplicated_fonts)}")
+        for font_name, pages in duplicated_fonts.items():
+            logging.info(f"    '{font_name}' used on {len(pages)} pages: {pages}")
+    else:
+        logging.info("  No duplicated fonts found")
+    
+    optimizations = []
     
-    # Analyze font duplication
-    analysis['fonts'] = {
-        'unique_fonts': len(unique_fonts),
-        'font_usage': dict(font_usage),
-        'duplicated_fonts': {k: v for k, v in font_usage.items() if len(v) > 1}
+    # Optimization 1: Clean up and deduplicate objects
+    logging.info("Performing object cleanup and deduplication...")
+    
+    # Choose garbage collection level based on aggressiveness
+    if aggressive:
+        garbage_level = 4  # Most aggressive cleanup
+        clean = True
+        optimizations.append("aggressive object cleanup")
+    else:
+        garbage_level = 3  # Moderate cleanup
+        clean = True
+        optimizations.append("moderate object cleanup")
+    
+    # Optimization 2: Font subsetting and deduplication
+    # PyMuPDF handles this automatically with garbage collection, but we can help
+    logging.info("Optimizing font usage...")
+    optimizations.append("font deduplication")
+    if subset_fonts:
+        report = subset_embedded_fonts(doc)
+        if font_report is not None:
+            font_report.update(report)
+        analysis['font_bytes_before'] = report['bytes_before']
+        analysis['font_bytes_after'] = report['bytes_after']
+        if report['fonts']:
+            optimizations.append(f"{len(report['fonts'])} fonts subset")
+    if unembed_fonts:
+        report = unembed_standard_fonts(doc)
+        if unembed_report is not None:
+            unembed_report.update(report)
+        font_bytes = analysis.get('font_bytes_after', analysis['bytes_by_kind']['font_file'])
+        analysis.setdefault('font_bytes_before', font_bytes)
+        analysis['font_bytes_after'] = font_bytes - report['bytes_saved']
+        if report['fonts']:
+            optimizations.append(f"{len(report['fonts'])} standard fonts unembedded")
+    if 'font_bytes_after' in analysis:
+        logging.info(f"  Font programs: {analysis['font_bytes_before']/1024:,.0f} KB -> "
+                     f"{analysis['font_bytes_after']/1024:,.0f} KB")
+    
+    # Optimization 3: Image optimization (lossless)
+    logging.info("Optimizing images...")
+    # PyMuPDF's clean=True will optimize images losslessly
+    optimizations.append("lossless image optimization")
+    if dedupe_images:
+        # Copies of the same image with different encodings survive garbage collection
+        report = dedupe_embedded_images(doc)
+        if image_report is not None:
+            image_report.update(report)
+        if report['duplicates']:
+            optimizations.append(f"{report['duplicates']} duplicate images removed")
+    if downsample_dpi:
+        # Lossy - only when asked for
+        report = downsample_images(doc, downsample_dpi, jpeg_quality)
+        if downsample_report is not None:
+            downsample_report.update(report)
+        if report['replaced']:
+            optimizations.append(f"{report['replaced']} images downsampled to {downsample_dpi} DPI")
+    
+    # Optimization 4: Remove unused objects and compress streams
+    logging.info("Compressing content streams...")
+    optimizations.append("content stream compression")
+    
+    # Save with optimizations
+    save_options = {
+        'garbage': garbage_level,  # Remove unused objects and deduplicate
+        'deflate': True,          # Compress content streams
+        'clean': clean,           # Clean up PDF structure
+        'ascii': False,           # Keep binary encoding (smaller)
+        'expand': False          # Don't expand abbreviated commands
     }
     
-    doc.close()
-    return analysis
+    if aggressive:
+        # Additional aggressive optimizations
+        save_options['pretty'] = False  # Remove pretty-printing
+        optimizations.append("removed formatting")
+    
+    logging.info(f"Optimized with: {', '.join(optimizations)}")
+    return analysis, save_options
+
+def log_size_reduction(original_bytes, optimized_bytes):
+    """Log the size change of an optimized file"""
+    original_size = original_bytes / (1024 * 1024)  # MB
+    optimized_size = optimized_bytes / (1024 * 1024)  # MB
+    size_reduction = original_size - optimized_size
+    percent_reduction = (size_reduction / original_size) * 100 if original_size else 0
+    
+    logging.info(f"Optimization Results:")
+    logging.info(f"  Original size: {original_size:.2f} MB")
+    logging.info(f"  Optimized size: {optimized_size:.2f} MB")
+    logging.info(f"  Size reduction: {size_reduction:.2f} MB ({percent_reduction:.1f}%)")
+    
+    if percent_reduction > 0:
+        logging.info(f"PDF optimized successfully!")
+    else:
+        logging.info(f"PDF was already well-optimized (minimal size change)")
 
-def optimize_pdf(input_pdf, output_pdf, aggressive=False):
+def optimize_pdf(input_pdf, output_pdf, aggressive=False, dedupe_images=False, image_report=None,
+                 downsample_dpi=None, jpeg_quality=DEFAULT_JPEG_QUALITY, downsample_report=None,
+                 subset_fonts=False, font_report=None, unembed_fonts=False, unembed_report=None):
     """
     Optimize PDF file size while preserving all visual content
+
+    The file is opened and parsed once - analysis and optimization share the
+    document (see optimize_document).
     
     Args:
         input_pdf: Path to input PDF
         output_pdf: Path to save optimized PDF  
         aggressive: If True, use more aggressive optimization
+        dedupe_images: If True, store images with the same decoded pixels only once
+        image_report: Optional dict that receives the image dedupe report
+        downsample_dpi: If set, resample images above this DPI and re-encode them as JPEG (lossy)
+        jpeg_quality: JPEG quality for downsampled images
+        downsample_report: Optional dict that receives the downsampling report (see downsample_images)
+        subset_fonts: If True, cut fully embedded fonts down to the glyphs used
+        font_report: Optional dict that receives the font subsetting report (see subset_embedded_fonts)
+        unembed_fonts: If True, drop embedded copies of the standard 14 fonts where the encoding allows
+        unembed_report: Optional dict that receives the unembedding report (see unembed_standard_fonts)
     """
     
     if not os.path.exists(input_pdf):
@@ -103,96 +284,18 @@ def optimize_pdf(input_pdf, output_pdf, aggressive=False):
         return False
     
     try:
-        logging.info(f"Analyzing PDF for optimization: '{input_pdf}'...")
-        
-        # First, analyze the PDF to understand what's taking up space
-        analysis = analyze_pdf_bloat(input_pdf)
-        if not analysis:
-            return False
-        
-        logging.info(f"PDF Analysis:")
-        logging.info(f"  Original size: {analysis['original_size_mb']:.2f} MB")
-        logging.info(f"  Pages: {analysis['pages']}")
-        logging.info(f"  Objects: {analysis['objects']}")
-        logging.info(f"  Unique fonts: {analysis['fonts']['unique_fonts']}")
-        logging.info(f"  Images: {analysis['images']}")
-        logging.info(f"  Annotations: {analysis['annotations']}")
-        logging.info(f"  Widgets: {analysis['widgets']}")
-        
-        # Report on font duplication
-        duplicated_fonts = analysis['fonts']['duplicated_fonts']
-        if duplicated_fonts:
-            logging.info(f"  Duplicated fonts: {len(duplicated_fonts)}")
-            for font_name, pages in duplicated_fonts.items():
-                logging.info(f"    '{font_name}' used on {len(pages)} pages: {pages}")
-        else:
-            logging.info("  No duplicated fonts found")
-        
-        # Open document for optimization
+        original_bytes = os.path.getsize(input_pdf)
         doc = fitz.open(input_pdf)
+        try:
+            _, save_options = optimize_document(doc, aggressive, dedupe_images, image_report, original_bytes,
+                                                downsample_dpi, jpeg_quality, downsample_report,
+                                                subset_fonts, font_report, unembed_fonts, unembed_report)
+            logging.info(f"Saving optimized PDF to '{output_pdf}'...")
+            doc.save(output_pdf, **save_options)
+        finally:
+            doc.close()
         
-        optimizations = []
-        
-        # Optimization 1: Clean up and deduplicate objects
-        logging.info("Performing object cleanup and deduplication...")
-        
-        # Choose garbage collection level based on aggressiveness
-        if aggressive:
-            garbage_level = 4  # Most aggressive cleanup
-            clean = True
-            optimizations.append("aggressive object cleanup")
-        else:
-            garbage_level = 3  # Moderate cleanup
-            clean = True
-            optimizations.append("moderate object cleanup")
-        
-        # Optimization 2: Font subsetting and deduplication
-        # PyMuPDF handles this automatically with garbage collection, but we can help
-        logging.info("Optimizing font usage...")
-        optimizations.append("font deduplication")
-        
-        # Optimization 3: Image optimization (lossless)
-        logging.info("Optimizing images...")
-        # PyMuPDF's clean=True will optimize images losslessly
-        optimizations.append("lossless image optimization")
-        
-        # Optimization 4: Remove unused objects and compress streams
-        logging.info("Compressing content streams...")
-        optimizations.append("content stream compression")
-        
-        # Save with optimizations
-        save_options = {
-            'garbage': garbage_level,  # Remove unused objects and deduplicate
-            'deflate': True,          # Compress content streams
-            'clean': clean,           # Clean up PDF structure
-            'ascii': False,           # Keep binary encoding (smaller)
-            'expand': False          # Don't expand abbreviated commands
-        }
-        
-        if aggressive:
-            # Additional aggressive optimizations
-            save_options['pretty'] = False  # Remove pretty-printing
-            optimizations.append("removed formatting")
-        
-        logging.info(f"Saving optimized PDF with: {', '.join(optimizations)}")
-        doc.save(output_pdf, **save_options)
-        doc.close()
-        
-        # Calculate results
-        optimized_size = os.path.getsize(output_pdf) / (1024 * 1024)  # MB
-        size_reduction = analysis['original_size_mb'] - optimized_size
-        percent_reduction = (size_reduction / analysis['original_size_mb']) * 100
-        
-        logging.info(f"Optimization Results:")
-        logging.info(f"  Original size: {analysis['original_size_mb']:.2f} MB")
-        logging.info(f"  Optimized size: {optimized_size:.2f} MB")
-        logging.info(f"  Size reduction: {size_reduction:.2f} MB ({percent_reduction:.1f}%)")
-        
-        if percent_reduction > 0:
-            logging.info(f"PDF optimized successfully!")
-        else:
-            logging.info(f"PDF was already well-optimized (minimal size change)")
-        
+        log_size_reduction(original_bytes, os.path.getsize(output_pdf))
         return True
         
     except Exception as e:
@@ -209,10 +312,22 @@ def main():
                        help='Only analyze the PDF, don\'t create optimized version')
     parser.add_argument('--aggressive', action='store_true',
                        help='Use more aggressive optimization (may be slower)')
+    parser.add_argument('--dedupe-images', action='store_true',
+                       help='Store images with the same pixels (but different encoding) only once')
+    parser.add_argument('--subset-fonts', action='store_true',
+                       help='Cut fully embedded fonts down to the glyphs used')
+    parser.add_argument('--unembed-standard-fonts', action='store_true',
+                       help='Drop embedded copies of the standard 14 fonts (Helvetica, Times, Courier, ...)')
+    parser.add_argument('--downsample-dpi', type=int,
+                       help='Resample images above this DPI and re-encode them as JPEG (lossy)')
+    parser.add_argument('--jpeg-quality', type=int, default=DEFAULT_JPEG_QUALITY,
+                       help=f'JPEG quality 1-100 for downsampled images (default: {DEFAULT_JPEG_QUALITY})')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Enable verbose logging')
     
     args = parser.parse_args()
+    if not 1 <= args.jpeg_quality <= 100:
+        parser.error('--jpeg-quality must be between 1 and 100')
     
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
@@ -235,6 +350,14 @@ def main():
             print(f"Images: {analysis['images']:,}")
             print(f"Annotations: {analysis['annotations']}")
             print(f"Form widgets: {analysis['widgets']}")
+            print(f"\nBytes by object kind:")
+            for kind, size in sorted(analysis['bytes_by_kind'].items(), key=lambda item: -item[1]):
+                if size:
+                    print(f"  {kind:12} {size/1024/1024:10.2f} MB")
+            largest = sorted(analysis['object_bytes'].items(), key=lambda item: -item[1])[:10]
+            print(f"\nLargest objects:")
+            for xref, size in largest:
+                print(f"  xref {xref}: {size/1024:,.0f} KB")
             
             duplicated = analysis['fonts']['duplicated_fonts']
             if duplicated:
@@ -253,16 +376,45 @@ def main():
         sys.exit(1)
     
     # Perform optimization
-    success = optimize_pdf(args.input_pdf, args.output_pdf, args.aggressive)
+    downsample_report, font_report, unembed_report = {}, {}, {}
+    success = optimize_pdf(args.input_pdf, args.output_pdf, args.aggressive, dedupe_images=args.dedupe_images,
+                           downsample_dpi=args.downsample_dpi, jpeg_quality=args.jpeg_quality,
+                           downsample_report=downsample_report, subset_fonts=args.subset_fonts,
+                           font_report=font_report, unembed_fonts=args.unembed_standard_fonts,
+                           unembed_report=unembed_report)
     
     if success:
         print(f"\nPDF optimization completed!")
         print(f"Optimized file saved to: {args.output_pdf}")
+        if font_report:
+            for entry in font_report['fonts']:
+                print(f"  Font '{entry['font']}': {entry['bytes_before']/1024:,.0f} KB -> {entry['bytes_after']/1024:,.0f} KB")
+            print(f"Font programs: {font_report['bytes_before']/1024:,.0f} KB -> {font_report['bytes_after']/1024:,.0f} KB")
+        if unembed_report:
+            for entry in unembed_report['fonts']:
+                print(f"  Font '{entry['font']}': unembedded, {entry['bytes']/1024:,.0f} KB")
+            for entry in unembed_report['skipped']:
+                print(f"  Font '{entry['font']}': kept embedded ({entry['reason']})")
+        if downsample_report:
+            for entry in downsample_report['details']:
+                if entry['replaced']:
+                    print(f"  Image xref {entry['xref']} ({entry['width']}x{entry['height']} at {entry['dpi']:.0f} DPI -> "
+                          f"{entry['new_width']}x{entry['new_height']}): {entry['bytes_before']/1024:,.0f} KB -> "
+                          f"{entry['bytes_after']/1024:,.0f} KB")
+            print(f"Downsampled {downsample_report['replaced']} images, "
+                  f"{downsample_report['bytes_before']/1024:,.0f} KB -> {downsample_report['bytes_after']/1024:,.0f} KB")
         print(f"\n This optimization:")
         print(f"   Preserves all text, images, annotations, and signatures")
         print(f"   Deduplicates fonts and removes unused objects")
+        if args.subset_fonts:
+            print(f"   Subsets embedded fonts to the glyphs used")
+        if args.unembed_standard_fonts:
+            print(f"   Uses the viewer's own standard fonts instead of embedded copies")
         print(f"   Compresses content streams losslessly")
-        print(f"   Maintains full visual fidelity")
+        if args.downsample_dpi:
+            print(f"   Downsamples images above {args.downsample_dpi} DPI (lossy)")
+        else:
+            print(f"   Maintains full visual fidelity")
         sys.exit(0)
     else:
         print("PDF optimization failed!")
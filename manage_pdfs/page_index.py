@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Page index for outline (bookmark) and page label based splitting
+Builds a per-page view of a document's TOC and page labels in one pass and caches it per document
+"""
+
+import os
+import re
+import logging
+import threading
+from collections import OrderedDict
+from manage_pdfs.fingerprint import file_fingerprint
+
+logging.basicConfig(level=logging.INFO)
+
+# Keep indexes for the most recently used documents (keyed by file fingerprint)
+PAGE_INDEX_CACHE_SIZE = 32
+_page_index_cache = OrderedDict()
+_page_index_lock = threading.Lock()
+
+def _roman(number):
+    """Convert a positive integer to upper-case roman numerals"""
+    numerals = [(1000, 'M'), (900, 'CM'), (500, 'D'), (400, 'CD'), (100, 'C'), (90, 'XC'),
+                (50, 'L'), (40, 'XL'), (10, 'X'), (9, 'IX'), (5, 'V'), (4, 'IV'), (1, 'I')]
+    result = ''
+    for value, numeral in numerals:
+        while number >= value:
+            result += numeral
+            number -= value
+    return result
+
+def _letters(number):
+    """Convert a positive integer to PDF letter numbering (A..Z, AA..ZZ, ...)"""
+    letter = chr(ord('A') + (number - 1) % 26)
+    return letter * ((number - 1) // 26 + 1)
+
+def _format_label(rule, number):
+    """Build a page label from a page label rule and the page's number within that rule"""
+    style = rule.get('style', '')
+    if style == 'D':
+        numeral = str(number)
+    elif style == 'R':
+        numeral = _roman(number)
+    elif style == 'r':
+        numeral = _roman(number).lower()
+    elif style == 'A':
+        numeral = _letters(number)
+    elif style == 'a':
+        numeral = _letters(number).lower()
+    else:
+        numeral = ''
+    return f"{rule.get('prefix', '')}{numeral}"
+
+def build_page_index(doc):
+    """
+    Build a page index from the document's TOC and page labels
+
+    Only the document catalog is read (no pages are loaded), so this is cheap
+    even for very large plan sets.
+
+    Args:
+        doc: Open fitz document
+
+    Returns:
+        dict: {
+            'page_count': int,
+            'outline': [(level, title, page_index), ...] sorted by page (0-indexed pages),
+            'labels': [label for each page] ('' when the document has no labels)
+        }
+    """
+    page_count = doc.page_count
+
+    # Outline entries - skip bookmarks that don't point at a page in this document
+    outline = []
+    for entry in doc.get_toc(simple=True):
+        level, title, page_num = entry[:3]
+        if 1 <= page_num <= page_count:
+            outline.append((level, title.strip(), page_num - 1))
+    outline.sort(key=lambda item: item[2])
+
+    # Page labels - expand the label rules to one label per page
+    labels = [''] * page_count
+    rules = sorted(doc.get_page_labels(), key=lambda rule: rule.get('startpage', 0))
+    for i, rule in enumerate(rules):
+        start = rule.get('startpage', 0)
+        end = rules[i + 1].get('startpage', page_count) if i + 1 < len(rules) else page_count
+        first_number = rule.get('firstpagenum', 1)
+        for page_num in range(max(0, start), min(end, page_count)):
+            labels[page_num] = _format_label(rule, first_number + page_num - start)
+
+    logging.info(f"Built page index: {page_count} pages, {len(outline)} bookmarks, {len(rules)} page label rules")
+    return {
+        'page_count': page_count,
+        'outline': outline,
+        'labels': labels,
+    }
+
+def get_page_index(doc, path=None):
+    """
+    Get the page index for a document, reusing a cached index for the same file
+
+    Args:
+        doc: Open fitz document
+        path (str): Path of the document on disk (defaults to doc.name)
+
+    Returns:
+        dict: Page index (see build_page_index)
+    """
+    path = path or getattr(doc, 'name', None)
+    if not path or not os.path.exists(path):
+        # In-memory documents can't be fingerprinted, so don't cache them
+        return build_page_index(doc)
+
+    key = file_fingerprint(path)
+    with _page_index_lock:
+        if key in _page_index_cache:
+            _page_index_cache.move_to_end(key)
+            logging.debug(f"Using cached page index for '{path}'")
+            return _page_index_cache[key]
+
+    index = build_page_index(doc)
+    with _page_index_lock:
+        _page_index_cache[key] = index
+        while len(_page_index_cache) > PAGE_INDEX_CACHE_SIZE:
+            _page_index_cache.popitem(last=False)
+    return index
+
+def label_prefix(label):
+    """
+    Discipline prefix of a page label, e.g. "A-101" -> "A", "S2.01" -> "S", "M-1" -> "M"
+    """
+    return re.match(r'^\D*', label).group(0).strip(' -_.')
+
+def _chunks_from_starts(starts, page_count):
+    """Turn sorted chunk start pages into page ranges"""
+    ends = starts[1:] + [page_count]
+    return [range(start, end) for start, end in zip(starts, ends)]
+
+def plan_outline_chunks(index, level=1):
+    """
+    Plan chunks that start at each bookmark of the given level (or shallower)
+
+    Pages before the first bookmark become their own untitled chunk. When
+    several bookmarks point at the same page, the first one names the chunk.
+
+    Returns:
+        tuple: (list of page ranges, list of chunk titles)
+    """
+    page_count = index['page_count']
+    starts, titles = [], []
+    for entry_level, title, page_num in index['outline']:
+        if entry_level > level or (starts and starts[-1] == page_num):
+            continue
+        starts.append(page_num)
+        titles.append(title)
+    if not starts:
+        return [], []
+    if starts[0] > 0:
+        starts.insert(0, 0)
+        titles.insert(0, None)
+    return _chunks_from_starts(starts, page_count), titles
+
+def plan_label_chunks(index):
+    """
+    Plan chunks that start wherever the page label prefix changes (e.g. A-xxx -> S-xxx)
+
+    Returns:
+        tuple: (list of page ranges, list of chunk titles)
+    """
+    labels = index['labels']
+    if not any(labels):
+        return [], []
+    starts, titles = [], []
+    previous = None
+    for page_num, label in enumerate(labels):
+        prefix = label_prefix(label)
+        if page_num == 0 or prefix != previous:
+            starts.append(page_num)
+            titles.append(prefix or None)
+        previous = prefix
+    return _chunks_from_starts(starts, index['page_count']), titles
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Partition a PDF into several output files in one pass
+Each page goes to the first bucket whose predicates it matches (sheet size, rotation,
+annotations, page label), and all bucket files are written in parallel
+"""
+
+import fitz  # PyMuPDF
+import os
+import re
+import sys
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from manage_pdfs.page_index import get_page_index
+from manage_pdfs.split import save_chunk_atomic
+from manage_pdfs.resource_graph import has_annotations
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.partition input.pdf output_dir buckets.json
+
+# Common sheet sizes in inches (short side, long side)
+SHEET_SIZES = {
+    'letter': (8.5, 11),
+    'legal': (8.5, 14),
+    '11x17': (11, 17),
+    'tabloid': (11, 17),
+    'ansi_c': (17, 22),
+    'arch_c': (18, 24),
+    'ansi_d': (22, 34),
+    'arch_d': (24, 36),
+    '24x36': (24, 36),
+    'ansi_e': (34, 44),
+    'arch_e': (36, 48),
+    '30x42': (30, 42),
+}
+
+# How far (in inches) a page may be off a sheet size and still match it
+SIZE_TOLERANCE_IN = 0.25
+
+def _parse_size(size):
+    """Turn a size class ('arch_d', '24x36', '8.5x11') into (short side, long side) in inches"""
+    key = str(size).lower().strip()
+    if key in SHEET_SIZES:
+        return SHEET_SIZES[key]
+    match = re.match(r'^\s*(\d+(?:\.\d+)?)\s*x\s*(\d+(?:\.\d+)?)\s*$', key)
+    if not match:
+        raise ValueError(f"Unknown page size class '{size}'")
+    width, height = float(match.group(1)), float(match.group(2))
+    return (min(width, height), max(width, height))
+
+def _inherited_key(doc, xref, key):
+    """Look up a page key that may be inherited from the page tree (e.g. /Rotate)"""
+    seen = set()
+    while xref and xref not in seen:
+        seen.add(xref)
+        kind, value = doc.xref_get_key(xref, key)
+        if kind != 'null':
+            return kind, value
+        kind, value = doc.xref_get_key(xref, 'Parent')
+        xref = int(value.split()[0]) if kind == 'xref' else 0
+    return 'null', 'null'
+
+def scan_pages(doc, input_pdf=None):
+    """
+    Collect the attributes bucket predicates can test, for every page, in one pass
+
+    Reads page dictionaries straight from the xref table, so no page objects
+    are loaded.
+
+    Returns:
+        list: One dict per page with 'size' ((short side, long side) in inches),
+              'rotation' (degrees), 'annotated' (bool) and 'label' (str)
+    """
+    labels = get_page_index(doc, input_pdf)['labels']
+    pages = []
+    for page_num in range(doc.page_count):
+        page_xref = doc.page_xref(page_num)
+        cropbox = doc.page_cropbox(page_num)
+        width_in, height_in = cropbox.width / 72, cropbox.height / 72
+        kind, value = _inherited_key(doc, page_xref, 'Rotate')
+        rotation = int(value) % 360 if kind == 'int' else 0
+        pages.append({
+            'size': (min(width_in, height_in), max(width_in, height_in)),
+            'rotation': rotation,
+            'annotated': has_annotations(doc, page_xref),
+            'label': labels[page_num],
+        })
+    return pages
+
+def page_matches(page, bucket):
+    """
+    Check a scanned page against a bucket's predicates (all given predicates must match)
+
+    Supported predicates:
+        'size': sheet size class ('11x17', 'arch_d', '24x36', ...), either orientation
+        'rotation': page rotation in degrees (0, 90, 180, 270)
+        'annotations': True for pages with annotations (links don't count), False for pages without
+        'label': regular expression searched in the page label (e.g. '^A-')
+    """
+    if 'size' in bucket:
+        short_side, long_side = _parse_size(bucket['size'])
+        if (abs(page['size'][0] - short_side) > SIZE_TOLERANCE_IN
+                or abs(page['size'][1] - long_side) > SIZE_TOLERANCE_IN):
+            return False
+    if 'rotation' in bucket and page['rotation'] != int(bucket['rotation']) % 360:
+        return False
+    if 'annotations' in bucket and page['annotated'] != bool(bucket['annotations']):
+        return False
+    if 'label' in bucket and not re.search(bucket['label'], page['label']):
+        return False
+    return True
+
+def assign_pages(pages, buckets, unmatched='other'):
+    """
+    Assign every page to the first bucket it matches
+
+    Returns:
+        dict: bucket name -> list of 0-indexed pages, in bucket order (unmatched
+              pages go to the 'unmatched' bucket, or are dropped if it is None)
+    """
+    assignment = {bucket['name']: [] for bucket in buckets}
+    if unmatched:
+        assignment.setdefault(unmatched, [])
+    for page_num, page in enumerate(pages):
+        for bucket in buckets:
+            if page_matches(page, bucket):
+                assignment[bucket['name']].append(page_num)
+                break
+        else:
+            if unmatched:
+                assignment[unmatched].append(page_num)
+    return assignment
+
+def _safe_name(name):
+    """Bucket name usable in a file name"""
+    return re.sub(r'[^\w\-]+', '_', str(name)).strip('_') or 'bucket'
+
+def _write_bucket(input_pdf, page_numbers, out_path):
+    """Write one bucket file (runs in a worker process)"""
+    doc = fitz.open(input_pdf)
+    new_doc = fitz.open()
+    try:
+        # Insert pages one at a time, as in split, to keep links and annotations
+        for page_num in page_numbers:
+            new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num, links=True, annots=True)
+        file_size, _ = save_chunk_atomic(new_doc, out_path)
+    finally:
+        new_doc.close()
+        doc.close()
+    return file_size
+
+def partition_pdf(input_pdf, output_dir, buckets, unmatched='other', max_workers=None, progress_callback=None, cancellation_checker=None):
+    """
+    Partition a PDF into one output file per bucket in a single scan
+
+    Args:
+        input_pdf: Path to input PDF
+        output_dir: Directory to write the bucket files to ('<bucket>_<input name>')
+        buckets: List of dicts, each with a 'name' and any of the predicates
+                 described in page_matches, e.g.
+                 [{'name': '11x17', 'size': '11x17'}, {'name': 'arch', 'label': '^A-'}]
+        unmatched: Bucket name for pages that match no bucket (None to drop them)
+        max_workers: Number of worker processes writing bucket files (default: CPU count)
+        progress_callback: Optional function(current, total, percentage, message) returning False to cancel
+        cancellation_checker: Optional function returning True if the operation should be cancelled
+
+    Returns:
+        dict: bucket name -> {'file': output path, 'pages': [1-indexed pages], 'size': bytes}
+              for every non-empty bucket, or None on failure or cancellation
+    """
+    if not os.path.exists(input_pdf):
+        logging.error(f"Input file '{input_pdf}' does not exist.")
+        return None
+    if not os.path.isdir(output_dir):
+        logging.error(f"Output directory '{output_dir}' does not exist.")
+        return None
+    if not isinstance(buckets, list) or not buckets or not all(isinstance(b, dict) and b.get('name') for b in buckets):
+        logging.error("buckets must be a non-empty list of dicts with a 'name'.")
+        return None
+    names = [b['name'] for b in buckets] + ([unmatched] if unmatched else [])
+    if len(set(_safe_name(name) for name in names)) != len(names):
+        logging.error("Bucket names must be unique (and differ from the unmatched bucket).")
+        return None
+    try:
+        for bucket in buckets:
+            if 'size' in bucket:
+                _parse_size(bucket['size'])
+            if 'label' in bucket:
+                re.compile(bucket['label'])
+    except (ValueError, re.error) as e:
+        logging.error(f"Invalid bucket predicate: {e}")
+        return None
+
+    try:
+        # Single scan: read every page's attributes and assign it to a bucket
+        doc = fitz.open(input_pdf)
+        total_pages = doc.page_count
+        logging.info(f"Scanning {total_pages} pages of '{input_pdf}'...")
+        if progress_callback and not progress_callback(0, total_pages, 0, "Scanning pages..."):
+            doc.close()
+            return None
+        pages = scan_pages(doc, input_pdf)
+        doc.close()
+
+        assignment = assign_pages(pages, buckets, unmatched)
+        for name, page_numbers in assignment.items():
+            logging.info(f"Bucket '{name}': {len(page_numbers)} pages")
+
+        base_name = os.path.basename(input_pdf)
+        jobs = {name: page_numbers for name, page_numbers in assignment.items() if page_numbers}
+        out_paths = {name: os.path.join(output_dir, f"{_safe_name(name)}_{base_name}") for name in jobs}
+
+        if cancellation_checker and cancellation_checker():
+            logging.info("Partition operation cancelled before writing buckets")
+            return None
+        if progress_callback and not progress_callback(0, len(jobs), 0, f"Writing {len(jobs)} bucket files..."):
+            return None
+
+        # Write all bucket files in parallel - each worker opens the input itself
+        results = {}
+        cancelled = False
+        with ProcessPoolExecutor(max_workers=max_workers or min(len(jobs), os.cpu_count() or 1) or 1) as executor:
+            futures = {executor.submit(_write_bucket, input_pdf, page_numbers, out_paths[name]): name
+                       for name, page_numbers in jobs.items()}
+            for done, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                file_size = future.result()
+                results[name] = {
+                    'file': out_paths[name],
+                    'pages': [page_num + 1 for page_num in jobs[name]],
+                    'size': file_size,
+                }
+                logging.info(f"Saved bucket '{name}': {out_paths[name]} ({len(jobs[name])} pages, {file_size/1024:,.0f} KB)")
+
+                if ((cancellation_checker and cancellation_checker())
+                        or (progress_callback and not progress_callback(done, len(jobs), int(done / len(jobs) * 100), f"Saved bucket '{name}'"))):
+                    cancelled = True
+                    for pending in futures:
+                        pending.cancel()
+                    break
+
+        if cancelled:
+            logging.info("Partition operation cancelled - removing bucket files")
+            for out_path in out_paths.values():
+                if os.path.exists(out_path):
+                    os.unlink(out_path)
+            return None
+
+        if progress_callback:
+            progress_callback(len(jobs), len(jobs), 100, "Partition complete!")
+        return results
+    except Exception as e:
+        logging.error(f"Error partitioning PDF: {e}")
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Partition a PDF into several files in one pass')
+    parser.add_argument('input_pdf', help='Path to the input PDF file')
+    parser.add_argument('output_dir', help='Directory to save the bucket files')
+    parser.add_argument('buckets', help='JSON list of buckets, e.g. \'[{"name": "11x17", "size": "11x17"}, {"name": "arch", "label": "^A-"}]\' '
+                                        'or a path to a JSON file')
+    parser.add_argument('--unmatched', default='other', help='Bucket name for pages matching no bucket (default: other)')
+    parser.add_argument('--drop-unmatched', action='store_true', help='Leave out pages that match no bucket')
+
+    args = parser.parse_args()
+
+    if os.path.exists(args.buckets):
+        with open(args.buckets, 'r', encoding='utf-8') as f:
+            bucket_list = json.load(f)
+    else:
+        bucket_list = json.loads(args.buckets)
+
+    result = partition_pdf(args.input_pdf, args.output_dir, bucket_list,
+                           unmatched=None if args.drop_unmatched else args.unmatched)
+    if not result:
+        print("PDF partition failed!")
+        sys.exit(1)
+    for name, info in result.items():
+        print(f"{name}: {len(info['pages'])} pages -> {info['file']}")
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Page -> resource graph for a PDF
+Records which objects (content streams, images, form XObjects, fonts and their
+embedded font programs) each page uses, and how many bytes each object takes,
+in compact numpy arrays built in one pass over the xref table
+"""
+
+import os
+import re
+import sys
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from manage_pdfs.fingerprint import file_fingerprint
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.resource_graph input.pdf
+
+# Object kinds stored in graph['kinds']
+KIND_OTHER = 0
+KIND_CONTENT = 1
+KIND_IMAGE = 2
+KIND_FORM = 3
+KIND_FONT = 4
+KIND_FONT_FILE = 5
+KIND_ANNOT = 6
+KIND_WIDGET = 7
+KIND_NAMES = ['other', 'content', 'image', 'form', 'font', 'font_file', 'annotation', 'widget']
+
+# Object types we never walk into from a page's resources - they lead back up
+# the page tree (e.g. through /Parent) instead of down to resources
+_STOP_TYPES = {'/Page', '/Pages', '/Catalog', '/Annot'}
+
+# Keep graphs for the most recently used documents (keyed by file fingerprint)
+RESOURCE_GRAPH_CACHE_SIZE = 32
+_resource_graph_cache = OrderedDict()
+_resource_graph_lock = threading.Lock()
+
+_REF_PATTERN = re.compile(rb'(\d+) 0 R')
+
+# Tokens of PDF object source: dictionary and array delimiters, strings, names, references and other atoms
+_TOKEN_PATTERN = re.compile(r'<<|>>|\[|\]|\((?:\\.|[^\\()])*\)|<[^<>]*>|/[^\s/<>\[\]()]*|\d+\s+\d+\s+R\b|[^\s/<>\[\]()]+')
+
+def _refs(text):
+    """Object numbers referenced in a piece of PDF object source"""
+    return [int(x) for x in _REF_PATTERN.findall(text.encode('latin-1', 'replace'))]
+
+def stream_length(doc, xref):
+    """Stored (compressed) length of a stream object, 0 if it isn't a stream"""
+    kind, value = doc.xref_get_key(xref, 'Length')
+    if kind == 'int':
+        return int(value)
+    if kind == 'xref':
+        # Indirect length, e.g. "/Length 12 0 R"
+        try:
+            return int(doc.xref_object(int(value.split()[0])).strip())
+        except ValueError:
+            return 0
+    return 0
+
+def page_content(doc, page_xref):
+    """Decoded content stream data of a page (all streams, joined by newlines), b'' if it has none"""
+    kind, value = doc.xref_get_key(page_xref, 'Contents')
+    if kind not in ('xref', 'array'):
+        return b''
+    xrefs = _refs(value)
+    if kind == 'xref' and not doc.xref_is_stream(xrefs[0]):
+        # Contents array stored as its own object
+        xrefs = _refs(doc.xref_object(xrefs[0]))
+    return b'\n'.join(doc.xref_stream(xref) or b'' for xref in xrefs)
+
+def has_annotations(doc, page_xref):
+    """True if the page has any annotation other than links (and their popups)"""
+    kind, value = doc.xref_get_key(page_xref, 'Annots')
+    if kind == 'xref':
+        # Annots array stored as its own object
+        value = doc.xref_object(int(value.split()[0]))
+    elif kind != 'array':
+        return False
+    for annot_xref in _refs(value):
+        if doc.xref_get_key(annot_xref, 'Subtype')[1] not in ('/Link', '/Popup'):
+            return True
+    return False
+
+def page_resources_source(doc, page_xref):
+    """Source of a page's (possibly inherited) /Resources entry, '' if it has none"""
+    seen = set()
+    xref = page_xref
+    while xref and xref not in seen:
+        seen.add(xref)
+        kind, value = doc.xref_get_key(xref, 'Resources')
+        if kind == 'xref':
+            return doc.xref_object(int(value.split()[0]), compressed=True)
+        if kind == 'dict':
+            return value
+        kind, value = doc.xref_get_key(xref, 'Parent')
+        xref = int(value.split()[0]) if kind == 'xref' else 0
+    return ''
+
+def _top_level_entries(source):
+    """
+    Entries of a dictionary object's source, {key without slash: value source}
+
+    Nested dictionaries and arrays are returned as their source text. Parsing
+    the source already fetched is much cheaper than an xref_get_key call per key.
+    """
+    entries = {}
+    if not source.startswith('<<'):
+        return entries
+    depth, key, value_start = 0, None, None
+    for match in _TOKEN_PATTERN.finditer(source):
+        token = match.group()
+        if token == '<<' or token == '[':
+            if depth == 1:
+                value_start = match.start()
+            depth += 1
+        elif token == '>>' or token == ']':
+            depth -= 1
+            if depth == 0:
+                break
+            if depth == 1:
+                if key is not None:
+                    entries[key] = source[value_start:match.end()]
+                key = None
+        elif depth == 1:
+            if key is None:
+                key = token[1:]
+            else:
+                entries[key] = token
+                key = None
+    return entries
+
+def build_resource_graph(doc):
+    """
+    Build the page -> resource graph for a document
+
+    One pass over the xref table records every object's size, kind and outgoing
+    references. Each page's resources are then everything reachable from its
+    /Resources and /Contents entries (nested form XObjects, font descriptors
+    and font programs included), without ever loading a page. Page entries
+    come from the page dictionaries read in that pass.
+
+    Args:
+        doc: Open fitz document
+
+    Returns:
+        dict: {
+            'page_count': int,
+            'xref_count': int (length of the per-object arrays below),
+            'indptr': int64 array (page_count + 1) - page i uses indices[indptr[i]:indptr[i + 1]],
+            'indices': int32 array of xrefs, sorted within each page,
+            'lengths': int64 array - bytes per object (stream data plus dictionary source),
+            'kinds': uint8 array - KIND_* code per object,
+            'annot_indptr', 'annot_indices': the same for each page's /Annots entries,
+            'masks': int32 array - images used as another image's /SMask or /Mask,
+            'descendant_fonts': int32 array - CID fonts under Type0 fonts
+        }
+    """
+    xref_count = doc.xref_length()
+    lengths = np.zeros(xref_count, dtype=np.int64)
+    kinds = np.full(xref_count, KIND_OTHER, dtype=np.uint8)
+    types, subtypes = {}, {}
+    children = [()] * xref_count
+    font_files, masks, descendant_fonts = [], [], []
+    tree_entries = {}  # Page and page tree node xref -> entries
+
+    # Single pass over the xref table
+    for xref in range(1, xref_count):
+        try:
+            source = doc.xref_object(xref, compressed=True)
+        except Exception:
+            continue  # Free or broken entry
+        entries = _top_level_entries(source)
+        obj_type = entries.get('Type', 'null')
+        subtype = entries.get('Subtype', 'null')
+        size = len(source)
+        if 'Length' in entries and doc.xref_is_stream(xref):
+            length = _refs(entries['Length'])
+            if length:
+                # Indirect length, e.g. "/Length 12 0 R"
+                try:
+                    size += int(doc.xref_object(length[0]).strip())
+                except Exception:
+                    pass
+            elif entries['Length'].isdigit():
+                size += int(entries['Length'])
+        lengths[xref] = size
+        types[xref] = obj_type
+        subtypes[xref] = subtype
+        if subtype == '/Image':
+            kinds[xref] = KIND_IMAGE
+            for key in ('SMask', 'Mask'):
+                masks.extend(_refs(entries.get(key, ''))[:1])
+        elif subtype == '/Form':
+            kinds[xref] = KIND_FORM
+        elif obj_type == '/Font':
+            kinds[xref] = KIND_FONT
+            if 'DescendantFonts' in entries:
+                descendant_fonts.append(entries['DescendantFonts'])
+        elif obj_type == '/FontDescriptor':
+            for key in ('FontFile', 'FontFile2', 'FontFile3'):
+                font_files.extend(_refs(entries.get(key, ''))[:1])
+        elif obj_type in ('/Page', '/Pages'):
+            tree_entries[xref] = entries
+        if obj_type not in _STOP_TYPES:
+            children[xref] = tuple(ref for ref in _refs(source) if 0 < ref < xref_count)
+    for xref in font_files:
+        if 0 < xref < xref_count:
+            kinds[xref] = KIND_FONT_FILE
+
+    def referenced(value):
+        """Xrefs in an entry value - a dictionary or array stored as its own object is looked through"""
+        refs = [ref for ref in _refs(value) if 0 < ref < xref_count]
+        if len(refs) == 1 and value.strip().endswith('R') and types.get(refs[0]) == 'null' and not doc.xref_is_stream(refs[0]):
+            return list(children[refs[0]])
+        return refs
+
+    def page_entry(page_xref, key, inherited=False):
+        """A page's entry, from the pass above (or looked up if the page wasn't typed /Page)"""
+        seen = set()
+        xref = page_xref
+        while xref and xref not in seen:
+            seen.add(xref)
+            entries = tree_entries.get(xref)
+            if entries is None:
+                kind, value = doc.xref_get_key(xref, key)
+                if kind != 'null' or not inherited:
+                    return value if kind != 'null' else ''
+                kind, value = doc.xref_get_key(xref, 'Parent')
+                xref = int(value.split()[0]) if kind == 'xref' else 0
+                continue
+            if key in entries or not inherited:
+                return entries.get(key, '')
+            parent = _refs(entries.get('Parent', ''))
+            xref = parent[0] if parent else 0
+        return ''
+
+    # Page rows: everything reachable from the page's resources and content streams
+    page_count = doc.page_count
+    indptr = np.zeros(page_count + 1, dtype=np.int64)
+    annot_indptr = np.zeros(page_count + 1, dtype=np.int64)
+    rows, annot_rows = [], []
+    for page_num in range(page_count):
+        page_xref = doc.page_xref(page_num)
+        contents = referenced(page_entry(page_xref, 'Contents'))
+        for xref in contents:
+            kinds[xref] = KIND_CONTENT
+
+        reached = set()
+        stack = contents + referenced(page_entry(page_xref, 'Resources', inherited=True))
+        while stack:
+            xref = stack.pop()
+            if xref in reached or types.get(xref) in _STOP_TYPES:
+                continue
+            reached.add(xref)
+            stack.extend(children[xref])
+        row = np.array(sorted(reached), dtype=np.int32)
+        rows.append(row)
+        indptr[page_num + 1] = indptr[page_num] + len(row)
+
+        annots = np.array(referenced(page_entry(page_xref, 'Annots')), dtype=np.int32)
+        annot_rows.append(annots)
+        annot_indptr[page_num + 1] = annot_indptr[page_num] + len(annots)
+
+    annot_indices = np.concatenate(annot_rows) if annot_rows else np.zeros(0, dtype=np.int32)
+    for xref in set(annot_indices.tolist()):
+        subtype = subtypes.get(xref)
+        if subtype == '/Widget':
+            kinds[xref] = KIND_WIDGET
+        elif subtype not in (None, 'null', '/Link', '/Popup'):
+            kinds[xref] = KIND_ANNOT
+
+    indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int32)
+    descendants = [ref for value in descendant_fonts for ref in referenced(value)]
+    logging.info(f"Built resource graph: {page_count} pages, {xref_count} objects, {len(indices)} page -> object links")
+    return {
+        'page_count': page_count,
+        'xref_count': xref_count,
+        'indptr': indptr,
+        'indices': indices,
+        'lengths': lengths,
+        'kinds': kinds,
+        'annot_indptr': annot_indptr,
+        'annot_indices': annot_indices,
+        'masks': np.array(sorted(set(ref for ref in masks if 0 < ref < xref_count)), dtype=np.int32),
+        'descendant_fonts': np.array(sorted(set(descendants)), dtype=np.int32),
+    }
+
+def get_resource_graph(doc, path=None):
+    """
+    Get the resource graph for a document, reusing a cached graph for the same file
+
+    A document with unsaved changes no longer matches its file, so its graph is
+    built from the document and not cached.
+
+    Args:
+        doc: Open fitz document
+        path (str): Path of the document on disk (defaults to doc.name)
+
+    Returns:
+        dict: Resource graph (see build_resource_graph) - treat the arrays as read-only
+    """
+    path = path or getattr(doc, 'name', None)
+    if not path or not os.path.exists(path) or doc.is_dirty:
+        # In-memory or modified documents can't be fingerprinted, so don't cache them
+        return build_resource_graph(doc)
+
+    key = file_fingerprint(path)
+    with _resource_graph_lock:
+        if key in _resource_graph_cache:
+            _resource_graph_cache.move_to_end(key)
+            logging.debug(f"Using cached resource graph for '{path}'")
+            return _resource_graph_cache[key]
+
+    graph = build_resource_graph(doc)
+    with _resource_graph_lock:
+        _resource_graph_cache[key] = graph
+        while len(_resource_graph_cache) > RESOURCE_GRAPH_CACHE_SIZE:
+            _resource_graph_cache.popitem(last=False)
+    return graph
+
+def page_xrefs(graph, page_num, kind=None):
+    """Xrefs used by a page (0-indexed), optionally only those of one KIND_* code"""
+    row = graph['indices'][graph['indptr'][page_num]:graph['indptr'][page_num + 1]]
+    if kind is not None:
+        row = row[graph['kinds'][row] == kind]
+    return row
+
+def xref_page_counts(graph):
+    """Number of pages using each object (int64 array indexed by xref)"""
+    return np.bincount(graph['indices'], minlength=graph['xref_count'])
+
+def page_weights(graph):
+    """
+    Estimate how many bytes each page contributes to the file
+
+    Each object's bytes are split evenly between the pages that use it, so
+    the weights add up to the size of all page content in the document.
+
+    Returns:
+        numpy.ndarray: Estimated bytes per page (float64, one entry per page)
+    """
+    indices = graph['indices']
+    counts = xref_page_counts(graph)
+    link_bytes = graph['lengths'][indices] / counts[indices]
+    page_of_link = np.repeat(np.arange(graph['page_count']), np.diff(graph['indptr']))
+    return np.bincount(page_of_link, weights=link_bytes, minlength=graph['page_count'])
+
+def pages_bytes(graph, page_numbers):
+    """
+    Bytes of all objects used by a set of pages, each object counted once
+
+    This is roughly the size of a file containing just those pages, e.g. an
+    extract or a split chunk.
+    """
+    used = np.concatenate([page_xrefs(graph, page_num) for page_num in page_numbers] or [np.zeros(0, dtype=np.int32)])
+    return int(graph['lengths'][np.unique(used)].sum())
+
+def shared_resources(graph, kind=None, min_pages=2):
+    """
+    Objects used by at least min_pages pages, largest first
+
+    Returns:
+        list: (xref, kind name, bytes, page count) tuples
+    """
+    counts = xref_page_counts(graph)
+    mask = counts >= min_pages
+    if kind is not None:
+        mask &= graph['kinds'] == kind
+    xrefs = np.nonzero(mask)[0]
+    xrefs = xrefs[np.argsort(-graph['lengths'][xrefs], kind='stable')]
+    return [(int(xref), KIND_NAMES[graph['kinds'][xref]], int(graph['lengths'][xref]), int(counts[xref])) for xref in xrefs]
+
+if __name__ == "__main__":
+    import argparse
+    import fitz  # PyMuPDF
+
+    parser = argparse.ArgumentParser(description='Show which resources the pages of a PDF use and share')
+    parser.add_argument('input_pdf', help='Path to the input PDF file')
+    parser.add_argument('--top', type=int, default=20, help='Number of largest shared resources to list')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_pdf):
+        logging.error(f"Input file '{args.input_pdf}' does not exist")
+        sys.exit(1)
+
+    doc = fitz.open(args.input_pdf)
+    graph = build_resource_graph(doc)
+    doc.close()
+
+    weights = page_weights(graph)
+    print(f"\nResource graph for: {args.input_pdf}")
+    print(f"{'='*60}")
+    print(f"Pages: {graph['page_count']}, objects: {graph['xref_count']:,}, page -> object links: {len(graph['indices']):,}")
+    for kind, name in enumerate(KIND_NAMES):
+        total = graph['lengths'][graph['kinds'] == kind].sum()
+        print(f"  {name:10} {np.count_nonzero(graph['kinds'] == kind):6,} objects {total/1024/1024:10.2f} MB")
+    heaviest = np.argsort(-weights)[:5]
+    print("\nHeaviest pages:")
+    for page_num in heaviest:
+        print(f"  Page {page_num + 1}: {weights[page_num]/1024/1024:.2f} MB")
+    shared = shared_resources(graph)[:args.top]
+    if shared:
+        print("\nLargest shared resources:")
+        for xref, kind, size, pages in shared:
+            print(f"  xref {xref} ({kind}): {size/1024:,.0f} KB on {pages} pages")
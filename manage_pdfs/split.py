@@ -1,11 +1,154 @@
 import fitz # PyMuPDF
 import os
 import sys
+import json
 import logging
+import re
 import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from manage_pdfs.fingerprint import file_sha256
+from manage_pdfs.page_index import get_page_index, plan_outline_chunks, plan_label_chunks
+from manage_pdfs.resource_graph import get_resource_graph, page_weights, pages_bytes
+from manage_pdfs.blank_pages import find_blank_pages, blank_page_entries
 
 logging.basicConfig(level=logging.INFO)
 
+# Bump when the manifest layout changes so old manifests are treated as stale
+MANIFEST_VERSION = 1
+
+def get_manifest_path(output_dir, base_name):
+    """Path of the split manifest for a given input file name"""
+    return os.path.join(output_dir, f".{base_name}.split.json")
+
+def load_split_manifest(manifest_path):
+    """Load a split manifest, returning None if it is missing or unreadable"""
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable split manifest '{manifest_path}': {e}")
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        logging.warning(f"Ignoring split manifest '{manifest_path}' with unsupported version {manifest.get('version')}")
+        return None
+    return manifest
+
+def save_split_manifest(manifest_path, manifest):
+    """Write the split manifest atomically (write temp file, then rename)"""
+    tmp_path = manifest_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def chunk_is_valid(out_path, entry):
+    """Check that a finished chunk on disk still matches its manifest entry"""
+    if not entry or not entry.get('sha256'):
+        return False
+    if not os.path.exists(out_path) or os.path.getsize(out_path) != entry.get('size'):
+        return False
+    return file_sha256(out_path) == entry['sha256']
+
+def save_chunk_atomic(new_doc, out_path):
+    """
+    Save a chunk document so that out_path only ever holds a complete file
+
+    The chunk is written to '<out_path>.part' and renamed into place once the
+    save has finished, so a crash mid-save never leaves a truncated chunk
+    under the final name.
+
+    Returns:
+        tuple: (file size in bytes, SHA-256 hex digest) of the saved chunk
+    """
+    part_path = out_path + '.part'
+    # Save with deduplication to prevent image bloat
+    # garbage=4 removes duplicate objects without changing image quality
+    # This is key to preventing the size explosion while preserving content
+    new_doc.save(part_path, garbage=4, deflate=True, clean=True)
+    os.replace(part_path, out_path)
+    return os.path.getsize(out_path), file_sha256(out_path)
+
+def build_split_manifest(input_pdf, input_hash, total_pages, params, chunk_files, chunks):
+    """Create a fresh manifest describing the planned chunks (none finished yet)"""
+    return {
+        'version': MANIFEST_VERSION,
+        'input': {
+            'name': os.path.basename(input_pdf),
+            'sha256': input_hash,
+            'pages': total_pages,
+        },
+        'params': params,
+        'chunks': [
+            {
+                'index': idx,
+                'file': fname,
+                'first_page': page_range.start + 1,
+                'last_page': page_range.stop,
+                'size': None,
+                'sha256': None,
+                'optimized': False,
+            }
+            for idx, (fname, page_range) in enumerate(zip(chunk_files, chunks), 1)
+        ],
+    }
+
+def reconcile_split_manifest(previous, manifest, output_dir):
+    """
+    Carry finished chunks over from a previous manifest when it describes the same split
+
+    The previous run is only reused if the input hash, the chunking parameters
+    and every chunk's file name and page range are identical. Otherwise its
+    chunk files are stale and are removed so they can't end up in the output.
+
+    Returns:
+        bool: True if the previous manifest was reused
+    """
+    def layout(m):
+        return [(c['file'], c['first_page'], c['last_page']) for c in m['chunks']]
+
+    if (previous['input'].get('sha256') == manifest['input']['sha256']
+            and previous.get('params') == manifest['params']
+            and layout(previous) == layout(manifest)):
+        for old_entry, entry in zip(previous['chunks'], manifest['chunks']):
+            entry['size'] = old_entry.get('size')
+            entry['sha256'] = old_entry.get('sha256')
+            entry['optimized'] = old_entry.get('optimized', False)
+        return True
+
+    logging.warning("Existing split manifest does not match this input or these chunking parameters - regenerating all chunks")
+    for old_entry in previous['chunks']:
+        stale_path = os.path.join(output_dir, old_entry['file'])
+        if os.path.exists(stale_path):
+            try:
+                os.unlink(stale_path)
+                logging.info(f"Removed stale chunk '{stale_path}'")
+            except OSError as e:
+                logging.warning(f"Could not remove stale chunk '{stale_path}': {e}")
+    return False
+
+def optimize_chunk(chunk_path, aggressive=True):
+    """
+    Run the optimize pipeline on a finished chunk in place (runs in a worker process)
+
+    The optimized file only replaces the chunk if it is smaller.
+
+    Returns:
+        tuple: (original size, final size, sha256 of the final file)
+    """
+    from manage_pdfs.optimize import optimize_pdf
+
+    original_size = os.path.getsize(chunk_path)
+    tmp_path = chunk_path + '.opt.part'
+    try:
+        if optimize_pdf(chunk_path, tmp_path, aggressive=aggressive) and os.path.getsize(tmp_path) < original_size:
+            os.replace(tmp_path, chunk_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    return original_size, os.path.getsize(chunk_path), file_sha256(chunk_path)
+
 def create_size_based_chunks(doc, max_chunk_size_mb):
     """Create page ranges based on estimated file size using fast calculation"""
     max_chunk_bytes = max_chunk_size_mb * 1024 * 1024
@@ -44,24 +187,239 @@ def create_size_based_chunks(doc, max_chunk_size_mb):
     
     return chunks
 
-def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max_chunk_size_mb=None, no_overwrite=False, progress_callback=None, cancellation_checker=None):
-    """Split PDF with progress tracking"""
+def linear_partition(weights, num_parts):
+    """
+    Split a sequence of weights into num_parts contiguous runs minimizing the largest run total
+
+    Classic linear-partition dynamic program: cost[k][j] is the smallest possible
+    maximum run total when the first j items are split into k runs. The inner
+    minimisation over the last split point is vectorized with numpy, so the
+    whole table costs O(num_parts * n) numpy operations.
+
+    Args:
+        weights: Sequence of non-negative weights (one per page)
+        num_parts (int): Number of runs (clamped to the number of items)
+
+    Returns:
+        list: Page ranges, one per run, covering all items in order
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    n = len(weights)
+    num_parts = max(1, min(num_parts, n))
+    prefix = np.concatenate(([0.0], np.cumsum(weights)))
+    
+    # cost[j] for the current k; split_at[k][j] remembers the best last split point
+    cost = prefix.copy()  # k = 1: everything in one run
+    split_at = np.zeros((num_parts + 1, n + 1), dtype=np.int64)
+    for k in range(2, num_parts + 1):
+        new_cost = np.full(n + 1, np.inf)
+        for j in range(k, n + 1):
+            # Last run is items i..j-1 for i in [k-1, j-1]
+            candidates = np.maximum(cost[k - 1:j], prefix[j] - prefix[k - 1:j])
+            best = int(np.argmin(candidates))
+            new_cost[j] = candidates[best]
+            split_at[k][j] = best + k - 1
+        cost = new_cost
+    
+    # Walk the split points back from the end
+    bounds = [n]
+    for k in range(num_parts, 1, -1):
+        bounds.append(int(split_at[k][bounds[-1]]))
+    bounds.append(0)
+    bounds.reverse()
+    return [range(bounds[i], bounds[i + 1]) for i in range(num_parts)]
+
+def create_balanced_chunks(doc, target_chunks):
+    """
+    Create exactly target_chunks contiguous page ranges of about equal size
+
+    Uses per-page byte weights and a linear-partition dynamic program so the
+    largest chunk is as small as possible. Each chunk's estimate counts every
+    object its pages use once (see resource_graph.pages_bytes), so resources
+    shared with other chunks are included in full, as they are in the file.
+
+    Returns:
+        tuple: (list of page ranges, list of estimated bytes per chunk)
+    """
+    graph = get_resource_graph(doc)
+    weights = page_weights(graph)
+    
+    # Scale the weights so chunk estimates are in terms of the actual file size
+    try:
+        file_size = os.path.getsize(doc.name) if doc.name and os.path.exists(doc.name) else 0
+    except OSError:
+        file_size = 0
+    total_weight = weights.sum()
+    scale = file_size / total_weight if file_size and total_weight > 0 else 1.0
+    
+    chunks = linear_partition(weights * scale, target_chunks)
+    chunk_bytes = [int(pages_bytes(graph, page_range) * scale) for page_range in chunks]
+    for idx, (page_range, size) in enumerate(zip(chunks, chunk_bytes), 1):
+        logging.info(f"Planned chunk {idx}: pages {page_range.start+1}-{page_range.stop} (~{size/1024/1024:.1f}MB estimated)")
+    return chunks, chunk_bytes
+
+def validate_split_options(max_pages_per_chunk=None, max_chunk_size_mb=None, outline_level=None, split_by_labels=False, target_chunks=None):
+    """
+    Check the chunking options for a split
+
+    Returns:
+        str: Error message, or None if the options are valid
+    """
+    if max_pages_per_chunk is None and max_chunk_size_mb is None and outline_level is None and not split_by_labels and target_chunks is None:
+        return "One of max_pages_per_chunk, max_chunk_size_mb, outline_level, split_by_labels or target_chunks must be specified."
+    if max_pages_per_chunk is not None and (not isinstance(max_pages_per_chunk, int) or max_pages_per_chunk < 1):
+        return "max_pages_per_chunk must be a positive integer."
+    if max_chunk_size_mb is not None and (not isinstance(max_chunk_size_mb, (int, float)) or max_chunk_size_mb <= 0):
+        return "max_chunk_size_mb must be a positive number."
+    if outline_level is not None and (not isinstance(outline_level, int) or outline_level < 1):
+        return "outline_level must be a positive integer."
+    if target_chunks is not None and (not isinstance(target_chunks, int) or target_chunks < 2):
+        return "target_chunks must be an integer of at least 2."
+    return None
+
+def plan_split(input_pdf, max_pages_per_chunk=None, max_chunk_size_mb=None, outline_level=None, split_by_labels=False, target_chunks=None):
+    """
+    Dry run of a split: plan the chunks and estimate their sizes without writing anything
+
+    Uses the same chunk planning as split_pdf_with_progress. Estimates use the
+    average page size (file size / page count), except for balanced splits which
+    already have per-page weights. Only the document catalog is read for the
+    page, size, bookmark and label methods, so planning takes milliseconds.
+
+    Returns:
+        dict: {
+            'input': input file name,
+            'total_pages': int,
+            'file_size': input size in bytes,
+            'chunks': [{'index', 'file', 'title', 'first_page', 'last_page', 'pages', 'estimated_bytes'}, ...]
+        }
+        or None if the input is missing or the options are invalid
+    """
     if not os.path.exists(input_pdf):
         logging.error(f"Input file '{input_pdf}' does not exist.")
         return None
-    if not os.path.isdir(output_dir):
-        logging.error(f"Output directory '{output_dir}' does not exist.")
+    error = validate_split_options(max_pages_per_chunk, max_chunk_size_mb, outline_level, split_by_labels, target_chunks)
+    if error:
+        logging.error(error)
         return None
-    if max_pages_per_chunk is None and max_chunk_size_mb is None:
-        logging.error("Either max_pages_per_chunk or max_chunk_size_mb must be specified.")
+    
+    file_size = os.path.getsize(input_pdf)
+    doc = fitz.open(input_pdf)
+    try:
+        total_pages = doc.page_count
+        if target_chunks is not None:
+            chunks, chunk_bytes = create_balanced_chunks(doc, target_chunks)
+            titles = None
+        else:
+            chunks, titles = plan_split_chunks(doc, input_pdf, max_pages_per_chunk=max_pages_per_chunk,
+                                               max_chunk_size_mb=max_chunk_size_mb, outline_level=outline_level,
+                                               split_by_labels=split_by_labels)
+            avg_page_size = file_size / total_pages if total_pages else 0
+            chunk_bytes = [int(len(page_range) * avg_page_size) for page_range in chunks]
+    finally:
+        doc.close()
+    
+    base_name = os.path.basename(input_pdf)
+    padding_width = len(str(len(chunks)))
+    return {
+        'input': base_name,
+        'total_pages': total_pages,
+        'file_size': file_size,
+        'chunks': [
+            {
+                'index': idx,
+                'file': chunk_filename(idx, padding_width, base_name, titles[idx - 1] if titles else None),
+                'title': titles[idx - 1] if titles else None,
+                'first_page': page_range.start + 1,
+                'last_page': page_range.stop,
+                'pages': len(page_range),
+                'estimated_bytes': size,
+            }
+            for idx, (page_range, size) in enumerate(zip(chunks, chunk_bytes), 1)
+        ],
+    }
+
+def plan_split_chunks(doc, input_pdf, max_pages_per_chunk=None, max_chunk_size_mb=None, outline_level=None, split_by_labels=False, target_chunks=None):
+    """
+    Plan the page ranges for a split using whichever chunking method was requested
+
+    Returns:
+        tuple: (list of page ranges, list of chunk titles or None when chunks are untitled)
+    """
+    total_pages = doc.page_count
+    if max_pages_per_chunk is not None:
+        # Page-based chunking (original method)
+        logging.info(f"Using page-based chunking: {max_pages_per_chunk} pages per chunk")
+        return [range(i, min(i+max_pages_per_chunk, total_pages)) for i in range(0, total_pages, max_pages_per_chunk)], None
+    if max_chunk_size_mb is not None:
+        # Size-based chunking (new method)
+        logging.info(f"Using size-based chunking: ~{max_chunk_size_mb}MB per chunk")
+        return create_size_based_chunks(doc, max_chunk_size_mb), None
+    if target_chunks is not None:
+        logging.info(f"Using balanced chunking: {target_chunks} chunks of about equal size")
+        return create_balanced_chunks(doc, target_chunks)[0], None
+    index = get_page_index(doc, input_pdf)
+    if outline_level is not None:
+        logging.info(f"Using outline-based chunking: bookmark level {outline_level}")
+        return plan_outline_chunks(index, outline_level)
+    logging.info("Using page label chunking: new chunk at each label prefix change")
+    return plan_label_chunks(index)
+
+def chunk_filename(idx, padding_width, base_name, title=None):
+    """File name for a chunk, e.g. '03_input.pdf' or '03_Structural_input.pdf' for titled chunks"""
+    # Zero-pad the index for proper sorting
+    padded_idx = str(idx).zfill(padding_width)
+    safe_title = re.sub(r'[^\w\-]+', '_', title).strip('_')[:60] if title else ''
+    if safe_title:
+        return f"{padded_idx}_{safe_title}_{base_name}"
+    return f"{padded_idx}_{base_name}"
+
+def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max_chunk_size_mb=None, no_overwrite=False, progress_callback=None, cancellation_checker=None, outline_level=None, split_by_labels=False, target_chunks=None, chunk_callback=None, optimize_chunks=False, optimize_workers=None, optimize_callback=None, remove_blank=False, blank_report=None):
+    """
+    Split PDF with progress tracking
+
+    Every run writes a manifest ('.<input name>.split.json' in output_dir) recording
+    the input hash, the chunking parameters, each chunk's page range and the hash
+    of each finished chunk. With no_overwrite=True the split resumes from that
+    manifest: only chunks that are missing or whose file no longer matches its
+    recorded hash are regenerated. If the input or the parameters changed, all
+    chunks are regenerated.
+
+    Besides max pages / max MB, chunks can follow the document structure:
+    outline_level=N starts a new chunk at every bookmark of level N or
+    shallower, and split_by_labels=True starts one wherever the page label
+    prefix changes (e.g. A-101 -> S-001). Those chunks are named after the
+    bookmark title or label prefix. target_chunks=N splits into exactly N
+    contiguous chunks of about equal size (see create_balanced_chunks).
+
+    chunk_callback, if given, is called with a chunk's manifest entry (index,
+    file, first_page, last_page, size, sha256) as soon as that chunk is on disk,
+    including chunks reused from a previous run, so callers can hand out
+    finished chunks while later ones are still being written.
+
+    With optimize_chunks=True every chunk is run through the optimize pipeline
+    (see optimize_chunk) in a pool of optimize_workers processes as soon as it
+    is saved, while the next chunks are being created. optimize_callback
+    (chunks_optimized, total_chunks, message) reports that phase and can return
+    False to cancel; chunk_callback then fires once a chunk is optimized.
+
+    With remove_blank=True blank pages (see blank_pages) are left out of the
+    chunks - chunk page ranges are planned on the full document, so file names
+    and titles don't change - and a chunk with only blank pages isn't written.
+    One entry per dropped page is appended to blank_report if a list is given.
+    """
+    if not os.path.exists(input_pdf):
+        logging.error(f"Input file '{input_pdf}' does not exist.")
         return None
-    if max_pages_per_chunk is not None and (not isinstance(max_pages_per_chunk, int) or max_pages_per_chunk < 1):
-        logging.error("max_pages_per_chunk must be a positive integer.")
+    if not os.path.isdir(output_dir):
+        logging.error(f"Output directory '{output_dir}' does not exist.")
         return None
-    if max_chunk_size_mb is not None and (not isinstance(max_chunk_size_mb, (int, float)) or max_chunk_size_mb <= 0):
-        logging.error("max_chunk_size_mb must be a positive number.")
+    error = validate_split_options(max_pages_per_chunk, max_chunk_size_mb, outline_level, split_by_labels, target_chunks)
+    if error:
+        logging.error(error)
         return None
     
+    executor = None
     try:
         doc = fitz.open(input_pdf)
         # Log original file size
@@ -73,6 +431,9 @@ def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max
         if max_pages_per_chunk is not None and total_pages <= max_pages_per_chunk:
             logging.warning(f"PDF has only {total_pages} pages, less than or equal to max_pages_per_chunk ({max_pages_per_chunk}). No split performed.")
             return None
+        if target_chunks is not None and total_pages < 2:
+            logging.warning("PDF has only 1 page. No split performed.")
+            return None
             
         base_name = os.path.basename(input_pdf)
         
@@ -84,18 +445,54 @@ def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max
                 return None
         
         # Create chunks based on the specified method
-        if max_pages_per_chunk is not None:
-            # Page-based chunking (original method)
-            chunks = [range(i, min(i+max_pages_per_chunk, total_pages)) for i in range(0, total_pages, max_pages_per_chunk)]
-            logging.info(f"Using page-based chunking: {max_pages_per_chunk} pages per chunk")
-        else:
-            # Size-based chunking (new method)
-            chunks = create_size_based_chunks(doc, max_chunk_size_mb)
-            logging.info(f"Using size-based chunking: ~{max_chunk_size_mb}MB per chunk")
+        chunks, titles = plan_split_chunks(doc, input_pdf, max_pages_per_chunk=max_pages_per_chunk,
+                                           max_chunk_size_mb=max_chunk_size_mb, outline_level=outline_level,
+                                           split_by_labels=split_by_labels, target_chunks=target_chunks)
+        if not chunks:
+            logging.warning("PDF has no bookmarks or page labels to split on. No split performed.")
+            doc.close()
+            return None
+        
+        blank_pages = set()
+        if remove_blank:
+            def blank_progress(current_page, total, percentage, message):
+                return progress_callback(current_page, total, 0, 0, message) if progress_callback else True
+            results = find_blank_pages(doc, progress_callback=blank_progress, cancellation_checker=cancellation_checker)
+            if results is None:
+                logging.info("Split operation cancelled while checking for blank pages")
+                doc.close()
+                return None
+            blank_entries = blank_page_entries(results)
+            blank_pages = {entry['page'] - 1 for entry in blank_entries}
+            if blank_report is not None:
+                blank_report.extend(blank_entries)
         
         total_chunks = len(chunks)
         current_page_count = 0
         
+        # Calculate padding width based on total number of chunks
+        padding_width = len(str(len(chunks)))
+        chunk_files = [chunk_filename(idx, padding_width, base_name, titles[idx - 1] if titles else None)
+                       for idx in range(1, total_chunks + 1)]
+        
+        # Build the manifest for this run and reuse finished chunks from a matching previous run
+        params = {
+            'max_pages_per_chunk': max_pages_per_chunk,
+            'max_chunk_size_mb': max_chunk_size_mb,
+            'outline_level': outline_level,
+            'split_by_labels': split_by_labels,
+            'target_chunks': target_chunks,
+            'remove_blank': remove_blank,
+            'optimize_chunks': optimize_chunks,
+        }
+        manifest_path = get_manifest_path(output_dir, base_name)
+        manifest = build_split_manifest(input_pdf, file_sha256(input_pdf), total_pages, params, chunk_files, chunks)
+        if no_overwrite:
+            previous = load_split_manifest(manifest_path)
+            if previous is not None and reconcile_split_manifest(previous, manifest, output_dir):
+                logging.info(f"Resuming split from manifest '{manifest_path}'")
+        save_split_manifest(manifest_path, manifest)
+        
         # Initial progress callback
         if progress_callback:
             if not progress_callback(0, total_pages, 0, total_chunks, "Starting PDF split..."):
@@ -103,8 +500,61 @@ def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max
                 doc.close()
                 return None
         
-        # Calculate padding width based on total number of chunks
-        padding_width = len(str(len(chunks)))
+        # Optional optimize phase - chunks are optimized in worker processes while the next ones are created
+        pending = {}  # optimize future -> chunk index
+        chunks_optimized = 0
+        if optimize_chunks:
+            executor = ProcessPoolExecutor(max_workers=optimize_workers)
+        
+        def chunk_ready(idx, out_path):
+            """Hand a saved chunk to the optimize pool, or report it as ready straight away"""
+            entry = manifest['chunks'][idx - 1]
+            if executor and not entry.get('optimized'):
+                try:
+                    pending[executor.submit(optimize_chunk, out_path)] = idx
+                    return
+                except Exception as e:
+                    # e.g. the pool broke when a worker died - keep the chunk as saved
+                    logging.warning(f"Could not optimize chunk {idx}, keeping it unoptimized: {e}")
+            if chunk_callback:
+                chunk_callback(dict(entry))
+        
+        def collect_optimized(wait_all=False):
+            """Record chunks whose optimization finished; returns False if the operation was cancelled"""
+            nonlocal chunks_optimized
+            while pending:
+                done, _ = wait(list(pending), timeout=0.25 if wait_all else 0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = pending.pop(future)
+                    entry = manifest['chunks'][idx - 1]
+                    try:
+                        original_bytes, optimized_bytes, chunk_hash = future.result()
+                    except Exception as e:
+                        # One chunk failing to optimize doesn't fail the split - the saved chunk is kept as it is
+                        logging.warning(f"Could not optimize chunk {idx}, keeping it unoptimized: {e}")
+                        chunk_path = os.path.join(output_dir, entry['file'])
+                        original_bytes = optimized_bytes = os.path.getsize(chunk_path)
+                        chunk_hash = file_sha256(chunk_path)
+                        message = f"Kept chunk {idx} unoptimized ({original_bytes/1024:,.0f} KB)"
+                    else:
+                        entry['optimized'] = True
+                        logging.info(f"Optimized chunk {idx}: {original_bytes/1024:,.0f} KB -> {optimized_bytes/1024:,.0f} KB")
+                        message = f"Optimized chunk {idx} ({original_bytes/1024:,.0f} KB -> {optimized_bytes/1024:,.0f} KB)"
+                    entry['size'] = optimized_bytes
+                    entry['sha256'] = chunk_hash
+                    save_split_manifest(manifest_path, manifest)
+                    chunks_optimized += 1
+                    if chunk_callback:
+                        chunk_callback(dict(entry))
+                    if optimize_callback:
+                        if not optimize_callback(chunks_optimized, total_chunks, message):
+                            return False
+                if cancellation_checker and cancellation_checker():
+                    return False
+                if not wait_all:
+                    break
+            return True
+        
         chunks_completed = 0  # Track completed chunks separately
         for idx, page_range in enumerate(chunks, 1):
             # Fast cancellation check at start of each chunk
@@ -116,23 +566,36 @@ def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max
                     pass  # Ignore errors during cancellation cleanup
                 return None
             
-            # Zero-pad the index for proper sorting
-            padded_idx = str(idx).zfill(padding_width)
-            out_path = os.path.join(output_dir, f"{padded_idx}_{base_name}")
+            entry = manifest['chunks'][idx - 1]
+            out_path = os.path.join(output_dir, entry['file'])
             
-            # Check if file already exists and no-overwrite is enabled
-            if no_overwrite and os.path.exists(out_path):
-                file_size = os.path.getsize(out_path)
-                logging.info(f"Skipping chunk {idx}: {out_path} already exists ({file_size/1024:,} KB)")
+            # Skip chunks the manifest says are finished, as long as the file still matches its hash
+            if no_overwrite and chunk_is_valid(out_path, entry):
+                logging.info(f"Skipping chunk {idx}: {out_path} already complete ({entry['size']/1024:,} KB)")
                 current_page_count += len(page_range)
                 chunks_completed += 1
+                if entry.get('optimized'):
+                    chunks_optimized += 1
+                chunk_ready(idx, out_path)
                 if progress_callback:
-                    if not progress_callback(current_page_count, total_pages, chunks_completed, total_chunks, f"Skipped chunk {idx} (already exists)"):
+                    if not progress_callback(current_page_count, total_pages, chunks_completed, total_chunks, f"Skipped chunk {idx} (already complete)"):
                         logging.info("Split operation cancelled while processing skipped chunks")
                         doc.close()
                         return None
                 continue
             
+            # A chunk made only of blank pages has nothing to write
+            if blank_pages and all(page_num in blank_pages for page_num in page_range):
+                logging.info(f"Skipping chunk {idx}: all {len(page_range)} pages are blank")
+                current_page_count += len(page_range)
+                chunks_completed += 1
+                if progress_callback:
+                    if not progress_callback(current_page_count, total_pages, chunks_completed, total_chunks, f"Skipped chunk {idx} (only blank pages)"):
+                        logging.info("Split operation cancelled while skipping blank chunks")
+                        doc.close()
+                        return None
+                continue
+            
             new_doc = fitz.open()
             
             # Progress callback for starting this chunk
@@ -158,6 +621,11 @@ def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max
                         pass  # Ignore errors during cancellation cleanup
                     return None
                 
+                if page_num in blank_pages:
+                    logging.debug(f"Leaving blank page {page_num + 1} out of chunk {idx}")
+                    current_page_count += 1
+                    continue
+                
                 logging.debug(f"Inserting page {page_num + 1} into chunk {idx}")
                 
                 # Insert each page individually to minimize cross-page image duplication
@@ -198,19 +666,25 @@ def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max
                 # Add a small delay to ensure this callback gets processed before the next one
                 time.sleep(0.1)  # 100ms delay to ensure frontend can poll this state
             
-            # Save with deduplication to prevent image bloat
-            # garbage=4 removes duplicate objects without changing image quality
-            # This is key to preventing the size explosion while preserving content
-            new_doc.save(out_path, garbage=4, deflate=True, clean=True)
+            file_size, chunk_hash = save_chunk_atomic(new_doc, out_path)
             
             new_doc.close()
             
+            # Record the finished chunk so a resumed split can trust it
+            entry['size'] = file_size
+            entry['sha256'] = chunk_hash
+            save_split_manifest(manifest_path, manifest)
+            
             # Log file size for monitoring
-            file_size = os.path.getsize(out_path)
             logging.info(f"Saved chunk {idx}: {out_path} ({len(page_range)} pages, {file_size/1024:,} KB)")
             
             # Increment chunks completed AFTER successful save
             chunks_completed += 1
+            chunk_ready(idx, out_path)
+            if not collect_optimized():
+                logging.info("Split operation cancelled while optimizing chunks")
+                doc.close()
+                return None
             
             # Progress callback for completed chunk - now this chunk is complete
             if progress_callback:
@@ -222,6 +696,16 @@ def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max
         
         doc.close()
         
+        # Wait for the chunks still being optimized
+        if pending:
+            logging.info(f"Waiting for {len(pending)} chunks to finish optimizing")
+            if optimize_callback and not optimize_callback(chunks_optimized, total_chunks, f"Optimizing {len(pending)} remaining chunks..."):
+                logging.info("Split operation cancelled while optimizing chunks")
+                return None
+            if not collect_optimized(wait_all=True):
+                logging.info("Split operation cancelled while optimizing chunks")
+                return None
+        
         # Final progress callback
         if progress_callback:
             if not progress_callback(total_pages, total_pages, chunks_completed, total_chunks, "Split complete!"):
@@ -234,88 +718,28 @@ def split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=None, max
         if progress_callback:
             progress_callback(0, 0, 0, 0, f"Error: {str(e)}")
         return None
+    finally:
+        if executor:
+            # Drop queued optimizations if we stopped early, and wait for the running ones so
+            # no worker is still rewriting a chunk when the manifest is written for a resume
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            finished = [(future, idx) for future, idx in pending.items()
+                        if not future.cancelled() and future.exception() is None]
+            for future, idx in finished:
+                _, optimized_bytes, chunk_hash = future.result()
+                manifest['chunks'][idx - 1].update(size=optimized_bytes, sha256=chunk_hash, optimized=True)
+            if finished:
+                save_split_manifest(manifest_path, manifest)
 
-def split_pdf(input_pdf, output_dir, max_pages_per_chunk=None, max_chunk_size_mb=None, no_overwrite=False):
-    if not os.path.exists(input_pdf):
-        logging.error(f"Input file '{input_pdf}' does not exist.")
-        return None
-    if not os.path.isdir(output_dir):
-        logging.error(f"Output directory '{output_dir}' does not exist.")
-        return None
-    if max_pages_per_chunk is None and max_chunk_size_mb is None:
-        logging.error("Either max_pages_per_chunk or max_chunk_size_mb must be specified.")
-        return None
-    if max_pages_per_chunk is not None and (not isinstance(max_pages_per_chunk, int) or max_pages_per_chunk < 1):
-        logging.error("max_pages_per_chunk must be a positive integer.")
-        return None
-    if max_chunk_size_mb is not None and (not isinstance(max_chunk_size_mb, (int, float)) or max_chunk_size_mb <= 0):
-        logging.error("max_chunk_size_mb must be a positive number.")
-        return None
-    try:
-        doc = fitz.open(input_pdf)
-        # Log original file size
-        original_size = os.path.getsize(input_pdf) / 1024
-        logging.info(f"Opened PDF '{input_pdf}' with {doc.page_count} pages ({original_size:,} KB)")
-        total_pages = doc.page_count
-        
-        # Only check page count limit when using page-based splitting
-        if max_pages_per_chunk is not None and total_pages <= max_pages_per_chunk:
-            logging.warning(f"PDF has only {total_pages} pages, less than or equal to max_pages_per_chunk ({max_pages_per_chunk}). No split performed.")
-            return None
-            
-        base_name = os.path.basename(input_pdf)
-        
-        # Create chunks based on the specified method
-        if max_pages_per_chunk is not None:
-            # Page-based chunking (original method)
-            chunks = [range(i, min(i+max_pages_per_chunk, total_pages)) for i in range(0, total_pages, max_pages_per_chunk)]
-            logging.info(f"Using page-based chunking: {max_pages_per_chunk} pages per chunk")
-        else:
-            # Size-based chunking (new method)
-            chunks = create_size_based_chunks(doc, max_chunk_size_mb)
-            logging.info(f"Using size-based chunking: ~{max_chunk_size_mb}MB per chunk")
-        
-        # Calculate padding width based on total number of chunks
-        padding_width = len(str(len(chunks)))
-        for idx, page_range in enumerate(chunks, 1):
-            # Zero-pad the index for proper sorting
-            padded_idx = str(idx).zfill(padding_width)
-            out_path = os.path.join(output_dir, f"{padded_idx}_{base_name}")
-            
-            # Check if file already exists and no-overwrite is enabled
-            if no_overwrite and os.path.exists(out_path):
-                file_size = os.path.getsize(out_path)
-                logging.info(f"Skipping chunk {idx}: {out_path} already exists ({file_size/1024:,} KB)")
-                continue
-            
-            new_doc = fitz.open()
-            
-            # Insert pages one at a time to better control image duplication
-            # This preserves links and annotations while minimizing duplication
-            for page_num in page_range:
-                logging.debug(f"Inserting page {page_num + 1} into chunk {idx}")
-                # Insert each page individually to minimize cross-page image duplication
-                new_doc.insert_pdf(doc, from_page=page_num, to_page=page_num, 
-                                 links=True, annots=True)
-            
-            # Skip image analysis - it's too slow for large embedded images
-            logging.debug(f"Completed inserting all pages for chunk {idx}")
-            
-            # Save with deduplication to prevent image bloat
-            # garbage=4 removes duplicate objects without changing image quality
-            # This is key to preventing the size explosion while preserving content
-            new_doc.save(out_path, garbage=4, deflate=True, clean=True)
-            
-            new_doc.close()
-            
-            # Log file size for monitoring
-            file_size = os.path.getsize(out_path)
-            logging.info(f"Saved chunk {idx}: {out_path} ({len(page_range)} pages, {file_size/1024:,} KB)")
-        doc.close()
-        return True
-    except Exception as e:
-        logging.error(f"Error splitting PDF: {e}")
-        return None
+def split_pdf(input_pdf, output_dir, max_pages_per_chunk=None, max_chunk_size_mb=None, no_overwrite=False, outline_level=None, split_by_labels=False, target_chunks=None, optimize_chunks=False, remove_blank=False):
+    """Split PDF without progress tracking (see split_pdf_with_progress)"""
+    return split_pdf_with_progress(input_pdf, output_dir, max_pages_per_chunk=max_pages_per_chunk,
+                                   max_chunk_size_mb=max_chunk_size_mb, no_overwrite=no_overwrite,
+                                   outline_level=outline_level, split_by_labels=split_by_labels,
+                                   target_chunks=target_chunks, optimize_chunks=optimize_chunks,
+                                   remove_blank=remove_blank)
 
 if __name__ == "__main__":
     import argparse
@@ -328,20 +752,52 @@ if __name__ == "__main__":
     chunking_group = parser.add_mutually_exclusive_group(required=True)
     chunking_group.add_argument('--pages', type=int, help='Maximum number of pages per chunk')
     chunking_group.add_argument('--max-size', type=float, help='Maximum size per chunk in MB')
+    chunking_group.add_argument('--outline-level', type=int, help='Start a new chunk at each bookmark of this level (1 = top level)')
+    chunking_group.add_argument('--labels', action='store_true', help='Start a new chunk wherever the page label prefix changes (e.g. A-101 -> S-001)')
+    chunking_group.add_argument('--balanced', type=int, metavar='N', help='Split into exactly N chunks of about equal size')
+    
+    parser.add_argument('--plan-only', action='store_true',
+                       help='Only print the planned chunks and their estimated sizes, without writing anything')
     
     parser.add_argument('--no-overwrite', action='store_true', 
-                       help='Skip processing if output files already exist (checkpoint/resume mode)')
+                       help='Resume from the split manifest, regenerating only missing or invalid chunks')
+    
+    parser.add_argument('--optimize', action='store_true',
+                       help='Optimize each chunk (in parallel) as soon as it is written')
+    
+    parser.add_argument('--remove-blank', action='store_true',
+                       help='Leave blank pages out of the chunks')
     
     args = parser.parse_args()
     
+    split_options = {
+        'max_pages_per_chunk': args.pages,
+        'max_chunk_size_mb': args.max_size,
+        'outline_level': args.outline_level,
+        'split_by_labels': args.labels,
+        'target_chunks': args.balanced,
+    }
+    
+    if args.plan_only:
+        plan = plan_split(args.input_pdf, **split_options)
+        if not plan:
+            sys.exit(1)
+        print(f"Split plan for {plan['input']} ({plan['total_pages']} pages, {plan['file_size']/1024/1024:.1f}MB):")
+        for chunk in plan['chunks']:
+            print(f"  {chunk['file']}: pages {chunk['first_page']}-{chunk['last_page']} (~{chunk['estimated_bytes']/1024/1024:.1f}MB)")
+        sys.exit(0)
+    
     if args.no_overwrite:
-        print("No-overwrite mode enabled - will skip existing chunks")
+        print("No-overwrite mode enabled - will skip chunks already completed")
     
     if args.pages:
         print(f"Starting PDF split: {args.pages} pages per chunk")
-        split_pdf(args.input_pdf, args.output_dir, max_pages_per_chunk=args.pages, 
-                 no_overwrite=args.no_overwrite)
     elif args.max_size:
         print(f"Starting PDF split: {args.max_size}MB per chunk (size-based)")
-        split_pdf(args.input_pdf, args.output_dir, max_chunk_size_mb=args.max_size, 
-                 no_overwrite=args.no_overwrite)
+    elif args.outline_level:
+        print(f"Starting PDF split: at level {args.outline_level} bookmarks")
+    elif args.labels:
+        print("Starting PDF split: at page label prefix changes")
+    elif args.balanced:
+        print(f"Starting PDF split: {args.balanced} balanced chunks")
+    split_pdf(args.input_pdf, args.output_dir, no_overwrite=args.no_overwrite, optimize_chunks=args.optimize, remove_blank=args.remove_blank, **split_options)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Target-size optimization
+Staff ask for "this under 20 MB", not for a set of options. Strategies are tried
+from lossless to lossy - object cleanup and object streams, then font subsetting,
+then image downsampling at falling DPI and JPEG quality. Each one is measured with
+an in-memory save, and the first result under the target is written
+"""
+
+import fitz  # PyMuPDF
+import os
+import sys
+import logging
+from manage_pdfs.optimize import optimize_document
+from manage_pdfs.fonts import subset_embedded_fonts, unembed_standard_fonts
+from manage_pdfs.downsample import downsample_images
+
+logging.basicConfig(level=logging.INFO)
+
+# Usage: python -m manage_pdfs.target_size input.pdf output.pdf --target-mb 20
+
+# Lossy image steps, tried in order: (target DPI, JPEG quality)
+IMAGE_STEPS = [(300, 85), (200, 75), (150, 70), (110, 60), (72, 50)]
+
+def _cancelled(progress_callback, cancellation_checker, current, total, percentage, message):
+    """Report progress and check for cancellation; True if the optimization should stop"""
+    if cancellation_checker and cancellation_checker():
+        return True
+    return bool(progress_callback) and not progress_callback(current, total, percentage, message)
+
+def _settings(strategy, lossless=True, fonts=False, downsample_dpi=None, jpeg_quality=None):
+    """Settings of one strategy, as reported"""
+    return {
+        'strategy': strategy,
+        'object_cleanup': lossless,
+        'object_streams': lossless,
+        'dedupe_images': lossless,
+        'subset_fonts': fonts,
+        'unembed_fonts': fonts,
+        'downsample_dpi': downsample_dpi,
+        'jpeg_quality': jpeg_quality,
+    }
+
+def optimize_to_size(input_pdf, output_pdf, target_bytes, progress_callback=None, cancellation_checker=None):
+    """
+    Optimize a PDF just enough to bring it under a target size
+
+    The file is read and parsed once. Lossless cleanup (see optimize_document,
+    plus object streams) and then font subsetting and unembedding of standard
+    fonts are applied to that document in turn. Each image step starts again
+    from the font step's result, so images are only re-encoded once. Every
+    step is measured with an in-memory save, and the search stops at the first
+    one under the target. If none gets there, the smallest result is written.
+
+    Args:
+        input_pdf: Path to input PDF
+        output_pdf: Path to save the optimized PDF
+        target_bytes: Size to get under, in bytes
+        progress_callback: Optional callback(current_step, total_steps, percentage, message)
+                           that returns False to cancel
+        cancellation_checker: Optional function that returns True to cancel
+
+    Returns:
+        dict: {'met': bool, 'target_bytes', 'original_bytes', 'final_bytes',
+               'settings': settings of the strategy used (see _settings),
+               'steps': [{'strategy', 'bytes'}] in the order tried},
+              or None on failure or cancellation
+    """
+    if not os.path.exists(input_pdf):
+        logging.error(f"Input file '{input_pdf}' does not exist.")
+        return None
+
+    total = 2 + len(IMAGE_STEPS)
+    steps = []
+    try:
+        with open(input_pdf, 'rb') as f:
+            data = f.read()
+        original = len(data)
+        best = {'data': data, 'settings': _settings('original', lossless=False)}
+        logging.info(f"Optimizing '{input_pdf}' ({original/1024/1024:.2f} MB) to under {target_bytes/1024/1024:.2f} MB")
+
+        def measure(doc, settings, save_options):
+            """
+            Save a candidate in memory and keep it if it's the smallest so far
+
+            Returns:
+                tuple: (True once the target is met, the saved bytes)
+            """
+            nonlocal best
+            out = doc.tobytes(**save_options)
+            steps.append({'strategy': settings['strategy'], 'bytes': len(out)})
+            logging.info(f"  {settings['strategy']}: {len(out)/1024/1024:.2f} MB")
+            if len(out) < len(best['data']):
+                best = {'data': out, 'settings': settings}
+            return len(best['data']) <= target_bytes, out
+
+        doc = fitz.open(stream=data, filetype='pdf')
+        try:
+            if _cancelled(progress_callback, cancellation_checker, 0, total, 0, 'Lossless cleanup...'):
+                return None
+            _, save_options = optimize_document(doc, aggressive=True, dedupe_images=True, size_bytes=original)
+            save_options['use_objstms'] = 1
+            met, _ = measure(doc, _settings('lossless'), save_options)
+
+            if not met:
+                if _cancelled(progress_callback, cancellation_checker, 1, total, 100 // total, 'Subsetting fonts...'):
+                    return None
+                subset_embedded_fonts(doc)
+                unembed_standard_fonts(doc)
+                # Image steps start again from this save
+                met, fonts_data = measure(doc, _settings('fonts', fonts=True), save_options)
+        finally:
+            doc.close()
+
+        for index, (dpi, quality) in enumerate(IMAGE_STEPS):
+            if met:
+                break
+            current = 2 + index
+            if _cancelled(progress_callback, cancellation_checker, current, total, current * 100 // total,
+                          f"Downsampling images to {dpi} DPI, quality {quality}..."):
+                return None
+            doc = fitz.open(stream=fonts_data, filetype='pdf')
+            try:
+                downsample_images(doc, dpi, quality)
+                met, _ = measure(doc, _settings(f"images {dpi} dpi q{quality}", fonts=True, downsample_dpi=dpi,
+                                             jpeg_quality=quality), save_options)
+            finally:
+                doc.close()
+
+        with open(output_pdf, 'wb') as f:
+            f.write(best['data'])
+        result = {
+            'met': len(best['data']) <= target_bytes,
+            'target_bytes': target_bytes,
+            'original_bytes': original,
+            'final_bytes': len(best['data']),
+            'settings': best['settings'],
+            'steps': steps,
+        }
+        if result['met']:
+            logging.info(f"Target met with '{best['settings']['strategy']}': {result['final_bytes']/1024/1024:.2f} MB")
+        else:
+            logging.warning(f"Target not met - smallest result ('{best['settings']['strategy']}') is "
+                            f"{result['final_bytes']/1024/1024:.2f} MB")
+        if progress_callback:
+            progress_callback(total, total, 100, 'Optimization complete')
+        return result
+
+    except Exception as e:
+        logging.error(f"Error optimizing PDF to target size: {e}")
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Optimize a PDF just enough to get it under a target size')
+    parser.add_argument('input_pdf', help='Path to the input PDF file')
+    parser.add_argument('output_pdf', help='Path to save the optimized PDF file')
+    parser.add_argument('--target-mb', type=float, required=True, help='Target size in MB')
+
+    args = parser.parse_args()
+    if args.target_mb <= 0:
+        parser.error('--target-mb must be positive')
+
+    result = optimize_to_size(args.input_pdf, args.output_pdf, int(args.target_mb * 1024 * 1024))
+    if result is None:
+        print("Target-size optimization failed!")
+        sys.exit(1)
+
+    for step in result['steps']:
+        print(f"  {step['strategy']:24} {step['bytes']/1024/1024:8.2f} MB")
+    settings = result['settings']
+    print(f"{'Target met' if result['met'] else 'Target NOT met'}: {result['original_bytes']/1024/1024:.2f} MB -> "
+          f"{result['final_bytes']/1024/1024:.2f} MB using '{settings['strategy']}'")
+    sys.exit(0 if result['met'] else 2)
@@ -1,6 +1,6 @@
 // pdfCombine.js - PDF combining functionality
 import { state, setState, closeModal } from './state.js';
-import { openModal, validateFilename, validateFolder } from './utils.js';
+import { openModal, validateFilename, validateFolder, blankPagesSummary, duplicatePagesSummary, bytesSavedSummary, duplicateImagesSummary } from './utils.js';
 
 // Validate inputs for combine PDFs tool
 function validateCombineInputs() {
@@ -37,10 +37,12 @@ function pollCombineProgress() {
           
           setTimeout(() => {
             closeModal('combine-progress-modal');
+            let summary = blankPagesSummary(data.blank_pages) + duplicatePagesSummary(data.duplicate_pages) + bytesSavedSummary('Font unification', data.fonts_bytes_saved)
+              + duplicateImagesSummary(data.duplicate_images, data.images_bytes_saved);
             if (data.filename) {
-              alert('PDFs combined successfully!\nSaved to: ' + data.filename);
+              alert('PDFs combined successfully!\nSaved to: ' + data.filename + summary);
             } else {
-              alert('PDFs combined successfully!');
+              alert('PDFs combined successfully!' + summary);
             }
           }, 1000);
           // Re-enable cancel button for future use
@@ -138,7 +140,7 @@ export function initializeCombine() {
   $('#combine-input').on('change', function() {
     let files = this.files;
     if (files.length > 0) {
-      let base = files[0].name.replace(/\.pdf$/i, '');
+      let base = files[0].name.replace(/\.[^.]+$/, '');
       $('#combine-filename').val('combined_' + base);
       $('#combine-filename').prop('disabled', false);
     } else {
@@ -182,6 +184,10 @@ export function initializeCombine() {
     formData.append('output_filename', fname);
     formData.append('output_folder', outputFolder);
     formData.append('optimize', optimize ? 'true' : 'false');
+    formData.append('remove_blank', $('#combine-remove-blank').is(':checked') ? 'true' : 'false');
+    formData.append('remove_duplicates', $('#combine-remove-duplicates').is(':checked') ? 'true' : 'false');
+    formData.append('duplicate_policy', $('#combine-latest-wins').is(':checked') ? 'last' : 'first');
+    formData.append('zip_order', $('#combine-zip-order').is(':checked') ? 'natural' : 'sorted');
 
     // Close the combine modal and show progress modal
     closeModal('combine-modal');
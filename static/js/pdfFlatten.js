@@ -1,6 +1,6 @@
 // pdfFlatten.js - PDF flattening functionality
 import { state, setState, closeModal } from './state.js';
-import { openModal, validateFilename, validateFolder } from './utils.js';
+import { openModal, validateFilename, validateFolder, blankPagesSummary } from './utils.js';
 
 // Track flatten progress
 function trackFlattenProgress(jobId) {
@@ -52,7 +52,7 @@ function trackFlattenProgress(jobId) {
           setTimeout(() => {
             closeModal('flatten-progress-modal');
             if (data.filename) {
-              alert('PDF flattened successfully!\nSaved to: ' + data.filename);
+              alert('PDF flattened successfully!\nSaved to: ' + data.filename + blankPagesSummary(data.blank_pages));
             }
           }, 1000); // Show 100% for a moment before closing
         } else if (data.status === 'cancelled') {
@@ -182,6 +182,7 @@ export function initializeFlatten() {
     formData.append('input_pdf', file);
     formData.append('output_filename', fname);
     formData.append('output_folder', outputFolder);
+    formData.append('remove_blank', $('#flatten-remove-blank').is(':checked') ? 'true' : 'false');
     
     $.ajax({
       url: '/api/flatten_pdf',
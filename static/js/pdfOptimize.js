@@ -1,6 +1,6 @@
 // pdfOptimize.js - PDF optimization functionality
 import { state, setState, closeModal } from './state.js';
-import { openModal, validateFilename, validateFolder } from './utils.js';
+import { openModal, validateFilename, validateFolder, bytesSavedSummary, duplicateImagesSummary, targetSizeSummary } from './utils.js';
 
 // Validate inputs for optimize PDF tool
 function validateOptimizeInputs() {
@@ -37,10 +37,12 @@ function pollOptimizeProgress() {
           
           setTimeout(() => {
             closeModal('optimize-progress-modal');
+            let summary = data.target_mb ? targetSizeSummary(data) : duplicateImagesSummary(data.duplicate_images, data.images_bytes_saved)
+              + bytesSavedSummary('Font subsetting', data.fonts_bytes_saved);
             if (data.filename) {
-              alert('PDF optimized successfully!\nSaved to: ' + data.filename);
+              alert('PDF optimized successfully!\nSaved to: ' + data.filename + summary);
             } else {
-              alert('PDF optimized successfully!');
+              alert('PDF optimized successfully!' + summary);
             }
           }, 1000);
           // Re-enable cancel button for future use
@@ -157,6 +159,9 @@ export function initializeOptimize() {
     let fname = $('#optimize-filename').val();
     let outputFolder = $('#optimize-output-folder').val();
     let aggressive = $('#optimize-aggressive').is(':checked');
+    let targetMb = $('#optimize-target-mb').val().trim();
+    let dedupeImages = $('#optimize-dedupe-images').is(':checked');
+    let subsetFonts = $('#optimize-subset-fonts').is(':checked');
     
     // Clear any previous error messages
     $('#optimize-message').text('');
@@ -165,6 +170,10 @@ export function initializeOptimize() {
       $('#optimize-message').text('Please fill in all required fields.');
       return;
     }
+    if (targetMb && !(parseFloat(targetMb) > 0)) {
+      $('#optimize-message').text('Target size must be a positive number of MB.');
+      return;
+    }
 
     console.log('Optimize run clicked:', {file: file.name, fname, outputFolder, aggressive});
 
@@ -184,6 +193,9 @@ export function initializeOptimize() {
     formData.append('output_filename', fname);
     formData.append('output_folder', outputFolder);
     formData.append('aggressive', aggressive);
+    formData.append('target_mb', targetMb);
+    formData.append('dedupe_images', dedupeImages);
+    formData.append('subset_fonts', subsetFonts);
     
     let optimizeRequest = $.ajax({
       url: '/api/optimize_pdf',
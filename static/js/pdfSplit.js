@@ -1,11 +1,12 @@
 // pdfSplit.js - PDF splitting functionality
 import { state, setState, closeModal } from './state.js';
-import { validateFilename, validateFolder } from './utils.js';
+import { validateFilename, validateFolder, blankPagesSummary } from './utils.js';
 
 // Show split progress modal
 function showSplitProgress() {
   $('#split-progress-modal').fadeIn(200);
   $('#split-cancel-btn').prop('disabled', false).text('Cancel');
+  $('#split-ready-chunks').empty().hide();
   updateSplitProgress(0, 0, 0, 0, 0, 'Initializing...');
 }
 
@@ -16,7 +17,7 @@ function hideSplitProgress() {
 }
 
 // Update split progress
-function updateSplitProgress(currentPage, totalPages, currentChunk, totalChunks, percentage, message) {
+function updateSplitProgress(currentPage, totalPages, currentChunk, totalChunks, percentage, message, optimizedChunks = null) {
   console.log('Updating progress:', {currentPage, totalPages, currentChunk, totalChunks, percentage, message}); // Debug logging
   
   // Better page display
@@ -27,7 +28,9 @@ function updateSplitProgress(currentPage, totalPages, currentChunk, totalChunks,
   }
   
   // Better chunk display - show current completion status with context
-  if (totalChunks > 0) {
+  if (totalChunks > 0 && optimizedChunks !== null) {
+    $('#progress-chunks').text(`${currentChunk} of ${totalChunks} chunks complete, ${optimizedChunks} optimized`);
+  } else if (totalChunks > 0) {
     if (message && message.includes('Starting chunk')) {
       $('#progress-chunks').text(`${currentChunk} of ${totalChunks} chunks complete (starting chunk ${currentChunk + 1})`);
     } else if (message && message.includes('Saving chunk')) {
@@ -44,6 +47,31 @@ function updateSplitProgress(currentPage, totalPages, currentChunk, totalChunks,
   $('#progress-status').text(message);
 }
 
+// List the chunks that are already saved, each with a download link
+function renderReadyChunks(jobId, readyChunks) {
+  let container = $('#split-ready-chunks');
+  if (!readyChunks || readyChunks.length === 0) {
+    container.empty().hide();
+    return;
+  }
+  if (container.find('li').length === readyChunks.length) {
+    return; // Nothing new since the last poll
+  }
+  let list = $('<ul></ul>');
+  readyChunks.forEach(chunk => {
+    let sizeMb = (chunk.size / 1024 / 1024).toFixed(1);
+    let link = $('<a></a>')
+      .attr('href', `/api/split_chunk/${jobId}/${chunk.index}`)
+      .attr('download', chunk.file)
+      .text(chunk.file);
+    list.append($('<li></li>').append(link).append(` - pages ${chunk.first_page}-${chunk.last_page} (${sizeMb} MB)`));
+  });
+  container.empty()
+    .append($('<div></div>').text(`${readyChunks.length} file(s) ready to download:`))
+    .append(list)
+    .show();
+}
+
 // Poll for split progress with adaptive polling for important state changes
 function pollSplitProgress(jobId) {
   setState('currentSplitJobId', jobId); // Store job ID for cancellation
@@ -75,8 +103,10 @@ function pollSplitProgress(jobId) {
           data.current_chunk || 0,
           data.total_chunks || 0,
           data.percentage || 0,
-          data.message || 'Processing...'
+          data.message || 'Processing...',
+          data.optimize_chunks ? (data.optimized_chunks || 0) : null
         );
+        renderReadyChunks(jobId, data.ready_chunks);
         
         // Detect important state changes (non-page updates)
         const currentMessage = data.message || 'Processing...';
@@ -106,7 +136,7 @@ function pollSplitProgress(jobId) {
             hideSplitProgress();
             closeModal('split-modal');
             if (data.zipfile) {
-              alert('PDF split successfully!\nSaved to: ' + data.zipfile);
+              alert('PDF split successfully!\nSaved to: ' + data.zipfile + blankPagesSummary(data.blank_pages));
             }
           }, 1000); // Show 100% for a moment before closing
         } else if (data.status === 'cancelled') {
@@ -166,11 +196,145 @@ function validateSplitInputs() {
   } else if (method === 'size') {
     let maxSize = parseFloat($('#split-max-size').val());
     canRun = canRun && maxSize > 0;
+  } else if (method === 'outline') {
+    let outlineLevel = parseInt($('#split-outline-level').val());
+    canRun = canRun && outlineLevel > 0;
+  } else if (method === 'balanced') {
+    let targetChunks = parseInt($('#split-target-chunks').val());
+    canRun = canRun && targetChunks > 1;
   }
   
   console.log('Validation:', {file: !!file, fname, method, isValidFilename, isValidFolder, splitTotalPages: state.splitTotalPages, canRun});
   
   $('#split-run').prop('disabled', !canRun);
+  $('#split-preview').prop('disabled', !(file && state.splitTotalPages > 1));
+}
+
+// Get the selected split method
+function getSplitMethod() {
+  let method = $('input[name="split-method"]:checked').val();
+  
+  // Fallback if method is undefined
+  if (!method) {
+    if ($('#split-method-pages').prop('checked')) {
+      method = 'pages';
+    } else if ($('#split-method-size').prop('checked')) {
+      method = 'size';
+    } else if ($('#split-method-outline').prop('checked')) {
+      method = 'outline';
+    } else if ($('#split-method-labels').prop('checked')) {
+      method = 'labels';
+    } else if ($('#split-method-balanced').prop('checked')) {
+      method = 'balanced';
+    }
+  }
+  return method;
+}
+
+// Attach the PDF to a request - reuse the upload from a previous preview when there is one
+function appendSplitInput(formData, file) {
+  if (state.splitUploadId) {
+    formData.append('upload_id', state.splitUploadId);
+  } else {
+    formData.append('input_pdf', file);
+  }
+}
+
+// Add the settings for the selected split method to a request; returns false if they are invalid
+function appendSplitMethod(formData, method) {
+  if (method === 'pages') {
+    let maxPages = parseInt($('#split-max-pages').val());
+    if (!(maxPages > 0)) {
+      console.log('Invalid max pages:', maxPages);
+      return false;
+    }
+    formData.append('max_pages_per_chunk', maxPages);
+  } else if (method === 'size') {
+    let maxSize = parseFloat($('#split-max-size').val());
+    if (!(maxSize > 0)) {
+      console.log('Invalid max size:', maxSize);
+      return false;
+    }
+    formData.append('max_size_mb', maxSize);
+  } else if (method === 'outline') {
+    let outlineLevel = parseInt($('#split-outline-level').val());
+    if (!(outlineLevel > 0)) {
+      console.log('Invalid bookmark level:', outlineLevel);
+      return false;
+    }
+    formData.append('outline_level', outlineLevel);
+  } else if (method === 'labels') {
+    formData.append('split_by_labels', 'true');
+  } else if (method === 'balanced') {
+    let targetChunks = parseInt($('#split-target-chunks').val());
+    if (!(targetChunks > 1)) {
+      console.log('Invalid number of parts:', targetChunks);
+      return false;
+    }
+    formData.append('target_chunks', targetChunks);
+  } else {
+    console.log('No valid method selected:', method);
+    return false;
+  }
+  return true;
+}
+
+// Show the planned chunks from /api/split_plan
+function renderSplitPlan(plan) {
+  let list = $('<ol style="margin: 4px 0 0 18px; padding: 0;"></ol>');
+  plan.chunks.forEach(chunk => {
+    let sizeMb = (chunk.estimated_bytes / 1024 / 1024).toFixed(1);
+    let title = chunk.title ? `${chunk.title}: ` : '';
+    list.append($('<li></li>').text(`${title}pages ${chunk.first_page}-${chunk.last_page} (~${sizeMb} MB)`));
+  });
+  $('#split-plan-preview')
+    .empty()
+    .append($('<div></div>').text(`${plan.chunks.length} file(s) from ${plan.total_pages} pages:`))
+    .append(list)
+    .show();
+}
+
+// Preview the split without writing any files
+function previewSplit() {
+  let file = $('#split-input')[0].files[0];
+  if (!file) {
+    return;
+  }
+  
+  let formData = new FormData();
+  appendSplitInput(formData, file);
+  if (!appendSplitMethod(formData, getSplitMethod())) {
+    return;
+  }
+  
+  $('#split-preview').prop('disabled', true);
+  $('#split-plan-preview').text('Planning split...').show();
+  
+  $.ajax({
+    url: '/api/split_plan',
+    type: 'POST',
+    data: formData,
+    processData: false,
+    contentType: false,
+    success: function(data) {
+      if (data.upload_id) {
+        setState('splitUploadId', data.upload_id);
+      }
+      renderSplitPlan(data.plan);
+    },
+    error: function(xhr) {
+      let data = xhr.responseJSON || {};
+      if (data.upload_id) {
+        setState('splitUploadId', data.upload_id);
+      } else {
+        setState('splitUploadId', null);
+      }
+      $('#split-plan-preview').text('Preview failed: ' + (data.error || xhr.responseText)).show();
+    },
+    complete: function() {
+      validateSplitInputs();
+    }
+  });
 }
 
 // Initialize split cancel button handler
@@ -214,7 +378,11 @@ export function initializeSplit() {
     if (method === 'pages') {
       $('#split-pages-row').show();
       $('#split-size-row').hide();
+      $('#split-outline-row').hide();
+      $('#split-balanced-row').hide();
       $('#split-max-size').val('').prop('disabled', true);
+      $('#split-outline-level').val('').prop('disabled', true);
+      $('#split-target-chunks').val('').prop('disabled', true);
       if ($('#split-input')[0].files[0]) {
         $('#split-max-pages').prop('disabled', false);
         // Set default pages if we have page count
@@ -229,16 +397,55 @@ export function initializeSplit() {
     } else if (method === 'size') {
       $('#split-pages-row').hide();
       $('#split-size-row').show();
+      $('#split-outline-row').hide();
+      $('#split-balanced-row').hide();
       $('#split-max-pages').val('').prop('disabled', true);
+      $('#split-outline-level').val('').prop('disabled', true);
+      $('#split-target-chunks').val('').prop('disabled', true);
       if ($('#split-input')[0].files[0]) {
         $('#split-max-size').prop('disabled', false).val('30'); // Default 30MB
       }
+    } else if (method === 'outline') {
+      $('#split-pages-row').hide();
+      $('#split-size-row').hide();
+      $('#split-outline-row').show();
+      $('#split-balanced-row').hide();
+      $('#split-max-pages').val('').prop('disabled', true);
+      $('#split-max-size').val('').prop('disabled', true);
+      $('#split-target-chunks').val('').prop('disabled', true);
+      if ($('#split-input')[0].files[0]) {
+        $('#split-outline-level').prop('disabled', false).val('1'); // Default top-level bookmarks
+      }
+    } else if (method === 'balanced') {
+      $('#split-pages-row').hide();
+      $('#split-size-row').hide();
+      $('#split-outline-row').hide();
+      $('#split-balanced-row').show();
+      $('#split-max-pages').val('').prop('disabled', true);
+      $('#split-max-size').val('').prop('disabled', true);
+      $('#split-outline-level').val('').prop('disabled', true);
+      if ($('#split-input')[0].files[0]) {
+        $('#split-target-chunks').prop('disabled', false).val('2');
+      }
+    } else if (method === 'labels') {
+      // No extra settings - chunks follow the page label prefixes
+      $('#split-pages-row').hide();
+      $('#split-size-row').hide();
+      $('#split-outline-row').hide();
+      $('#split-balanced-row').hide();
+      $('#split-max-pages').val('').prop('disabled', true);
+      $('#split-max-size').val('').prop('disabled', true);
+      $('#split-outline-level').val('').prop('disabled', true);
+      $('#split-target-chunks').val('').prop('disabled', true);
     }
     validateSplitInputs();
   });
 
   $('#split-input').on('change', function() {
     let file = this.files[0];
+    // A new file needs a new upload for previews
+    setState('splitUploadId', null);
+    $('#split-plan-preview').empty().hide();
     if (file) {
       $('#split-filename').prop('disabled', false);
       // Default zip filename: split_<original>.zip
@@ -255,6 +462,10 @@ export function initializeSplit() {
         $('#split-max-pages').prop('disabled', false);
       } else if (method === 'size') {
         $('#split-max-size').prop('disabled', false);
+      } else if (method === 'outline') {
+        $('#split-outline-level').prop('disabled', false).val('1');
+      } else if (method === 'balanced') {
+        $('#split-target-chunks').prop('disabled', false).val('2');
       }
       
       // Get page count using PDF.js
@@ -306,27 +517,20 @@ export function initializeSplit() {
       $('#split-filename').prop('disabled', true);
       $('#split-max-pages').val('').prop('disabled', true);
       $('#split-max-size').val('').prop('disabled', true);
+      $('#split-outline-level').val('').prop('disabled', true);
+      $('#split-target-chunks').val('').prop('disabled', true);
       $('#split-run').prop('disabled', true);
       $('#split-warning').hide();
       setState('splitTotalPages', 0); // Reset page count
     }
   });
   
-  $('#split-filename, #split-max-pages, #split-max-size, #split-output-folder').on('input', validateSplitInputs);
+  $('#split-filename, #split-max-pages, #split-max-size, #split-outline-level, #split-target-chunks, #split-output-folder').on('input', validateSplitInputs);
 
   $('#split-run').on('click', function() {
     let file = $('#split-input')[0].files[0];
     let fname = $('#split-filename').val();
-    let method = $('input[name="split-method"]:checked').val();
-    
-    // Fallback if method is undefined
-    if (!method) {
-      if ($('#split-method-pages').prop('checked')) {
-        method = 'pages';
-      } else if ($('#split-method-size').prop('checked')) {
-        method = 'size';
-      }
-    }
+    let method = getSplitMethod();
     
     console.log('Split run clicked:', {file: file ? file.name : 'none', fname, method, splitTotalPages: state.splitTotalPages});
     
@@ -338,26 +542,13 @@ export function initializeSplit() {
     let outputFolder = $('#split-output-folder').val();
     
     let formData = new FormData();
-    formData.append('input_pdf', file);
+    appendSplitInput(formData, file);
     formData.append('output_zip', fname);
     formData.append('output_folder', outputFolder);
+    formData.append('optimize_chunks', $('#split-optimize').is(':checked') ? 'true' : 'false');
+    formData.append('remove_blank', $('#split-remove-blank').is(':checked') ? 'true' : 'false');
     
-    if (method === 'pages') {
-      let maxPages = parseInt($('#split-max-pages').val());
-      if (!(maxPages > 0)) {
-        console.log('Invalid max pages:', maxPages);
-        return;
-      }
-      formData.append('max_pages_per_chunk', maxPages);
-    } else if (method === 'size') {
-      let maxSize = parseFloat($('#split-max-size').val());
-      if (!(maxSize > 0)) {
-        console.log('Invalid max size:', maxSize);
-        return;
-      }
-      formData.append('max_size_mb', maxSize);
-    } else {
-      console.log('No valid method selected:', method);
+    if (!appendSplitMethod(formData, method)) {
       return;
     }
     
@@ -386,11 +577,19 @@ export function initializeSplit() {
       },
       error: function(xhr) {
         hideSplitProgress();
+        // The preview upload may be gone (e.g. app restarted) - upload the file again next time
+        setState('splitUploadId', null);
         $('#split-message').text('Error: ' + xhr.responseText);
       }
     });
   });
 
+  // Preview the planned chunks before running the split
+  $('#split-preview').on('click', previewSplit);
+  $('input[name="split-method"], #split-max-pages, #split-max-size, #split-outline-level, #split-target-chunks').on('input change', function() {
+    $('#split-plan-preview').empty().hide();
+  });
+
   // Initialize cancel button functionality
   initializeSplitCancel();
 }
\ No newline at end of file
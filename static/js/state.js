@@ -5,6 +5,7 @@ export const state = {
     pdfDoc: null,
     defaultOutputFolder: '',
     splitTotalPages: 0,
+    splitUploadId: null,
     currentSplitJobId: null,
     currentFlattenJobId: null,
     currentExtractJobId: null,
@@ -55,12 +56,20 @@ export function closeModal(id) {
         $('#split-output-folder').val(state.defaultOutputFolder);
         $('#split-max-pages').val('').prop('disabled', true);
         $('#split-max-size').val('').prop('disabled', true);
+        $('#split-outline-level').val('').prop('disabled', true);
+        $('#split-target-chunks').val('').prop('disabled', true);
+        $('#split-optimize').prop('checked', false);
+        $('#split-remove-blank').prop('checked', false);
         // Reset radio buttons to default (pages)
         $('#split-method-pages').prop('checked', true);
         $('#split-pages-row').show();
         $('#split-size-row').hide();
+        $('#split-outline-row').hide();
+        $('#split-balanced-row').hide();
         $('#split-warning').hide();
+        $('#split-plan-preview').empty().hide();
         setState('splitTotalPages', 0);
+        setState('splitUploadId', null);
     } else if (id === 'compress-modal') {
         // Clear inputs and reset flatten checkbox for compress modal
         $('#compress-input').val('');
@@ -73,17 +82,25 @@ export function closeModal(id) {
         $('#combine-filename').val('').prop('disabled', true);
         $('#combine-output-folder').val(state.defaultOutputFolder);
         $('#combine-optimize').prop('checked', false);
+        $('#combine-remove-blank').prop('checked', false);
+        $('#combine-remove-duplicates').prop('checked', false);
+        $('#combine-latest-wins').prop('checked', false);
+        $('#combine-zip-order').prop('checked', false);
     } else if (id === 'flatten-modal') {
         // Clear inputs for flatten modal
         $('#flatten-input').val('');
         $('#flatten-filename').val('').prop('disabled', true);
         $('#flatten-output-folder').val(state.defaultOutputFolder);
+        $('#flatten-remove-blank').prop('checked', false);
     } else if (id === 'optimize-modal') {
         // Clear inputs for optimize modal
         $('#optimize-input').val('');
         $('#optimize-filename').val('').prop('disabled', true);
         $('#optimize-output-folder').val(state.defaultOutputFolder);
         $('#optimize-aggressive').prop('checked', false);
+        $('#optimize-target-mb').val('');
+        $('#optimize-dedupe-images').prop('checked', false);
+        $('#optimize-subset-fonts').prop('checked', false);
     } else if (id === 'extract-modal') {
         // Clear inputs for extract modal
         $('#extract-input').val('');
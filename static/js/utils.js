@@ -29,6 +29,50 @@ export function validateFolder(folderPath) {
   return folderPath && folderPath.trim().length > 0;
 }
 
+// Summary of the blank pages an operation left out, for its completion message
+export function blankPagesSummary(blankPages) {
+  if (!blankPages || blankPages.length === 0) {
+    return '';
+  }
+  let pages = blankPages.map(entry => entry.file ? `${entry.file} p.${entry.page}` : `p.${entry.page}`);
+  return `\nRemoved ${blankPages.length} blank page(s): ${pages.join(', ')}`;
+}
+
+// Summary of the repeated pages a combine left out, for its completion message
+export function duplicatePagesSummary(duplicatePages) {
+  if (!duplicatePages || duplicatePages.length === 0) {
+    return '';
+  }
+  let pages = duplicatePages.map(entry => `${entry.file} p.${entry.page} (= ${entry.kept_file} p.${entry.kept_page})`);
+  return `\nRemoved ${duplicatePages.length} duplicate page(s): ${pages.join(', ')}`;
+}
+
+// Summary of the bytes an optimization step saved, for a completion message
+export function bytesSavedSummary(label, bytesSaved) {
+  if (!bytesSaved || bytesSaved <= 0) {
+    return '';
+  }
+  return `\n${label} saved ${(bytesSaved / 1024).toFixed(0)} KB`;
+}
+
+// Summary of the duplicate images an optimization removed, for a completion message
+export function duplicateImagesSummary(count, bytesSaved) {
+  if (!count) {
+    return '';
+  }
+  return `\nRemoved ${count} duplicate image(s), saved ${((bytesSaved || 0) / 1024).toFixed(0)} KB`;
+}
+
+// Summary of a target-size optimization, for its completion message
+export function targetSizeSummary(data) {
+  let before = (data.original_bytes / 1024 / 1024).toFixed(2);
+  let after = (data.final_bytes / 1024 / 1024).toFixed(2);
+  if (data.target_met) {
+    return `\n${before} MB -> ${after} MB (target ${data.target_mb} MB met with: ${data.strategy})`;
+  }
+  return `\nCould not get under ${data.target_mb} MB - smallest result is ${after} MB (was ${before} MB, used: ${data.strategy})`;
+}
+
 // Disable Run and Cancel buttons for a modal during browser operation
 function disableModalButtons(modalPrefix) {
   console.log(`Disabling buttons for ${modalPrefix} - browser is open`);
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark analyze_pdf_bloat (one pass over the xref table) against the old
+page-by-page analysis, and check that both report the same numbers
+
+Usage: python tests/benchmark_analyze.py file1.pdf [file2.pdf ...] [--repeat 3]
+"""
+
+import fitz  # PyMuPDF
+import os
+import sys
+import time
+import logging
+from collections import defaultdict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manage_pdfs.optimize import analyze_pdf_bloat
+from manage_pdfs import resource_graph, page_index
+
+logging.getLogger().setLevel(logging.WARNING)
+
+def analyze_pdf_bloat_by_page(input_pdf):
+    """The previous analysis - loads every page and lists its annotations, widgets, images and fonts"""
+    doc = fitz.open(input_pdf)
+    analysis = {
+        'original_size_mb': os.path.getsize(input_pdf) / (1024 * 1024),
+        'pages': doc.page_count,
+        'fonts': {},
+        'images': 0,
+        'annotations': 0,
+        'widgets': 0,
+        'objects': doc.xref_length(),
+    }
+    font_usage = defaultdict(list)
+    for page_num in range(doc.page_count):
+        page = doc[page_num]
+        analysis['annotations'] += len(list(page.annots()))
+        analysis['widgets'] += len(list(page.widgets()))
+        analysis['images'] += len(page.get_images())
+        for font_xref, ext, font_type, basefont, font_name, encoding in (f[:6] for f in page.get_fonts()):
+            font_usage[f"{basefont}_{font_type}_{encoding}"].append(page_num + 1)
+    analysis['fonts'] = {
+        'unique_fonts': len(font_usage),
+        'font_usage': dict(font_usage),
+        'duplicated_fonts': {k: v for k, v in font_usage.items() if len(v) > 1}
+    }
+    doc.close()
+    return analysis
+
+def best_time(function, path, repeat):
+    """Fastest of repeat runs (the resource graph and page index caches are cleared before each run, so every run is cold)"""
+    best, result = None, None
+    for _ in range(repeat):
+        resource_graph._resource_graph_cache.clear()
+        page_index._page_index_cache.clear()
+        start = time.perf_counter()
+        result = function(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the single-pass PDF analysis against the page-by-page one')
+    parser.add_argument('files', nargs='+', help='PDF files to analyze')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per file and analyzer (the fastest is reported)')
+    args = parser.parse_args()
+
+    print(f"{'File':40} {'Pages':>6} {'Objects':>8} {'By page':>9} {'One pass':>9} {'Speedup':>8}  Same result")
+    for path in args.files:
+        if not os.path.exists(path):
+            logging.error(f"File not found: {path}")
+            continue
+        old_time, old = best_time(analyze_pdf_bloat_by_page, path, args.repeat)
+        new_time, new = best_time(analyze_pdf_bloat, path, args.repeat)
+        different = [key for key in old if old[key] != new.get(key)]
+        print(f"{os.path.basename(path)[:40]:40} {old['pages']:6} {old['objects']:8,} {old_time:8.3f}s {new_time:8.3f}s "
+              f"{old_time / new_time:7.1f}x  {'yes' if not different else 'no: ' + ', '.join(different)}")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Check that a tree combine writes about the same file as a flat combine
+
+The inputs all embed the same image and font, so an output that doesn't
+garbage-collect across batches comes out several times larger
+
+Usage: python tests/test_combine_tree.py
+"""
+
+import fitz  # PyMuPDF
+import os
+import sys
+import shutil
+import logging
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manage_pdfs.combine import combine_pdfs
+
+logging.getLogger().setLevel(logging.WARNING)
+
+# Largest tree / flat size ratio accepted
+MAX_SIZE_RATIO = 1.1
+
+def make_inputs(folder, count=40, pages=7):
+    """Write count PDFs that all embed the same image and font"""
+    image = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 400, 400), False)
+    for x in range(0, 400, 8):
+        image.set_rect(fitz.IRect(x, 0, x + 4, 400), (x % 256, 128, 255 - x % 256))
+    image_bytes = image.tobytes('png')
+    font = fitz.Font('cjk')
+    paths = []
+    for i in range(count):
+        doc = fitz.open()
+        for page_num in range(pages):
+            page = doc.new_page()
+            page.insert_image(fitz.Rect(72, 72, 372, 372), stream=image_bytes)
+            writer = fitz.TextWriter(page.rect)
+            writer.append((72, 420), f"Sheet {i}-{page_num}", font=font, fontsize=14)
+            writer.write_text(page)
+        path = os.path.join(folder, f"input_{i:02d}.pdf")
+        doc.subset_fonts()
+        doc.save(path, garbage=4, deflate=True)
+        doc.close()
+        paths.append(path)
+    return paths
+
+def test_tree_combine_size():
+    """Tree combine output is within MAX_SIZE_RATIO of the flat combine output"""
+    folder = tempfile.mkdtemp()
+    try:
+        paths = make_inputs(folder)
+        flat_path = os.path.join(folder, 'flat.pdf')
+        tree_path = os.path.join(folder, 'tree.pdf')
+        assert combine_pdfs(paths, flat_path)
+        assert combine_pdfs(paths, tree_path, tree_merge=True, fan_in=4)
+
+        flat_size, tree_size = os.path.getsize(flat_path), os.path.getsize(tree_path)
+        with fitz.open(flat_path) as flat, fitz.open(tree_path) as tree:
+            assert flat.page_count == tree.page_count
+        print(f"Flat combine: {flat_size:,} bytes, tree combine: {tree_size:,} bytes "
+              f"({tree_size / flat_size:.2f}x)")
+        assert tree_size <= flat_size * MAX_SIZE_RATIO
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_tree_combine_size()
+    print("OK")
@@ -4,18 +4,21 @@ import threading
 import shutil
 import zipfile
 import logging
+import multiprocessing
 import time
 from werkzeug.utils import secure_filename
 from manage_pdfs.flatten import flatten_pdf
-from manage_pdfs.split import split_pdf_with_progress as split_func
+from manage_pdfs.split import split_pdf_with_progress as split_func, plan_split
 from manage_pdfs.extract_pages import extract_pages
 from manage_pdfs.optimize import optimize_pdf
+from manage_pdfs.target_size import optimize_to_size
 from manage_pdfs.compress import compress_pdf
-from manage_pdfs.combine import combine_pdfs
+from manage_pdfs.combine import combine_pdfs, combine_zip, ZIP_ORDER_SORTED
+from manage_pdfs.images_to_pdf import images_to_pdf, IMAGE_EXTENSIONS
 
 
-def flatten_pdf_with_progress(job_id, input_path, output_path, flatten_progress):
-    """Run PDF flatten with progress tracking"""
+def flatten_pdf_with_progress(job_id, input_path, output_path, flatten_progress, remove_blank=False):
+    """Run PDF flatten with progress tracking (blank pages dropped with remove_blank are listed in 'blank_pages')"""
     try:
         # Initialize progress
         flatten_progress[job_id] = {
@@ -51,8 +54,10 @@ def flatten_pdf_with_progress(job_id, input_path, output_path, flatten_progress)
             return flatten_progress[job_id].get('cancelled', False)
         
         # Call flatten_pdf with progress callback and cancellation checker
+        blank_report = []
         result = flatten_pdf(input_path, output_path, dpi=300, quality='high', jpeg_quality=95, 
-                           progress_callback=progress_callback, cancellation_checker=cancellation_checker)
+                           progress_callback=progress_callback, cancellation_checker=cancellation_checker,
+                           remove_blank=remove_blank, blank_report=blank_report)
         
         # Check if operation was cancelled during processing
         if flatten_progress[job_id].get('cancelled', False):
@@ -71,7 +76,8 @@ def flatten_pdf_with_progress(job_id, input_path, output_path, flatten_progress)
                 'total_pages': flatten_progress[job_id].get('total_pages', 0),
                 'percentage': 100,
                 'message': 'Complete!',
-                'output_path': output_path
+                'output_path': output_path,
+                'blank_pages': blank_report
             }
         else:
             flatten_progress[job_id] = {
@@ -87,8 +93,24 @@ def flatten_pdf_with_progress(job_id, input_path, output_path, flatten_progress)
         }
 
 
-def split_pdf_with_progress(job_id, input_path, temp_dir, max_pages_per_chunk, max_chunk_size_mb, output_zip, output_folder, split_progress):
-    """Run PDF split with progress tracking"""
+def split_pdf_with_progress(job_id, input_path, temp_dir, max_pages_per_chunk, max_chunk_size_mb, output_zip, output_folder, split_progress, resume=False, outline_level=None, split_by_labels=False, target_chunks=None, optimize_chunks=False, remove_blank=False):
+    """
+    Run PDF split with progress tracking
+
+    Cancelled jobs keep their uploaded input and temp_dir (with its split manifest)
+    so they can be restarted with resume=True, which only regenerates chunks that
+    are missing or invalid.
+
+    Each chunk is listed in split_progress[job_id]['ready_chunks'] as soon as it
+    is saved, so it can be downloaded before the whole split is finished.
+
+    With optimize_chunks=True each chunk is also optimized in a worker process
+    as soon as it is saved; 'optimized_chunks' tracks that phase and chunks are
+    only listed as ready once optimized.
+
+    With remove_blank=True blank pages are left out of the chunks and listed
+    in 'blank_pages'.
+    """
     try:
         
         # Initialize progress
@@ -100,9 +122,23 @@ def split_pdf_with_progress(job_id, input_path, temp_dir, max_pages_per_chunk, m
             'total_chunks': 0,
             'percentage': 0,
             'message': 'Initializing...',
-            'cancelled': False
+            'cancelled': False,
+            'ready_chunks': [],
+            'optimize_chunks': optimize_chunks,
+            'optimized_chunks': 0,
+            'blank_pages': []
         }
         
+        def overall_percentage(current_page, total_pages, current_chunk, total_chunks):
+            """Split progress as 70% pages + 30% chunks, or 60% split + 35% optimize when optimizing chunks"""
+            if total_pages <= 0 or total_chunks <= 0:
+                return 0
+            split_fraction = (current_page / total_pages) * 0.7 + (current_chunk / total_chunks) * 0.3
+            if not optimize_chunks:
+                return int(split_fraction * 100)
+            optimize_fraction = split_progress[job_id].get('optimized_chunks', 0) / total_chunks
+            return int(split_fraction * 60 + optimize_fraction * 35)
+        
         # Call split function with progress callback - no throttling
         def progress_callback(current_page, total_pages, current_chunk, total_chunks, message):
             # Check for cancellation request - this is the primary cancellation check
@@ -110,14 +146,9 @@ def split_pdf_with_progress(job_id, input_path, temp_dir, max_pages_per_chunk, m
                 logging.info(f"Split job {job_id} cancelled during progress callback")
                 return False  # Signal cancellation to split function
             
-            # Calculate progress as 70% for pages + 30% for chunks
+            # Calculate progress from pages and chunks (and optimized chunks, if enabled)
             # This gives users feedback on both page processing AND chunk completion
-            if total_pages > 0 and total_chunks > 0:
-                page_progress = (current_page / total_pages) * 70
-                chunk_progress = (current_chunk / total_chunks) * 30
-                percentage = int(page_progress + chunk_progress)
-            else:
-                percentage = 0
+            percentage = overall_percentage(current_page, total_pages, current_chunk, total_chunks)
             
             # Always update the progress dictionary with every callback
             split_progress[job_id].update({
@@ -144,34 +175,72 @@ def split_pdf_with_progress(job_id, input_path, temp_dir, max_pages_per_chunk, m
         def cancellation_checker():
             return split_progress[job_id].get('cancelled', False)
         
+        # Publish each chunk as soon as it is on disk - by file name only, /api/split_chunk finds it on the server
+        def chunk_callback(entry):
+            ready_chunk = {
+                'index': entry['index'],
+                'file': entry['file'],
+                'size': entry['size'],
+                'first_page': entry['first_page'],
+                'last_page': entry['last_page']
+            }
+            # Replace the list rather than appending, so a progress request never sees it half-updated
+            split_progress[job_id]['ready_chunks'] = split_progress[job_id].get('ready_chunks', []) + [ready_chunk]
+        
+        # Progress for the optimize phase, which overlaps with chunk creation
+        def optimize_callback(chunks_optimized, total_chunks, message):
+            if split_progress[job_id].get('cancelled', False):
+                logging.info(f"Split job {job_id} cancelled while optimizing chunks")
+                return False
+            progress = split_progress[job_id]
+            progress['optimized_chunks'] = chunks_optimized
+            progress.update({
+                'status': 'processing',
+                'percentage': overall_percentage(progress['current_page'], progress['total_pages'],
+                                                 progress['current_chunk'], total_chunks),
+                'message': message
+            })
+            return True
+        
         # Call split_pdf with progress callback and cancellation checker
+        split_kwargs = {
+            'no_overwrite': resume,
+            'progress_callback': progress_callback,
+            'cancellation_checker': cancellation_checker,
+            'chunk_callback': chunk_callback
+        }
+        if optimize_chunks:
+            split_kwargs['optimize_chunks'] = True
+            split_kwargs['optimize_callback'] = optimize_callback
+        if remove_blank:
+            split_kwargs['remove_blank'] = True
+            split_kwargs['blank_report'] = split_progress[job_id]['blank_pages']
         if max_pages_per_chunk:
-            result = split_func(input_path, temp_dir, max_pages_per_chunk=int(max_pages_per_chunk), 
-                              progress_callback=progress_callback, cancellation_checker=cancellation_checker)
+            split_kwargs['max_pages_per_chunk'] = int(max_pages_per_chunk)
+        elif max_chunk_size_mb:
+            split_kwargs['max_chunk_size_mb'] = float(max_chunk_size_mb)
+        elif outline_level:
+            split_kwargs['outline_level'] = int(outline_level)
+        elif target_chunks:
+            split_kwargs['target_chunks'] = int(target_chunks)
+            # Publish the planned chunk sizes before anything is written
+            plan = plan_split(input_path, target_chunks=int(target_chunks))
+            split_progress[job_id]['planned_chunks'] = plan['chunks'] if plan else None
         else:
-            result = split_func(input_path, temp_dir, max_chunk_size_mb=float(max_chunk_size_mb), 
-                              progress_callback=progress_callback, cancellation_checker=cancellation_checker)
+            split_kwargs['split_by_labels'] = split_by_labels
+        result = split_func(input_path, temp_dir, **split_kwargs)
         
         # Check if operation was cancelled during processing
         if split_progress[job_id].get('cancelled', False):
-            logging.info(f"Split job {job_id} was cancelled, cleaning up temp directory")
-            # Mark as cancelled immediately for fast user feedback
+            # Keep temp_dir and its manifest so the job can be resumed later;
+            # the whole upload folder is removed when the app exits
+            logging.info(f"Split job {job_id} was cancelled, keeping finished chunks for resume")
             split_progress[job_id].update({
                 'status': 'cancelled',
                 'message': 'Split operation was cancelled',
-                'percentage': 0
+                'percentage': 0,
+                'resumable': True
             })
-            # Clean up temporary directory in background thread for faster response
-            def cleanup_background():
-                try:
-                    if os.path.exists(temp_dir):
-                        shutil.rmtree(temp_dir)
-                    logging.info(f"Background cleanup completed for job {job_id}")
-                except Exception as e:
-                    logging.error(f"Background cleanup failed for job {job_id}: {e}")
-            
-            cleanup_thread = threading.Thread(target=cleanup_background, daemon=True)
-            cleanup_thread.start()
         elif result:
             # Check again before zipping in case cancellation happened during split
             if split_progress[job_id].get('cancelled', False):
@@ -203,9 +272,10 @@ def split_pdf_with_progress(job_id, input_path, temp_dir, max_pages_per_chunk, m
                     zipname += '.zip'
                 zip_path = os.path.join(output_folder, secure_filename(zipname))
                 with zipfile.ZipFile(zip_path, 'w') as zipf:
-                    for fname in os.listdir(temp_dir):
+                    for fname in sorted(os.listdir(temp_dir)):
                         fpath = os.path.join(temp_dir, fname)
-                        if os.path.isfile(fpath):
+                        # Only zip finished chunks - skip the split manifest and any partial files
+                        if os.path.isfile(fpath) and fname.lower().endswith('.pdf') and not fname.startswith('.'):
                             zipf.write(fpath, arcname=fname)
                 
                 shutil.rmtree(temp_dir)
@@ -220,7 +290,12 @@ def split_pdf_with_progress(job_id, input_path, temp_dir, max_pages_per_chunk, m
                     'total_chunks': split_progress[job_id]['total_chunks'],
                     'percentage': 100,
                     'message': 'Complete!',
-                    'zipfile': final_path
+                    'zipfile': final_path,
+                    # Chunks are now served from the zip file (see /api/split_chunk)
+                    'ready_chunks': split_progress[job_id].get('ready_chunks', []),
+                    'optimize_chunks': optimize_chunks,
+                    'optimized_chunks': split_progress[job_id].get('optimized_chunks', 0),
+                    'blank_pages': split_progress[job_id].get('blank_pages', [])
                 }
         else:
             # Clean up temp directory on failure
@@ -314,8 +389,17 @@ def extract_pages_with_progress(job_id, input_path, output_path, page_numbers, e
         }
 
 
-def optimize_pdf_with_progress(job_id, input_path, output_path, optimize_progress, aggressive=True):
-    """Run PDF optimization with progress tracking"""
+def optimize_pdf_with_progress(job_id, input_path, output_path, optimize_progress, aggressive=True, target_mb=None, dedupe_images=False, subset_fonts=False):
+    """
+    Run PDF optimization with progress tracking
+
+    dedupe_images and subset_fonts turn on the image dedupe and font subsetting
+    passes (see optimize_document); both are off by default as they are slow on
+    image- and font-heavy files
+
+    With target_mb the file is optimized just enough to get under that size (see optimize_to_size);
+    the result says whether the target was met, the final size and the strategy used
+    """
     try:
         # Check if job was already cancelled before we even started
         if optimize_progress[job_id].get('cancelled', False):
@@ -353,8 +437,50 @@ def optimize_pdf_with_progress(job_id, input_path, output_path, optimize_progres
             })
             return
         
+        if target_mb:
+            def progress_callback(current_step, total_steps, percentage, message):
+                if optimize_progress[job_id].get('cancelled', False):
+                    return False
+                optimize_progress[job_id].update({
+                    'status': 'processing',
+                    'percentage': percentage,
+                    'message': message
+                })
+                return True
+
+            def cancellation_checker():
+                return optimize_progress[job_id].get('cancelled', False)
+
+            target = optimize_to_size(input_path, output_path, int(target_mb * 1024 * 1024),
+                                      progress_callback=progress_callback, cancellation_checker=cancellation_checker)
+            if optimize_progress[job_id].get('cancelled', False):
+                logging.info(f"Optimize job {job_id} was cancelled")
+                optimize_progress[job_id].update({
+                    'status': 'cancelled',
+                    'message': 'PDF optimization was cancelled'
+                })
+            elif target:
+                optimize_progress[job_id] = {
+                    'status': 'complete',
+                    'message': 'PDF optimization completed successfully!',
+                    'filename': output_path,
+                    'target_mb': target_mb,
+                    'target_met': target['met'],
+                    'original_bytes': target['original_bytes'],
+                    'final_bytes': target['final_bytes'],
+                    'strategy': target['settings']['strategy']
+                }
+            else:
+                optimize_progress[job_id] = {
+                    'status': 'error',
+                    'message': 'PDF optimization failed'
+                }
+            return
+
         # Call optimize_pdf function (no cancellation checker support in current implementation)
-        result = optimize_pdf(input_path, output_path, aggressive)
+        image_report, font_report = {}, {}
+        result = optimize_pdf(input_path, output_path, aggressive, dedupe_images=dedupe_images, image_report=image_report,
+                              subset_fonts=subset_fonts, font_report=font_report)
         
         # Check if operation was cancelled during processing
         if optimize_progress[job_id].get('cancelled', False):
@@ -368,7 +494,10 @@ def optimize_pdf_with_progress(job_id, input_path, output_path, optimize_progres
             optimize_progress[job_id] = {
                 'status': 'complete',
                 'message': 'PDF optimization completed successfully!',
-                'filename': output_path
+                'filename': output_path,
+                'duplicate_images': image_report.get('duplicates', 0),
+                'images_bytes_saved': image_report.get('bytes_saved', 0),
+                'fonts_bytes_saved': font_report.get('bytes_saved', 0)
             }
         else:
             optimize_progress[job_id] = {
@@ -421,81 +550,21 @@ def compress_pdf_with_progress(job_id, input_path, output_path, should_optimize,
             })
             return
         
-        # Handle optimization if requested
-        temp_optimized_path = None
-        if should_optimize:
-            # Update status for optimization phase
-            compress_progress[job_id].update({
-                'status': 'processing',
-                'message': 'Optimizing PDF before compression...'
-            })
-            
-            # Log optimization start
-            logging.info(f"Starting optimization for job {job_id}")
-            
-            # Check for cancellation before optimization
-            if compress_progress[job_id].get('cancelled', False):
-                logging.info(f"Compress job {job_id} cancelled before optimization")
-                compress_progress[job_id].update({
-                    'status': 'cancelled',
-                    'message': 'PDF compression was cancelled'
-                })
-                return
-            
-            # Create temporary optimized file
-            temp_optimized_path = input_path.replace('.pdf', '_temp_optimized.pdf')
-            optimize_result = optimize_pdf(input_path, temp_optimized_path, aggressive=True)
-            
-            logging.info(f"Optimization completed for job {job_id}, result: {optimize_result}")
-            
-            if not optimize_result:
-                compress_progress[job_id] = {
-                    'status': 'error',
-                    'message': 'Optimization step failed'
-                }
-                return
-            
-            compress_input_path = temp_optimized_path
-        else:
-            compress_input_path = input_path
-        
-        # Update status for compression phase
+        # Optimization and compression share one open document and one save
         compress_progress[job_id].update({
             'status': 'processing',
-            'message': 'Compressing PDF file...'
+            'message': 'Optimizing and compressing PDF...' if should_optimize else 'Compressing PDF file...'
         })
         
-        # Add a small delay to ensure the UI sees the compression message
-        time.sleep(0.5)  # 500ms delay to ensure UI polling catches the message update
-        
         # Log the compression start for debugging
-        logging.info(f"Starting compression for job {job_id}: {compress_input_path} -> {output_path}")
-
-        # Final check for cancellation before compression
-        if compress_progress[job_id].get('cancelled', False):
-            logging.info(f"Compress job {job_id} cancelled before compression")
-            # Clean up temp optimized file if it exists
-            if should_optimize and temp_optimized_path and os.path.exists(temp_optimized_path):
-                os.unlink(temp_optimized_path)
-            compress_progress[job_id].update({
-                'status': 'cancelled',
-                'message': 'PDF compression was cancelled'
-            })
-            return
+        logging.info(f"Starting compression for job {job_id} (optimize: {should_optimize}): {input_path} -> {output_path}")
         
         # Call compress_pdf function (no cancellation checker support in current implementation)
-        result = compress_pdf(compress_input_path, output_path)
+        result = compress_pdf(input_path, output_path, optimize=should_optimize)
         
         # Log compression completion
         logging.info(f"Compression completed for job {job_id}, result: {result}")
         
-        # Clean up temporary optimized file if it was created
-        if should_optimize and temp_optimized_path and os.path.exists(temp_optimized_path):
-            try:
-                os.unlink(temp_optimized_path)
-            except Exception as e:
-                logging.warning(f"Failed to cleanup temp file {temp_optimized_path}: {e}")
-        
         # Check if operation was cancelled during processing
         if compress_progress[job_id].get('cancelled', False):
             logging.info(f"Compress job {job_id} was cancelled")
@@ -522,8 +591,14 @@ def compress_pdf_with_progress(job_id, input_path, output_path, should_optimize,
         }
 
 
-def combine_pdf_with_progress(job_id, input_paths, output_path, should_optimize, combine_progress):
-    """Run PDF combination with progress tracking"""
+def combine_pdf_with_progress(job_id, input_paths, output_path, should_optimize, combine_progress, remove_blank=False, remove_duplicates=False, duplicate_policy='first', zip_order=ZIP_ORDER_SORTED):
+    """
+    Run PDF combination with progress tracking (blank pages dropped with remove_blank are listed
+    in 'blank_pages', repeated pages dropped with remove_duplicates in 'duplicate_pages')
+
+    A single .zip upload is combined straight from the archive in zip_order (see combine_zip), and
+    scanned images (TIFF, JPEG, ...) are built into a PDF with one page per image (see images_to_pdf)
+    """
     try:
         # Check if job was already cancelled before we even started
         if combine_progress[job_id].get('cancelled', False):
@@ -549,8 +624,13 @@ def combine_pdf_with_progress(job_id, input_paths, output_path, should_optimize,
         # Handle optimization if requested
         optimized_paths = []
         actual_input_paths = input_paths
+        # Zip members are never written out, so there are no files to optimize one by one -
+        # optimizing only shares fonts and images in the combined file
+        is_zip = len(input_paths) == 1 and input_paths[0].lower().endswith('.zip')
+        # Scans are embedded as they are (JPEG, G4) or converted losslessly - there is nothing to optimize
+        is_images = len(input_paths) > 0 and all(path.lower().endswith(IMAGE_EXTENSIONS) for path in input_paths)
         
-        if should_optimize and len(input_paths) > 0:
+        if should_optimize and not is_zip and not is_images and len(input_paths) > 0:
             combine_progress[job_id].update({
                 'status': 'processing',
                 'message': f'Optimizing {len(input_paths)} PDF files before combining...'
@@ -565,54 +645,79 @@ def combine_pdf_with_progress(job_id, input_paths, output_path, should_optimize,
                 })
                 return
             
-            # Optimize each file
-            for i, input_path in enumerate(input_paths):
-                if combine_progress[job_id].get('cancelled', False):
-                    # Clean up any optimized files created so far
-                    for opt_path in optimized_paths:
-                        if os.path.exists(opt_path):
-                            os.unlink(opt_path)
-                    combine_progress[job_id].update({
-                        'status': 'cancelled',
-                        'message': 'PDF combination was cancelled'
-                    })
-                    return
-                
-                combine_progress[job_id].update({
-                    'status': 'processing',
-                    'message': f'Optimizing PDF {i+1} of {len(input_paths)}...'
-                })
-                
-                # Create optimized version
+            # Optimize all files in parallel worker processes. combine_pdfs sorts its
+            # inputs, so the temp names carry the zero-padded position of each input
+            # in sorted order - the combined order stays the same as without optimizing
+            sorted_inputs = sorted(input_paths)
+            total_files = len(sorted_inputs)
+            width = len(str(total_files))
+            for i, input_path in enumerate(sorted_inputs):
                 base_name = os.path.splitext(os.path.basename(input_path))[0]
                 temp_dir = os.path.dirname(input_path)
-                optimized_path = os.path.join(temp_dir, f"temp_optimized_{i}_{base_name}.pdf")
-                
-                optimize_result = optimize_pdf(input_path, optimized_path, aggressive=False)
-                if not optimize_result:
-                    # Clean up any previously created optimized files
-                    for opt_path in optimized_paths:
-                        if os.path.exists(opt_path):
-                            os.unlink(opt_path)
-                    combine_progress[job_id] = {
-                        'status': 'error',
-                        'message': f'Optimization failed for file {i+1}'
-                    }
-                    return
-                
-                optimized_paths.append(optimized_path)
+                optimized_paths.append(os.path.join(temp_dir, f"temp_optimized_{i:0{width}d}_{base_name}.pdf"))
+            
+            def remove_optimized_files():
+                for opt_path in optimized_paths:
+                    if os.path.exists(opt_path):
+                        os.unlink(opt_path)
+            
+            pool = multiprocessing.Pool(processes=min(total_files, os.cpu_count() or 1))
+            try:
+                pending = {
+                    i: pool.apply_async(optimize_pdf, (input_path, optimized_path), {'aggressive': False})
+                    for i, (input_path, optimized_path) in enumerate(zip(sorted_inputs, optimized_paths))
+                }
+                optimized_count = 0
+                while pending:
+                    if combine_progress[job_id].get('cancelled', False):
+                        # Stop every worker right away, including the ones mid-file
+                        logging.info(f"Combine job {job_id} cancelled during optimization - stopping workers")
+                        pool.terminate()
+                        pool.join()
+                        remove_optimized_files()
+                        combine_progress[job_id].update({
+                            'status': 'cancelled',
+                            'message': 'PDF combination was cancelled'
+                        })
+                        return
+                    
+                    for i in [i for i, result in pending.items() if result.ready()]:
+                        if not pending.pop(i).get():
+                            pool.terminate()
+                            pool.join()
+                            remove_optimized_files()
+                            combine_progress[job_id] = {
+                                'status': 'error',
+                                'message': f'Optimization failed for {os.path.basename(sorted_inputs[i])}'
+                            }
+                            return
+                        optimized_count += 1
+                        combine_progress[job_id].update({
+                            'status': 'processing',
+                            'message': f'Optimized {optimized_count} of {total_files} PDF files...',
+                            'optimized_files': optimized_count,
+                            'total_files': total_files
+                        })
+                    
+                    if pending:
+                        pending_result = next(iter(pending.values()))
+                        pending_result.wait(0.1)
+                pool.close()
+                pool.join()
+            finally:
+                pool.terminate()
             
             actual_input_paths = optimized_paths
         
         # Update status for combination phase
         combine_progress[job_id].update({
             'status': 'processing',
-            'message': f'Combining {len(actual_input_paths)} PDF files...'
+            'message': f'Combining {len(actual_input_paths)} PDF files...',
+            'combined_files': 0,
+            'total_files': len(actual_input_paths),
+            'percentage': 0
         })
         
-        # Add a small delay to ensure the UI sees the combination message
-        time.sleep(0.5)  # 500ms delay to ensure UI polling catches the message update
-        
         # Log the combination start for debugging
         logging.info(f"Starting combination for job {job_id}: {len(actual_input_paths)} files -> {output_path}")
 
@@ -628,8 +733,53 @@ def combine_pdf_with_progress(job_id, input_paths, output_path, should_optimize,
             })
             return
         
-        # Call combine_pdfs function (no cancellation checker support in current implementation)
-        result = combine_pdfs(actual_input_paths, output_path)
+        def progress_callback(current_file, total_files, percentage, message):
+            if combine_progress[job_id].get('cancelled', False):
+                logging.info(f"Combine job {job_id} cancelled during progress callback")
+                return False
+            combine_progress[job_id].update({
+                'status': 'processing',
+                'combined_files': current_file,
+                'total_files': total_files,
+                'percentage': percentage,
+                'message': message
+            })
+            return True
+        
+        def cancellation_checker():
+            return combine_progress[job_id].get('cancelled', False)
+        
+        blank_report = []
+        duplicate_report = []
+        input_errors = []
+        # Optimizing also shares the fonts and images embedded by each input
+        font_report, image_report = {}, {}
+        if is_images:
+            result = images_to_pdf(input_paths, output_path, progress_callback=progress_callback,
+                                   cancellation_checker=cancellation_checker, input_errors=input_errors)
+        elif is_zip:
+            result = combine_zip(input_paths[0], output_path, order=zip_order, remove_blank=remove_blank, blank_report=blank_report,
+                                 unify_fonts=should_optimize, font_report=font_report,
+                                 dedupe_images=should_optimize, image_report=image_report,
+                                 progress_callback=progress_callback, cancellation_checker=cancellation_checker,
+                                 dedupe_pages=remove_duplicates, duplicate_policy=duplicate_policy, duplicate_report=duplicate_report,
+                                 input_errors=input_errors)
+        else:
+            result = combine_pdfs(actual_input_paths, output_path, remove_blank=remove_blank, blank_report=blank_report,
+                                  unify_fonts=should_optimize, font_report=font_report,
+                                  dedupe_images=should_optimize, image_report=image_report,
+                                  progress_callback=progress_callback, cancellation_checker=cancellation_checker,
+                                  dedupe_pages=remove_duplicates, duplicate_policy=duplicate_policy, duplicate_report=duplicate_report,
+                                  input_errors=input_errors)
+        # Report blank pages against the uploaded file names, not the temporary optimized copies
+        source_names = {os.path.basename(opt_path): os.path.basename(path) for opt_path, path in zip(optimized_paths, sorted(input_paths))}
+        for entry in blank_report:
+            entry['file'] = source_names.get(entry['file'], entry['file'])
+        for entry in duplicate_report:
+            entry['file'] = source_names.get(entry['file'], entry['file'])
+            entry['kept_file'] = source_names.get(entry['kept_file'], entry['kept_file'])
+        for entry in input_errors:
+            entry['file'] = source_names.get(entry['file'], entry['file'])
         
         # Log combination completion
         logging.info(f"Combination completed for job {job_id}, result: {result}")
@@ -651,7 +801,19 @@ def combine_pdf_with_progress(job_id, input_paths, output_path, should_optimize,
             combine_progress[job_id] = {
                 'status': 'complete',
                 'message': 'PDF combination completed successfully!',
-                'filename': output_path
+                'filename': output_path,
+                'blank_pages': blank_report,
+                'duplicate_pages': duplicate_report,
+                'fonts_bytes_saved': font_report.get('bytes_saved', 0),
+                'duplicate_images': image_report.get('duplicates', 0),
+                'images_bytes_saved': image_report.get('bytes_saved', 0)
+            }
+        elif input_errors:
+            # Checked before merging - list every file that can't be combined
+            combine_progress[job_id] = {
+                'status': 'error',
+                'message': 'Some files can\'t be combined: ' + '; '.join(f"{entry['file']} {entry['error']}" for entry in input_errors),
+                'input_errors': input_errors
             }
         else:
             combine_progress[job_id] = {